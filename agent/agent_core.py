@@ -1,9 +1,6 @@
 # agent/agent_core.py
 
-import duckdb
 import re
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
 
 from agent.intent_resolver import detect_intent
 from agent.conversation import handle_conversation
@@ -13,13 +10,47 @@ from agent.memory import (
     last_intent,
 )
 from agent.sql_templates import SQL_TEMPLATES
-from agent.sql_guardrails import validate_sql
+from agent.sql_guardrails import validate_sql, check_result_size
 from agent.llm_intent import llm_detect_intent
 from agent.followups import handle_follow_up
 from agent.insights import generate_insight
 from agent.knowledge import translate_category
-
-DB_PATH = "db/olist.db"
+from agent.config import COLUMNAR_ENGINE, DB_PATH
+from agent.db import connect
+from agent.snapshots import active_path
+from agent.topk import topk_sql, topk_bound
+from agent.approx import wants_approximate, approximate_sql
+from agent.tracing import start_trace, span, annotate
+from agent.profiling import maybe_capture
+from agent.governor import run_governed, QueryRejected, QueryTimeout
+from agent.time_windows import (
+    parse_time_window,
+    resolve_window,
+    dataset_max_date,
+    supports_time_window,
+    apply_time_window,
+    describe_window,
+    describe_month_span,
+)
+from agent.geo import (
+    parse_radius,
+    resolve_place,
+    supports_radius,
+    apply_radius,
+    describe_radius,
+)
+from agent.logistics import (
+    LEAD_TIME_INTENTS,
+    parse_lead_time,
+    lead_time_sql,
+    describe_lead,
+)
+from agent.cohorts import COHORT_INTENTS
+from agent.sketches import (
+    SKETCH_INTENTS,
+    sketch_sql,
+    describe_accuracy,
+)
 
 # ----------------------------------
 # Filter support
@@ -27,7 +58,6 @@ DB_PATH = "db/olist.db"
 FILTER_COLUMNS = {
     "year": ["year"],
     "month": ["year_month"],
-    "months": ["order_purchase_timestamp"],
     "category": ["category"],
 }
 
@@ -40,6 +70,21 @@ METRIC_KEYWORDS = {
 # ----------------------------------
 # Helpers
 # ----------------------------------
+def applicable_filters(sql: str, filters: dict) -> dict:
+    """
+    Subset of filters that apply to this SQL: a column filter only
+    applies if its column appears in the query; limit and time
+    window always apply.
+    """
+    sql_lower = sql.lower()
+    return {
+        key: value
+        for key, value in (filters or {}).items()
+        if key in ("limit", "order", "window")
+        or any(col in sql_lower for col in FILTER_COLUMNS.get(key, []))
+    }
+
+
 def metric_from_question(q: str):
     for metric, words in METRIC_KEYWORDS.items():
         if any(w in q for w in words):
@@ -78,6 +123,15 @@ def apply_filters(sql: str, filters: dict):
         order_by = m.group()
         sql_clean = sql_clean[: m.start()].strip()
 
+        # "bottom N" flips the ranking direction
+        if "order" in filters:
+            order_by = re.sub(
+                r"\b(asc|desc)\b",
+                filters["order"].upper(),
+                order_by,
+                flags=re.IGNORECASE,
+            )
+
     conditions = []
     sql_lower = sql_clean.lower()
 
@@ -85,7 +139,7 @@ def apply_filters(sql: str, filters: dict):
     # 3️⃣ WHERE conditions
     # ----------------------------------
     for key, value in filters.items():
-        if key == "limit":
+        if key in ("limit", "order"):
             continue
 
         for col in FILTER_COLUMNS.get(key, []):
@@ -94,11 +148,6 @@ def apply_filters(sql: str, filters: dict):
 
             if key == "month":
                 conditions.append(f"{col} LIKE '{value}%'")
-            elif key == "months":
-                cutoff = datetime.now() - relativedelta(months=value)
-                conditions.append(
-                    f"{col} >= TIMESTAMP '{cutoff.strftime('%Y-%m-%d')}'"
-                )
             elif key == "category":
                 conditions.append(f"{col} = '{value}'")
             else:
@@ -125,37 +174,192 @@ def apply_filters(sql: str, filters: dict):
     return sql_clean
 
 
+# ----------------------------------
+# Execution
+# ----------------------------------
+def _db_path():
+    """Current snapshot of DB_PATH; per-DB caches are keyed by it."""
+    return active_path(DB_PATH)
+
+
+def _connect():
+    return connect(_db_path())
+
+
+def run_sql(sql: str, intent: str = None, filters: dict = None):
+    """
+    Executes a validated query under the governor (admission control,
+    timeout, row cap). Queries estimated to return more than
+    OLIST_SQL_MAX_RESULT_ROWS rows are refused. Slow queries (above
+    OLIST_SLOW_QUERY_MS) are re-run with DuckDB profiling in the background.
+    """
+    with span("connect"):
+        con = _connect()
+    try:
+        with span("check_result_size"):
+            check_result_size(con, sql, _db_path())
+        df = run_governed(con, sql)
+    finally:
+        con.close()
+
+    if maybe_capture(_connect, sql, df.attrs["elapsed_ms"], intent, filters):
+        annotate("slow_query", True)
+
+    return df
+
+
+def execute_intent(intent: str, filters: dict, approximate: bool = False):
+    """
+    Runs a resolved intent: approximate sample, columnar engine, cohort
+    matrices, top-K table, histogram / sketch merge or SQL template, in
+    that order. No conversation memory is
+    touched. Returns (df, approximate).
+    """
+    # ---- Approximate mode (opt-in) ----
+    if approximate:
+        approx_sql = approximate_sql(intent, filters)
+        if approx_sql is not None:
+            annotate("engine", "approximate")
+            with span("validate_sql"):
+                validate_sql(approx_sql)
+            return run_sql(approx_sql, intent, filters), True
+
+    # ---- Hot intents: in-process columnar engine ----
+    if COLUMNAR_ENGINE:
+        from agent.columnar import get_engine
+
+        with span("columnar"):
+            df = get_engine(_db_path()).query(
+                intent, applicable_filters(SQL_TEMPLATES[intent], filters)
+            )
+        if df is not None:
+            annotate("engine", "columnar")
+            return df, False
+
+    # ---- Cohorts / retention: precomputed cohort matrices ----
+    if intent in COHORT_INTENTS:
+        from agent.cohorts import get_cohorts
+
+        with span("cohorts"):
+            df = get_cohorts(_db_path()).query(
+                intent, applicable_filters(SQL_TEMPLATES[intent], filters)
+            )
+        if df is not None:
+            annotate("engine", "cohort")
+            return df, False
+
+    # ---- Build & execute SQL ----
+    # Top/bottom N → prefix read of a ranked table (no full sort)
+    sql = topk_sql(intent, filters, topk_bound(_db_path()))
+    annotate("engine", "topk" if sql else "sql")
+
+    # Lead-time percentiles → merge of precomputed histograms
+    if sql is None:
+        sql = lead_time_sql(intent, filters)
+        if sql is not None:
+            annotate("engine", "histogram")
+
+    # Distinct counts / percentiles → merge of precomputed sketches
+    if sql is None:
+        sql = sketch_sql(intent, filters)
+        if sql is not None:
+            annotate("engine", "sketch")
+
+    if sql is None:
+        with span("apply_filters"):
+            sql = SQL_TEMPLATES[intent]
+            sql = apply_filters(sql, filters)
+            if "window" in filters:
+                sql = apply_time_window(sql, *filters["window"])
+            if "radius" in filters:
+                _, lat, lng, km = filters["radius"]
+                sql = apply_radius(sql, lat, lng, km)
+
+    with span("validate_sql"):
+        validate_sql(sql)
+
+    return run_sql(sql, intent, filters), False
+
+
 # ----------------------------------
 # Main entry point
 # ----------------------------------
-def answer(question: str):
+def answer(question: str, approximate: bool = False):
+    """
+    Answers a question. With approximate=True (or phrasing like
+    "roughly" / "approximately"), supported revenue intents are
+    estimated from the stratified sample and carry 95% CIs.
+
+    Every call is traced; data results carry the trace under "trace".
+    """
+    with start_trace(question) as trace:
+        result = _answer(question, approximate)
+        trace.set("outcome", "data" if isinstance(result, dict) else "text")
+
+    if isinstance(result, dict):
+        result["trace"] = trace.to_dict()
+    return result
+
+
+def warmup():
+    """
+    Pays the deferred startup costs ahead of the first question:
+    heavy imports, the dataset anchor date, the top-K bound, guardrail
+    verdicts for every template and, if enabled, the columnar engine.
+    Safe to call from a background thread.
+    """
+    import pandas  # noqa: F401
+
+    for sql in SQL_TEMPLATES.values():
+        validate_sql(sql)
+
+    dataset_max_date(_db_path())
+    topk_bound(_db_path())
+    if COLUMNAR_ENGINE:
+        from agent.columnar import get_engine
+
+        get_engine(_db_path())
+
+
+def _answer(question: str, approximate: bool):
     q = question.strip().lower()
 
     # ---- Safety ----
-    if re.search(r"\b(drop|delete|truncate|alter)\b", q):
-        return "Unsafe or unsupported query detected."
+    with span("safety"):
+        if re.search(r"\b(drop|delete|truncate|alter)\b", q):
+            return "Unsafe or unsupported query detected."
 
-    if "predict" in q or "forecast" in q:
-        return "I can’t predict future outcomes with the current dataset."
+        if "predict" in q or "forecast" in q:
+            return "I can’t predict future outcomes with the current dataset."
 
     # ---- Conversation / knowledge ----
-    convo = handle_conversation(q)
+    with span("handle_conversation"):
+        convo = handle_conversation(q)
     if convo:
+        annotate("resolution", "conversation")
         return convo
 
     # ---- Metric override detection ----
     explicit_metric = metric_from_question(q)
 
     # ---- Follow-ups ----
-    follow = handle_follow_up(q)
+    with span("handle_follow_up"):
+        follow = handle_follow_up(q)
     if follow:
         intent, filters = follow
+        annotate("resolution", "follow-up")
     else:
-        intent = detect_intent(q)
+        with span("detect_intent"):
+            intent = detect_intent(q)
         filters = {}
+        if intent:
+            annotate("resolution", "rule")
 
         if not intent:
-            intent = llm_detect_intent(q, list(SQL_TEMPLATES.keys()))
+            with span("llm_detect_intent"):
+                intent = llm_detect_intent(q, list(SQL_TEMPLATES.keys()))
+            if intent:
+                annotate("resolution", "llm")
 
     last = last_intent()
 
@@ -169,6 +373,8 @@ def answer(question: str):
 
     if not intent:
         intent = last
+        if intent:
+            annotate("resolution", "memory")
 
     if not intent:
         return "Sorry, I couldn’t map this question to a supported analysis."
@@ -179,10 +385,54 @@ def answer(question: str):
     # --------------------------------------------------
     # Category extraction via knowledge aliases
     # --------------------------------------------------
-    translated_category = translate_category(q)
+    with span("translate_category"):
+        translated_category = translate_category(q)
     if translated_category:
         filters["category"] = translated_category
 
+    # --------------------------------------------------
+    # Time window ("last 6 months", "Q3 2017", "YTD")
+    # Anchored to the dataset's last order date
+    # --------------------------------------------------
+    with span("time_window"):
+        window = parse_time_window(q)
+        if "months" in filters:
+            window = ("last", filters.pop("months"), "months")
+        if window:
+            filters["window"] = resolve_window(window, dataset_max_date(_db_path()))
+
+    if "window" in filters and not (
+        supports_time_window(SQL_TEMPLATES[intent])
+        or intent in LEAD_TIME_INTENTS
+        or intent in SKETCH_INTENTS
+    ):
+        return "Time filters are not supported for this analysis yet."
+
+    # Lead-time percentiles ("p90 delivery time to SP")
+    if intent in LEAD_TIME_INTENTS:
+        lead = parse_lead_time(question)
+        if lead:
+            filters["lead"] = lead
+
+    # --------------------------------------------------
+    # Radius ("within 100 km of Sao Paulo") → grid-indexed
+    # zip-prefix aggregates
+    # --------------------------------------------------
+    with span("radius"):
+        radius = parse_radius(q)
+        if radius:
+            km, place = radius
+            center = resolve_place(place, _db_path())
+            if center is None:
+                return f"I couldn’t find a place called “{place}” (try a city, a state code or a zip prefix)."
+            filters["radius"] = (*center, km)
+
+    if "radius" in filters and not supports_radius(intent):
+        return "Radius filters are only supported for revenue (e.g. “revenue within 100 km of Sao Paulo”)."
+
+    if supports_radius(intent) and "radius" not in filters:
+        return "Which area? e.g. “revenue within 100 km of Sao Paulo” (a city, a state code or a zip prefix)."
+
     # --------------------------------------------------
     # 🔑 FINAL INTENT CORRECTION (CRITICAL FIX)
     # If metric is requested FOR a specific category,
@@ -197,14 +447,16 @@ def answer(question: str):
             intent = "most_selling_category"
             filters["limit"] = 1
 
-    # ---- Build & execute SQL ----
-    sql = SQL_TEMPLATES[intent]
-    sql = apply_filters(sql, filters)
-    validate_sql(sql)
+    annotate("intent", intent)
 
-    con = duckdb.connect(DB_PATH)
-    df = con.execute(sql).fetchdf()
-    con.close()
+    try:
+        df, approximate = execute_intent(intent, filters, approximate or wants_approximate(q))
+    except QueryTimeout:
+        annotate("governor", "timeout")
+        return "⏱️ This analysis took too long and was cancelled. Try narrowing it (a category, a year or a smaller top N)."
+    except QueryRejected:
+        annotate("governor", "busy")
+        return "🚦 The assistant is busy with other queries right now. Please try again in a moment."
 
     if df.empty:
         return "No data found."
@@ -212,11 +464,34 @@ def answer(question: str):
     remember_intent(intent)
     remember_modifiers(filters)
 
-    insight = generate_insight(intent, df)
+    with span("generate_insight"):
+        insight = generate_insight(intent, df)
+
+    summary = f"### 📊 {intent.replace('_', ' ').title()}"
+    if "window" in filters:
+        # Month-grain aggregates answer for the whole months they cover
+        if intent in LEAD_TIME_INTENTS or intent in SKETCH_INTENTS:
+            summary += f" ({describe_month_span(filters['window'])})"
+        else:
+            summary += f" ({describe_window(filters['window'])})"
+    if "radius" in filters:
+        summary += f" ({describe_radius(filters['radius'])})"
+    if "lead" in filters:
+        summary += f" ({describe_lead(filters['lead'])})"
+    if intent in SKETCH_INTENTS:
+        summary += f" ({describe_accuracy()})"
+    if approximate:
+        summary += " (≈ approximate, 95% CI)"
+    truncated = df.attrs.get("truncated", False)
+    if truncated:
+        summary += f" (first {len(df):,} rows)"
 
     return {
         "intent": intent,
+        "filters": dict(filters),
         "df": df,
-        "summary": f"### 📊 {intent.replace('_', ' ').title()}",
+        "summary": summary,
         "insight": insight,
+        "approximate": approximate,
+        "truncated": truncated,
     }
@@ -0,0 +1,165 @@
+# agent/approx.py
+
+"""
+Approximate query mode.
+
+Opt-in ("roughly", "approximately", ... or answer(q, approximate=True))
+answers for the revenue intents, computed from a stratified sample of
+f_order_facts instead of the full fact table.
+
+- Strata: category × year_month (built by setup_db)
+- Estimator: stratified expansion estimator of SUM(payment_value)
+- Error: 95% confidence interval per returned row
+    Var(T̂) = Σ_h N_h² · (1 − n_h/N_h) · s_h² / n_h
+
+Every group the templates return (category, year, month, year ×
+category) is a union of whole strata, so the estimate is unbiased and
+the interval is the textbook stratified one.
+"""
+
+import re
+from typing import Optional
+
+from agent.config import SAMPLE_FRACTION, SAMPLE_MIN_ROWS
+
+Z_95 = 1.96
+
+APPROX_TRIGGERS = r"\b(roughly|approximately|approx|approximate|ballpark|estimate|estimated)\b"
+
+# intent → (group columns, order by, default limit)
+APPROX_INTENTS = {
+    "highest_revenue_category": (["category"], "revenue DESC", 1),
+    "lowest_revenue_category": (["category"], "revenue ASC", 1),
+    "revenue_by_category": (["category"], "revenue DESC", None),
+    "category_revenue_by_year": (["year", "category"], "year, revenue DESC", None),
+    "yearly_revenue": (["year"], "year", None),
+    "monthly_revenue_trend": (["year_month"], "year_month", None),
+}
+
+GROUP_EXPRESSIONS = {
+    "category": "category",
+    "year": "CAST(SUBSTR(year_month, 1, 4) AS BIGINT)",
+    "year_month": "year_month",
+}
+
+
+def wants_approximate(question: str) -> bool:
+    return re.search(APPROX_TRIGGERS, question.lower()) is not None
+
+
+# ----------------------------------
+# Build (called from db/setup_db.py)
+# ----------------------------------
+def build_sample_tables(con, fraction: float = None, min_rows: int = None):
+    """Stratified sample of f_order_facts, one stratum per category × month."""
+    fraction = fraction or SAMPLE_FRACTION
+    min_rows = min_rows or SAMPLE_MIN_ROWS
+
+    con.execute(f"""
+        CREATE OR REPLACE TABLE s_strata AS
+        SELECT
+            category,
+            strftime(order_purchase_timestamp, '%Y-%m') AS year_month,
+            COUNT(*) AS n_total,
+            LEAST(
+                COUNT(*),
+                GREATEST({int(min_rows)}, CAST(CEIL(COUNT(*) * {float(fraction)}) AS BIGINT))
+            ) AS n_sample
+        FROM f_order_facts
+        GROUP BY category, year_month
+    """)
+
+    # Deterministic pseudo-random pick inside each stratum
+    con.execute("""
+        CREATE OR REPLACE TABLE s_order_facts AS
+        SELECT s.category, s.year_month, s.payment_value
+        FROM (
+            SELECT
+                category,
+                strftime(order_purchase_timestamp, '%Y-%m') AS year_month,
+                payment_value,
+                ROW_NUMBER() OVER (
+                    PARTITION BY category, strftime(order_purchase_timestamp, '%Y-%m')
+                    ORDER BY hash(order_id, product_id, seller_id, payment_type, payment_value)
+                ) AS rn
+            FROM f_order_facts
+        ) s
+        JOIN s_strata st
+            ON s.category = st.category AND s.year_month = st.year_month
+        WHERE s.rn <= st.n_sample
+        ORDER BY s.category, s.year_month
+    """)
+
+
+# ----------------------------------
+# Query
+# ----------------------------------
+def approximate_sql(intent: str, filters: dict) -> Optional[str]:
+    """
+    SQL returning the template's columns plus revenue_ci_low /
+    revenue_ci_high, or None if the intent/filters can't be estimated.
+    """
+    spec = APPROX_INTENTS.get(intent)
+    if not spec:
+        return None
+
+    filters = filters or {}
+    if set(filters) - {"category", "year", "limit", "order"}:
+        return None
+
+    groups, order_by, default_limit = spec
+
+    conditions = []
+    if "category" in filters:
+        conditions.append(f"category = '{filters['category']}'")
+    if "year" in filters and "year" in groups:
+        conditions.append(f"year_month LIKE '{int(filters['year'])}-%'")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    if "order" in filters:
+        order_by = re.sub(r"\b(ASC|DESC)\b", filters["order"].upper(), order_by)
+        if "ASC" not in order_by and "DESC" not in order_by:
+            order_by += f" {filters['order'].upper()}"
+
+    select_groups = ",\n            ".join(
+        f"{GROUP_EXPRESSIONS[g]} AS {g}" for g in groups
+    )
+    group_list = ", ".join(groups)
+
+    limit = filters.get("limit", default_limit)
+    limit_sql = f"LIMIT {int(limit)}" if limit is not None else ""
+
+    return f"""
+        SELECT
+            {group_list},
+            revenue,
+            revenue - {Z_95} * SQRT(variance) AS revenue_ci_low,
+            revenue + {Z_95} * SQRT(variance) AS revenue_ci_high
+        FROM (
+            SELECT
+                {select_groups},
+                SUM(n_total * sample_sum / n) AS revenue,
+                SUM(
+                    CASE WHEN n > 1
+                    THEN n_total * n_total * (1 - n / n_total) * sample_var / n
+                    ELSE 0 END
+                ) AS variance
+            FROM (
+                SELECT
+                    s.category,
+                    s.year_month,
+                    st.n_total,
+                    COUNT(*) AS n,
+                    SUM(s.payment_value) AS sample_sum,
+                    VAR_SAMP(s.payment_value) AS sample_var
+                FROM s_order_facts s
+                JOIN s_strata st
+                    ON s.category = st.category AND s.year_month = st.year_month
+                GROUP BY s.category, s.year_month, st.n_total
+            )
+            {where}
+            GROUP BY {group_list}
+        )
+        ORDER BY {order_by}
+        {limit_sql}
+    """
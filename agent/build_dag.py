@@ -0,0 +1,196 @@
+# agent/build_dag.py
+
+"""
+Declarative database build.
+
+A build is a list of BuildStep objects (db/setup_db.py). Each step
+names the steps it depends on and either a SQL statement or a Python
+function taking a connection. run_dag():
+
+- runs independent steps in parallel, one DuckDB cursor per worker
+- fingerprints every step (its SQL / module source, parameters,
+  input file sizes + mtimes, and the fingerprints of its dependencies)
+  and skips steps whose fingerprint matches the one stored in the DB
+- can rebuild selected targets only (plus whatever they need that is
+  stale); dependents are left alone unless stale themselves
+- records per-step timing in the _build_steps table
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+STATE_TABLE = "_build_steps"
+
+RAN, SKIPPED, FAILED = "ran", "skipped", "failed"
+
+
+class BuildStep:
+    def __init__(self, name, deps=(), sql=None, run=None, inputs=(), params=None, label=None):
+        if (sql is None) == (run is None):
+            raise ValueError(f"Step {name} needs exactly one of sql / run")
+        self.name = name
+        self.deps = tuple(deps)
+        self.sql = sql
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.params = params or {}
+        self.label = label or name
+
+    def definition(self) -> str:
+        # A Python step depends on its whole module (e.g. TOPK_TABLES)
+        return self.sql if self.sql is not None else inspect.getsource(inspect.getmodule(self.run))
+
+    def execute(self, con):
+        if self.sql is not None:
+            con.execute(self.sql)
+        else:
+            self.run(con, **self.params)
+
+
+# ----------------------------------
+# Planning
+# ----------------------------------
+def topological(steps: list) -> list:
+    by_name = {s.name: s for s in steps}
+    order, state = [], {}
+
+    def visit(step, path):
+        if state.get(step.name) == "done":
+            return
+        if state.get(step.name) == "visiting":
+            raise ValueError(f"Dependency cycle: {' → '.join(path + [step.name])}")
+        state[step.name] = "visiting"
+        for dep in step.deps:
+            if dep not in by_name:
+                raise ValueError(f"Step {step.name} depends on unknown step {dep}")
+            visit(by_name[dep], path + [step.name])
+        state[step.name] = "done"
+        order.append(step)
+
+    for step in steps:
+        visit(step, [])
+    return order
+
+
+def _input_signature(path: str):
+    try:
+        st = os.stat(path)
+        return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+    except FileNotFoundError:
+        return [os.path.abspath(path), None, None]
+
+
+def fingerprints(steps: list) -> dict:
+    result = {}
+    for step in topological(steps):
+        payload = json.dumps([
+            step.name,
+            step.definition(),
+            step.params,
+            [_input_signature(p) for p in step.inputs],
+            [result[d] for d in step.deps],
+        ], sort_keys=True, default=str)
+        result[step.name] = hashlib.sha256(payload.encode()).hexdigest()
+    return result
+
+
+def upstream(steps: list, targets) -> set:
+    by_name = {s.name: s for s in steps}
+    seen, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        if name not in by_name:
+            raise ValueError(f"Unknown build target: {name}")
+        seen.add(name)
+        todo.extend(by_name[name].deps)
+    return seen
+
+
+def stored_fingerprints(con) -> dict:
+    import duckdb
+
+    try:
+        return dict(con.execute(f"SELECT name, fingerprint FROM {STATE_TABLE}").fetchall())
+    except duckdb.CatalogException:
+        return {}
+
+
+def plan(steps: list, stored: dict, targets=None, force: bool = False) -> list:
+    """Steps to run, in topological order."""
+    current = fingerprints(steps)
+    scope = upstream(steps, targets) if targets else {s.name for s in steps}
+    forced = set(targets or ())
+    return [
+        s for s in topological(steps)
+        if s.name in scope and (force or s.name in forced or stored.get(s.name) != current[s.name])
+    ]
+
+
+# ----------------------------------
+# Execution
+# ----------------------------------
+def run_dag(con, steps: list, targets=None, force: bool = False, workers: int = None, log=print) -> list:
+    """
+    Builds what is stale (or forced) and returns
+    [(name, status, seconds)] for every step.
+    """
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            name TEXT PRIMARY KEY, fingerprint TEXT, seconds DOUBLE, built_at TIMESTAMP
+        )
+    """)
+    current = fingerprints(steps)
+    todo = plan(steps, stored_fingerprints(con), targets, force)
+    pending = {s.name: s for s in todo}
+    remaining = {s.name: {d for d in s.deps if d in pending} for s in todo}
+
+    report = {s.name: (SKIPPED, 0.0) for s in steps}
+
+    def work(step):
+        cur = con.cursor()
+        try:
+            t0 = time.perf_counter()
+            step.execute(cur)
+            return time.perf_counter() - t0
+        finally:
+            cur.close()
+
+    failure = None
+    with ThreadPoolExecutor(workers or os.cpu_count() or 1, thread_name_prefix="olist-build") as pool:
+        running = {}
+        while pending or running:
+            if failure is None:
+                ready = [n for n in list(pending) if not remaining[n]]
+                for name in ready:
+                    step = pending.pop(name)
+                    running[pool.submit(work, step)] = step
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    failure = failure or (step, e)
+                    report[step.name] = (FAILED, 0.0)
+                    log(f"❌ {step.label} failed: {e}")
+                    continue
+                report[step.name] = (RAN, seconds)
+                con.execute(
+                    f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?, ?, now())",
+                    [step.name, current[step.name], seconds],
+                )
+                for deps in remaining.values():
+                    deps.discard(step.name)
+                log(f"✅ {step.label:<44}{seconds:>8.2f}s")
+
+    if failure is not None:
+        raise RuntimeError(f"Build step {failure[0].name} failed") from failure[1]
+    return [(s.name, *report[s.name]) for s in topological(steps)]
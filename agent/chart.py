@@ -1,59 +1,205 @@
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mtick
+# agent/chart.py
 
+"""
+Chart rendering.
+
+Figures are built with matplotlib's object-oriented API (Figure +
+Agg canvas, no pyplot global state), so nothing is registered
+globally and a figure is freed as soon as it is rendered.
+
+render_chart() returns PNG/SVG bytes, cached by result fingerprint and
+chart spec: re-rendering the same result (e.g. toggling Table/Chart)
+is a dictionary lookup. Renders run on a small worker pool; identical
+in-flight renders are shared.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from agent.config import (
+    CHART_CACHE_MB,
+    CHART_DOWNSAMPLE,
+    CHART_DPI,
+    CHART_MAX_BARS,
+    CHART_MAX_HEIGHT_IN,
+    CHART_MAX_POINTS,
+    CHART_WORKERS,
+)
+
+# Bump when the chart look changes (invalidates cached images)
+CHART_VERSION = 2
+MAX_XTICKS = 12
+
+WIDTH_IN = 10
+MIN_HEIGHT_IN = 4
+
+
+# ----------------------------------
+# Figure
+# ----------------------------------
 def plot(df, x_col, y_col):
     """
     Intelligent plotting:
     - Horizontal bars for categorical data
     - Vertical line chart for time series
-    - Auto-resizes based on data
+    - Auto-resizes based on data (capped at CHART_MAX_HEIGHT_IN)
     - Prevents label collision
+    - Large results are reduced first (top N + Other, downsampling)
     """
+    # matplotlib is imported on first chart, not at app start
+    import matplotlib.ticker as mtick
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from agent.chart_data import is_time_series, reduce_for_chart
+
+    # Bounded number of marks, whatever the result size
+    df, note = reduce_for_chart(df, x_col, y_col)
 
     # Number of rows
     n = len(df)
 
     # Auto figure size
-    height = max(4, n * 0.4)
-    fig, ax = plt.subplots(figsize=(10, height))
-
-    # Detect time series
-    is_time_series = "month" in x_col.lower() or "year" in x_col.lower()
+    height = min(CHART_MAX_HEIGHT_IN, max(MIN_HEIGHT_IN, n * 0.4))
+    fig = Figure(figsize=(WIDTH_IN, height))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
 
     # ----------------------------
     # Time series → line chart
     # ----------------------------
-    if is_time_series:
-        ax.plot(df[x_col], df[y_col], marker="o")
+    if is_time_series(x_col):
+        ax.plot(df[x_col].astype(str), df[y_col], marker="o" if n <= 60 else None)
         ax.set_xlabel(x_col.replace("_", " ").title())
         ax.set_ylabel(y_col.replace("_", " ").title())
+        value_axis = ax.yaxis
 
-        # Rotate labels if many points
+        # Thin out and rotate labels if many points
+        if n > MAX_XTICKS:
+            ax.xaxis.set_major_locator(mtick.MaxNLocator(MAX_XTICKS))
         if n > 6:
-            plt.xticks(rotation=45, ha="right")
+            ax.tick_params(axis="x", labelrotation=45)
+            for label in ax.get_xticklabels():
+                label.set_horizontalalignment("right")
 
     # ----------------------------
     # Categorical → horizontal bar
     # ----------------------------
     else:
-        ax.barh(df[x_col], df[y_col])
+        ax.barh(df[x_col].astype(str), df[y_col])
         ax.set_ylabel(x_col.replace("_", " ").title())
         ax.set_xlabel(y_col.replace("_", " ").title())
         ax.invert_yaxis()  # highest at top
+        value_axis = ax.xaxis
 
     # ----------------------------
     # Number formatting
     # ----------------------------
-    if "revenue" in y_col.lower():
-        ax.xaxis.set_major_formatter(
-            mtick.FuncFormatter(lambda x, _: f"{int(x):,}")
-        )
-    elif "units" in y_col.lower():
-        ax.xaxis.set_major_formatter(
+    if "revenue" in y_col.lower() or "units" in y_col.lower():
+        value_axis.set_major_formatter(
             mtick.FuncFormatter(lambda x, _: f"{int(x):,}")
         )
 
     ax.grid(axis="x", linestyle="--", alpha=0.4)
 
-    plt.tight_layout()
+    if note:
+        ax.set_title(note, fontsize=9, loc="right", color="gray")
+
+    fig.tight_layout()
     return fig
+
+
+def _render(df, x_col, y_col, fmt, dpi) -> bytes:
+    fig = plot(df, x_col, y_col)
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt, dpi=dpi)
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+
+# ----------------------------------
+# Cache & worker pool
+# ----------------------------------
+def chart_key(df, x_col, y_col, fmt="png", dpi=CHART_DPI) -> tuple:
+    from agent.explain_cache import result_fingerprint
+
+    budget = (CHART_MAX_BARS, CHART_MAX_POINTS, CHART_DOWNSAMPLE)
+    return (result_fingerprint(df), x_col, y_col, fmt, dpi, budget, CHART_VERSION)
+
+
+class ChartCache:
+    """LRU of rendered images, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            image = self._items.get(key)
+            if image is not None:
+                self._items.move_to_end(key)
+            return image
+
+    def put(self, key, image: bytes):
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = image
+            self.bytes += len(image)
+            while self.bytes > self.max_bytes and len(self._items) > 1:
+                _, old = self._items.popitem(last=False)
+                self.bytes -= len(old)
+
+    def __len__(self):
+        return len(self._items)
+
+
+CACHE = ChartCache(CHART_CACHE_MB * 1024 * 1024)
+
+_pool = None
+_in_flight = {}
+_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(CHART_WORKERS, thread_name_prefix="olist-chart")
+    return _pool
+
+
+def submit_render(df, x_col, y_col, fmt="png", dpi=CHART_DPI) -> Future:
+    """Future of the image bytes; cached images resolve immediately."""
+    key = chart_key(df, x_col, y_col, fmt, dpi)
+
+    image = CACHE.get(key)
+    if image is not None:
+        done = Future()
+        done.set_result(image)
+        return done
+
+    def run():
+        try:
+            image = _render(df, x_col, y_col, fmt, dpi)
+            CACHE.put(key, image)
+            return image
+        finally:
+            with _lock:
+                _in_flight.pop(key, None)
+
+    with _lock:
+        future = _in_flight.get(key)
+        if future is None:
+            future = _in_flight[key] = _get_pool().submit(run)
+    return future
+
+
+def render_chart(df, x_col, y_col, fmt="png", dpi=CHART_DPI, timeout=None) -> bytes:
+    return submit_render(df, x_col, y_col, fmt, dpi).result(timeout)
@@ -0,0 +1,142 @@
+# agent/chart_data.py
+
+"""
+Chart data reduction.
+
+Charts get a bounded number of marks whatever the result size:
+
+- categorical → top N bars (bottom N for results ranked ascending),
+  the rest folded into one "Other" bar
+- time series → downsampled to a point budget with LTTB
+  (largest-triangle-three-buckets, keeps the visual shape) or
+  min/max per bucket (keeps every spike)
+
+Runs on the result before drawing; tables and downloads keep every row.
+"""
+
+import numpy as np
+import pandas as pd
+
+from agent.config import CHART_DOWNSAMPLE, CHART_MAX_BARS, CHART_MAX_POINTS
+
+OTHER = "Other"
+
+# Measures that must not be summed when folding into "Other"
+NON_ADDITIVE = ("avg", "aov", "average", "mean", "rate", "pct", "share", "median", "ratio")
+
+
+def is_time_series(x_col: str) -> bool:
+    x = x_col.lower()
+    return "month" in x or "year" in x or "date" in x or "week" in x
+
+
+# ----------------------------------
+# Categorical
+# ----------------------------------
+def top_n_other(df, x_col, y_col, n=CHART_MAX_BARS, ascending=False):
+    """
+    Largest n-1 rows by y (smallest with ascending=True) plus an
+    "Other" row (sum, or mean for non-additive measures). Results with
+    at most n rows are unchanged.
+    """
+    if len(df) <= n:
+        return df
+
+    values = df[y_col].to_numpy()
+    order = np.argsort(values if ascending else -values, kind="stable")
+    keep, rest = order[: n - 1], order[n - 1:]
+
+    additive = not any(k in y_col.lower() for k in NON_ADDITIVE)
+    other = values[rest].sum() if additive else values[rest].mean()
+
+    top = df.iloc[keep][[x_col, y_col]]
+    label = f"{OTHER} ({len(rest)})"
+    return pd.concat(
+        [top, pd.DataFrame({x_col: [label], y_col: [other]})],
+        ignore_index=True,
+    )
+
+
+# ----------------------------------
+# Time series
+# ----------------------------------
+def lttb_indices(y, n_out: int) -> np.ndarray:
+    """
+    Row positions kept by largest-triangle-three-buckets over evenly
+    spaced x. One Python step per bucket; each step is vectorised.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    # Inner points split into n_out - 2 buckets; first and last always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax_indices(y, n_out: int) -> np.ndarray:
+    """Row positions of the min and max of each bucket (n_out // 2 buckets)."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    buckets = n_out // 2
+    if n_out >= n or buckets < 1:
+        return np.arange(n)
+
+    starts = np.linspace(0, n, buckets + 1).astype(int)[:-1]
+    bucket = np.repeat(np.arange(buckets), np.diff(np.append(starts, n)))
+
+    # Position of each bucket's min / max via a stable sort by (bucket, y)
+    order = np.lexsort((y, bucket))
+    ends = np.append(starts[1:], n) - 1
+    mins, maxs = order[starts], order[ends]
+    return np.unique(np.concatenate([mins, maxs]))
+
+
+def downsample(df, y_col, n=CHART_MAX_POINTS, method=CHART_DOWNSAMPLE):
+    if len(df) <= n:
+        return df
+    pick = minmax_indices if method == "minmax" else lttb_indices
+    return df.iloc[pick(df[y_col].to_numpy(), n)]
+
+
+# ----------------------------------
+# Entry point
+# ----------------------------------
+def reduce_for_chart(df, x_col, y_col, max_bars=CHART_MAX_BARS, max_points=CHART_MAX_POINTS):
+    """
+    Returns (chart_df, note). note describes the reduction, or is
+    None when every row is drawn.
+    """
+    if not pd.api.types.is_numeric_dtype(df[y_col]):
+        return df, None
+
+    if is_time_series(x_col):
+        reduced = downsample(df, y_col, max_points)
+        if len(reduced) < len(df):
+            return reduced, f"{len(reduced):,} of {len(df):,} points"
+        return df, None
+
+    # A "bottom N" answer comes ranked ascending and keeps its smallest rows
+    y = df[y_col]
+    ascending = y.is_monotonic_increasing and not y.is_monotonic_decreasing
+    reduced = top_n_other(df, x_col, y_col, max_bars, ascending=ascending)
+    if len(reduced) < len(df):
+        return reduced, f"{'Bottom' if ascending else 'Top'} {max_bars - 1} of {len(df):,}"
+    return df, None
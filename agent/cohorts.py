@@ -0,0 +1,302 @@
+# agent/cohorts.py
+
+"""
+Customer cohorts and retention.
+
+Olist issues a new customer_id per order; the person behind it is
+customer_unique_id. build_cohort_tables() (a db/setup_db.py step)
+assigns every unique customer to the month of their first purchase and
+precomputes:
+
+- cohort_customers   customer_unique_id → first_month, orders, revenue
+- cohort_activity    one row per cohort × observable month (zeros
+                     included): active customers, orders, revenue
+- cohort_months      orders / revenue per calendar month (change check)
+- cohort_matrix      one row per cohort with the activity as dense
+                     arrays (active / orders / revenue by month offset)
+
+Rebuilds are incremental: when earlier months are unchanged, only the
+months from the last built one onwards are recomputed (new months,
+plus the previously partial last month). Any change in older months
+or in a customer's first month falls back to a full rebuild.
+
+At question time CohortEngine loads cohort_matrix once per snapshot
+into NumPy matrices (cohorts × month offsets, NaN where a cohort is not
+observable yet) and answers the cohort intents without SQL. The SQL
+templates of the same intents (over cohort_activity) remain the
+reference and the fallback for filters the engine does not handle.
+"""
+
+import threading
+from typing import Optional
+
+# Revenue of an order = its payments; these statuses never shipped
+EXCLUDED_STATUSES = ("canceled", "unavailable")
+
+RETENTION_MONTHS = 12
+LTV_HORIZONS = (3, 6, 12)
+
+COHORT_INTENTS = {
+    "cohort_retention",
+    "retention_curve",
+    "repeat_purchase_rate",
+    "cohort_ltv",
+}
+
+
+def _month_index(column: str) -> str:
+    """'YYYY-MM' → months since year 0."""
+    return f"(CAST(left({column}, 4) AS INTEGER) * 12 + CAST(right({column}, 2) AS INTEGER) - 1)"
+
+
+# ----------------------------------
+# Build (called from db/setup_db.py)
+# ----------------------------------
+def _exists(con, table: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ? AND NOT temporary", [table]
+    ).fetchone()[0] > 0
+
+
+def _watermark(con) -> Optional[str]:
+    """
+    First month to recompute when earlier ones are unchanged, else None
+    (full rebuild). Expects the _cohort_* temp tables.
+    """
+    if not all(_exists(con, t) for t in ("cohort_months", "cohort_customers", "cohort_activity")):
+        return None
+    last = con.execute("SELECT MAX(activity_month) FROM cohort_months").fetchone()[0]
+    if last is None:
+        return None
+
+    history_changed = con.execute("""
+        SELECT COUNT(*)
+        FROM (SELECT * FROM cohort_months WHERE activity_month < ?) old
+        FULL JOIN (SELECT * FROM _cohort_months WHERE activity_month < ?) new USING (activity_month)
+        WHERE old.orders IS DISTINCT FROM new.orders
+           OR abs(COALESCE(old.revenue, 0) - COALESCE(new.revenue, 0)) > 0.005
+    """, [last, last]).fetchone()[0]
+
+    # Existing customers keep their cohort; new ones only join new cohorts
+    cohorts_changed = con.execute("""
+        SELECT COUNT(*)
+        FROM _cohort_customers new
+        LEFT JOIN cohort_customers old USING (customer_unique_id)
+        WHERE (old.first_month IS NULL AND new.first_month < ?)
+           OR old.first_month <> new.first_month
+    """, [last]).fetchone()[0]
+
+    return None if history_changed or cohorts_changed else last
+
+
+def build_cohort_tables(con, full: bool = False) -> Optional[str]:
+    """
+    (Re)builds the cohort tables; returns the first recomputed month,
+    or None after a full rebuild.
+    """
+    excluded = ", ".join(f"'{s}'" for s in EXCLUDED_STATUSES)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE _cohort_orders AS
+        SELECT
+            c.customer_unique_id,
+            o.order_id,
+            strftime(o.order_purchase_timestamp, '%Y-%m') AS activity_month,
+            COALESCE(p.revenue, 0) AS revenue
+        FROM orders o
+        JOIN customers c ON o.customer_id = c.customer_id
+        LEFT JOIN (
+            SELECT order_id, SUM(payment_value) AS revenue FROM payments GROUP BY order_id
+        ) p ON o.order_id = p.order_id
+        WHERE o.order_status NOT IN ({excluded})
+    """)
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE _cohort_customers AS
+        SELECT
+            customer_unique_id,
+            MIN(activity_month) AS first_month,
+            COUNT(DISTINCT order_id) AS orders,
+            SUM(revenue) AS revenue
+        FROM _cohort_orders
+        GROUP BY customer_unique_id
+    """)
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE _cohort_months AS
+        SELECT activity_month, COUNT(DISTINCT order_id) AS orders, SUM(revenue) AS revenue
+        FROM _cohort_orders
+        GROUP BY activity_month
+    """)
+
+    since = None if full else _watermark(con)
+    month_filter = f"activity_month >= '{since}'" if since else "TRUE"
+
+    con.execute("CREATE OR REPLACE TABLE cohort_customers AS SELECT * FROM _cohort_customers ORDER BY first_month")
+    con.execute("CREATE OR REPLACE TABLE cohort_months AS SELECT * FROM _cohort_months ORDER BY activity_month")
+
+    rows = f"""
+        WITH calendar AS (
+            -- Every month up to the last one, including months without orders
+            SELECT strftime(month, '%Y-%m') AS activity_month
+            FROM (SELECT MIN(activity_month) AS lo, MAX(activity_month) AS hi FROM cohort_months) b,
+                 range(CAST(b.lo || '-01' AS DATE), CAST(b.hi || '-01' AS DATE) + INTERVAL 1 MONTH, INTERVAL 1 MONTH) t(month)
+        ),
+        sizes AS (
+            SELECT first_month AS cohort_month, COUNT(*) AS cohort_customers
+            FROM cohort_customers
+            GROUP BY first_month
+        ),
+        activity AS (
+            SELECT
+                cc.first_month AS cohort_month,
+                o.activity_month,
+                COUNT(DISTINCT o.customer_unique_id) AS active_customers,
+                COUNT(DISTINCT o.order_id) AS orders,
+                SUM(o.revenue) AS revenue
+            FROM _cohort_orders o
+            JOIN cohort_customers cc ON o.customer_unique_id = cc.customer_unique_id
+            WHERE {month_filter}
+            GROUP BY ALL
+        )
+        SELECT
+            s.cohort_month,
+            m.activity_month,
+            {_month_index('m.activity_month')} - {_month_index('s.cohort_month')} AS month_offset,
+            s.cohort_customers,
+            COALESCE(a.active_customers, 0) AS active_customers,
+            COALESCE(a.orders, 0) AS orders,
+            COALESCE(a.revenue, 0) AS revenue
+        FROM sizes s
+        JOIN calendar m ON m.activity_month >= s.cohort_month
+        LEFT JOIN activity a ON a.cohort_month = s.cohort_month AND a.activity_month = m.activity_month
+        WHERE {month_filter.replace('activity_month', 'm.activity_month')}
+    """
+    if since:
+        con.execute(f"DELETE FROM cohort_activity WHERE activity_month >= '{since}'")
+        con.execute(f"INSERT INTO cohort_activity {rows}")
+    else:
+        con.execute(f"CREATE OR REPLACE TABLE cohort_activity AS {rows} ORDER BY cohort_month, month_offset")
+
+    con.execute("""
+        CREATE OR REPLACE TABLE cohort_matrix AS
+        SELECT
+            a.cohort_month,
+            a.cohort_customers AS customers,
+            r.repeat_customers,
+            list(CAST(a.active_customers AS DOUBLE) ORDER BY a.month_offset) AS active,
+            list(CAST(a.orders AS DOUBLE) ORDER BY a.month_offset) AS orders,
+            list(CAST(a.revenue AS DOUBLE) ORDER BY a.month_offset) AS revenue
+        FROM cohort_activity a
+        JOIN (
+            SELECT first_month, COUNT(*) FILTER (WHERE orders >= 2) AS repeat_customers
+            FROM cohort_customers
+            GROUP BY first_month
+        ) r ON r.first_month = a.cohort_month
+        GROUP BY a.cohort_month, a.cohort_customers, r.repeat_customers
+        ORDER BY a.cohort_month
+    """)
+    return since
+
+
+# ----------------------------------
+# In-process engine
+# ----------------------------------
+class CohortEngine:
+    def __init__(self, con):
+        import numpy as np
+
+        rows = con.execute("""
+            SELECT cohort_month, customers, repeat_customers, active, orders, revenue
+            FROM cohort_matrix
+            ORDER BY cohort_month
+        """).fetchall()
+
+        self.cohorts = [r[0] for r in rows]
+        self.size = np.array([r[1] for r in rows], dtype=np.float64)
+        self.repeaters = np.array([r[2] for r in rows], dtype=np.int64)
+
+        horizon = max((len(r[3]) for r in rows), default=0)
+
+        def dense(col):
+            matrix = np.full((len(rows), horizon), np.nan)
+            for i, r in enumerate(rows):
+                matrix[i, : len(r[col])] = r[col]
+            return matrix
+
+        self.active, self.orders, self.revenue = dense(3), dense(4), dense(5)
+        # Month offsets each cohort can be observed for (1 = first month only)
+        self.observed = (~np.isnan(self.active)).sum(axis=1)
+
+    def supports(self, intent: str, filters: dict) -> bool:
+        return intent in COHORT_INTENTS and set(filters or {}) <= {"limit"}
+
+    def query(self, intent: str, filters: dict = None):
+        """Answers a cohort intent, or returns None (caller falls back to SQL)."""
+        import numpy as np
+        import pandas as pd
+
+        filters = filters or {}
+        if not self.supports(intent, filters):
+            return None
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if intent == "retention_curve":
+                offsets = np.arange(1, self.active.shape[1])
+                seen = ~np.isnan(self.active[:, 1:])
+                observed = (self.size[:, None] * seen).sum(axis=0)
+                df = pd.DataFrame({
+                    "month_offset": offsets,
+                    "retention_rate": np.round(np.nansum(self.active[:, 1:], axis=0) / observed, 4),
+                    "customers_observed": observed.astype(np.int64),
+                })
+
+            elif intent == "cohort_retention":
+                df = pd.DataFrame({"cohort_month": self.cohorts, "customers": self.size.astype(np.int64)})
+                rates = self.active / self.size[:, None]
+                for k in range(1, RETENTION_MONTHS + 1):
+                    df[f"m{k}"] = np.round(rates[:, k], 4) if k < rates.shape[1] else np.nan
+
+            elif intent == "repeat_purchase_rate":
+                df = pd.DataFrame({
+                    "cohort_month": self.cohorts,
+                    "customers": self.size.astype(np.int64),
+                    "repeat_customers": self.repeaters,
+                    "repeat_rate": np.round(self.repeaters / self.size, 4),
+                })
+
+            else:  # cohort_ltv
+                df = pd.DataFrame({"cohort_month": self.cohorts, "customers": self.size.astype(np.int64)})
+                cumulative = np.nancumsum(self.revenue, axis=1)
+                for n in LTV_HORIZONS:
+                    ltv = cumulative[:, n - 1] / self.size if n <= cumulative.shape[1] else np.full(len(self.size), np.nan)
+                    df[f"ltv_{n}m"] = np.where(self.observed >= n, np.round(ltv, 2), np.nan)
+                df["ltv_to_date"] = np.round(np.nansum(self.revenue, axis=1) / self.size, 2)
+
+        if "limit" in filters:
+            df = df.head(int(filters["limit"]))
+        return df
+
+
+# ----------------------------------
+# Process-wide engine (loaded once per DB)
+# ----------------------------------
+_engines = {}
+_lock = threading.Lock()
+
+
+def get_cohorts(db_path: str) -> CohortEngine:
+    engine = _engines.get(db_path)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        if db_path not in _engines:
+            from agent.db import connect
+
+            con = connect(db_path)
+            try:
+                engine = CohortEngine(con)
+            finally:
+                con.close()
+            # A new snapshot replaces the matrices of the previous one
+            _engines.clear()
+            _engines[db_path] = engine
+        return _engines[db_path]
@@ -0,0 +1,321 @@
+# agent/columnar.py
+
+"""
+In-process columnar engine for the hot aggregate intents.
+
+The fact columns are loaded ONCE from DuckDB into compact NumPy arrays
+(dictionary-encoded categories / states, float64 values, int32
+year_month) and the hot intents are answered with vectorized
+bincount group-bys — no SQL, no connection per question.
+
+Rows are kept sorted by purchase date, so a time window is a
+contiguous slice found with searchsorted (the in-memory equivalent
+of zone-map pruning on f_order_facts).
+
+Only intents listed in HOT_INTENTS are served here; everything else
+(and any filter the engine does not understand) falls back to SQL.
+"""
+
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------
+# Intent specs
+# intent → (group, measure, order, default limit)
+#   order: "desc" / "asc" on the measure, "key" on the group key
+# ----------------------------------
+HOT_INTENTS = {
+    "highest_revenue_category": ("category", "revenue", "desc", 1),
+    "lowest_revenue_category": ("category", "revenue", "asc", 1),
+    "revenue_by_category": ("category", "revenue", "desc", None),
+    "category_revenue_by_year": ("year_category", "revenue", "key", None),
+    "yearly_revenue": ("year", "revenue", "key", None),
+    "monthly_revenue_trend": ("year_month", "revenue", "key", None),
+    "most_selling_category": ("category", "units_sold", "desc", 1),
+    "least_selling_category": ("category", "units_sold", "asc", 1),
+    "units_by_category": ("category", "units_sold", "desc", None),
+    "customer_lifetime_value": ("customer_state", "total_ltv", "desc", None),
+    "average_order_value_by_category": ("category", "average_order_value", "desc", None),
+    "average_order_value": ("total", "average_order_value", None, None),
+}
+
+# Filters each group can push down (anything else → SQL fallback)
+SUPPORTED_FILTERS = {
+    "category": {"category", "window", "limit"},
+    "year_category": {"year", "category", "window", "limit"},
+    "year": {"year", "window", "limit"},
+    "year_month": {"month", "window", "limit"},
+    "customer_state": {"window", "limit"},
+    "total": {"window", "limit"},
+}
+
+
+def _days(dates):
+    """Dates → int32 days since epoch."""
+    return (
+        pd.to_datetime(dates).to_numpy().astype("datetime64[D]").astype(np.int32)
+    )
+
+
+def _window_slice(days, filters):
+    """[start, end) window → row slice over date-sorted rows."""
+    if "window" not in filters:
+        return slice(None)
+    start, end = (
+        np.datetime64(d, "D").astype(np.int32) for d in filters["window"]
+    )
+    return slice(
+        np.searchsorted(days, start, side="left"),
+        np.searchsorted(days, end, side="left"),
+    )
+
+
+def _encode(values, sort=True):
+    """Dictionary-encode a column → (int32 codes, object dictionary)."""
+    codes, uniques = pd.factorize(values, sort=sort, use_na_sentinel=False)
+    uniques = np.asarray(uniques, dtype=object)
+    uniques[pd.isna(uniques)] = None
+    return codes.astype(np.int32), uniques
+
+
+class ColumnarEngine:
+    def __init__(self, con):
+        facts = con.execute("""
+            SELECT
+                category,
+                customer_state,
+                order_id,
+                payment_value,
+                CAST(
+                    EXTRACT(YEAR FROM order_purchase_timestamp) * 100
+                    + EXTRACT(MONTH FROM order_purchase_timestamp)
+                    AS INTEGER
+                ) AS year_month,
+                order_date
+            FROM f_order_facts
+            ORDER BY order_purchase_timestamp
+        """).fetchdf()
+
+        self.category, self.categories = _encode(facts["category"])
+        self.state, self.states = _encode(facts["customer_state"])
+        self.order, _orders = _encode(facts["order_id"], sort=False)
+        self.n_orders = len(_orders)
+        self.value = facts["payment_value"].to_numpy(dtype=np.float64)
+        self.year_month = facts["year_month"].to_numpy(dtype=np.int32)
+        self.day = _days(facts["order_date"])
+
+        self.months = np.unique(self.year_month)
+        self.month_code = np.searchsorted(self.months, self.year_month).astype(np.int32)
+        self.years = np.unique(self.months // 100)
+        self.year_code = np.searchsorted(self.years, self.year_month // 100).astype(np.int32)
+
+        # Order × category revenue (source of v_category_aov)
+        items = con.execute("""
+            SELECT
+                r.category,
+                r.revenue,
+                CAST(o.order_purchase_timestamp AS DATE) AS order_date
+            FROM v_order_category_revenue r
+            JOIN orders o ON r.order_id = o.order_id
+            ORDER BY o.order_purchase_timestamp
+        """).fetchdf()
+        self.item_category, self.item_categories = _encode(items["category"])
+        self.item_value = items["revenue"].to_numpy(dtype=np.float64)
+        self.item_day = _days(items["order_date"])
+
+        self._category_index = {c: i for i, c in enumerate(self.categories)}
+        self._item_category_index = {c: i for i, c in enumerate(self.item_categories)}
+
+    @property
+    def rows(self) -> int:
+        return len(self.value)
+
+    # ----------------------------------
+    # Public API
+    # ----------------------------------
+    def supports(self, intent: str, filters: dict) -> bool:
+        spec = HOT_INTENTS.get(intent)
+        if not spec:
+            return False
+        return set(filters or {}) <= SUPPORTED_FILTERS[spec[0]]
+
+    def query(self, intent: str, filters: dict = None) -> Optional[pd.DataFrame]:
+        """
+        Answers a hot intent, or returns None if the engine
+        cannot (caller falls back to SQL).
+        """
+        filters = filters or {}
+        if not self.supports(intent, filters):
+            return None
+
+        group, measure, order, default_limit = HOT_INTENTS[intent]
+
+        if group == "total":
+            df = self._total(filters)
+        elif measure == "average_order_value":
+            df = self._category_aov(filters)
+        else:
+            df = self._group_by(group, measure, order, filters)
+
+        limit = filters.get("limit", default_limit)
+        if limit is not None:
+            df = df.head(int(limit))
+
+        return df.reset_index(drop=True)
+
+    # ----------------------------------
+    # Group-bys
+    # ----------------------------------
+    def _mask(self, filters: dict, rows=slice(None)):
+        mask = None
+
+        if "category" in filters:
+            code = self._category_index.get(filters["category"], -1)
+            mask = self.category[rows] == code
+
+        if "year" in filters:
+            m = (self.year_month[rows] // 100) == int(filters["year"])
+            mask = m if mask is None else mask & m
+
+        if "month" in filters:
+            keys = np.array([f"{ym // 100}-{ym % 100:02d}" for ym in self.months])
+            wanted = np.flatnonzero(np.char.startswith(keys, str(filters["month"])))
+            m = np.isin(self.month_code[rows], wanted)
+            mask = m if mask is None else mask & m
+
+        return mask
+
+    def _group_by(self, group, measure, order, filters):
+        if group == "category":
+            codes, size = self.category, len(self.categories)
+        elif group == "customer_state":
+            codes, size = self.state, len(self.states)
+        elif group == "year":
+            codes, size = self.year_code, len(self.years)
+        elif group == "year_month":
+            codes, size = self.month_code, len(self.months)
+        else:  # year_category
+            codes = self.year_code * len(self.categories) + self.category
+            size = len(self.years) * len(self.categories)
+
+        rows = _window_slice(self.day, filters)
+        codes, values = codes[rows], self.value[rows]
+
+        mask = self._mask(filters, rows)
+        if mask is not None:
+            codes, values = codes[mask], values[mask]
+
+        if group in ("year", "year_month") and len(codes):
+            # Date-sorted rows → each period is a contiguous run: reduceat
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+            present = codes[starts]
+            metric = np.add.reduceat(values, starts)
+        else:
+            counts = np.bincount(codes, minlength=size)
+            present = np.flatnonzero(counts)
+
+            if measure == "units_sold":
+                metric = counts[present]
+            else:
+                metric = np.bincount(codes, weights=values, minlength=size)[present]
+
+        if order == "desc":
+            idx = np.argsort(-metric, kind="stable")
+        elif order == "asc":
+            idx = np.argsort(metric, kind="stable")
+        elif group == "year_category":
+            idx = np.lexsort((-metric, present // len(self.categories)))
+        else:
+            idx = np.arange(len(present))
+
+        present, metric = present[idx], metric[idx]
+
+        if group == "category":
+            return pd.DataFrame({"category": self.categories[present], measure: metric})
+        if group == "customer_state":
+            return pd.DataFrame({"customer_state": self.states[present], measure: metric})
+        if group == "year":
+            return pd.DataFrame({"year": self.years[present].astype(np.int64), measure: metric})
+        if group == "year_month":
+            ym = self.months[present]
+            labels = [f"{v // 100}-{v % 100:02d}" for v in ym]
+            return pd.DataFrame({"year_month": labels, measure: metric})
+
+        n_cat = len(self.categories)
+        return pd.DataFrame({
+            "year": self.years[present // n_cat].astype(np.int64),
+            "category": self.categories[present % n_cat],
+            measure: metric,
+        })
+
+    def _category_aov(self, filters):
+        rows = _window_slice(self.item_day, filters)
+        codes, values = self.item_category[rows], self.item_value[rows]
+        size = len(self.item_categories)
+
+        if "category" in filters:
+            mask = codes == self._item_category_index.get(filters["category"], -1)
+            codes, values = codes[mask], values[mask]
+
+        # one row per (order, category) → row count == distinct orders
+        orders = np.bincount(codes, minlength=size)
+        revenue = np.bincount(codes, weights=values, minlength=size)
+        present = np.flatnonzero(orders)
+        aov = np.round(revenue[present] / orders[present], 2)
+
+        idx = np.argsort(-aov, kind="stable")
+        return pd.DataFrame({
+            "category": self.item_categories[present[idx]],
+            "average_order_value": aov[idx],
+        })
+
+    def _total(self, filters):
+        rows = _window_slice(self.day, filters)
+        if "window" in filters:
+            n_orders = len(np.unique(self.order[rows]))
+        else:
+            n_orders = self.n_orders
+
+        total_revenue = float(self.value[rows].sum())
+        aov = round(total_revenue / n_orders, 2) if n_orders else None
+        return pd.DataFrame({
+            "total_orders": [np.int64(n_orders)],
+            "total_revenue": [total_revenue],
+            "average_order_value": [aov],
+        })
+
+
+# ----------------------------------
+# Process-wide engine (loaded once per DB)
+# ----------------------------------
+_engines = {}
+_lock = threading.Lock()
+
+
+def get_engine(db_path: str) -> ColumnarEngine:
+    engine = _engines.get(db_path)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        if db_path not in _engines:
+            from agent.db import connect
+
+            con = connect(db_path)
+            try:
+                engine = ColumnarEngine(con)
+            finally:
+                con.close()
+            # A new snapshot replaces the arrays of the previous one
+            _engines.clear()
+            _engines[db_path] = engine
+        return _engines[db_path]
+
+
+def reset_engines():
+    """Drops loaded arrays (e.g. after the DB was rebuilt)."""
+    with _lock:
+        _engines.clear()
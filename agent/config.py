@@ -0,0 +1,174 @@
+# agent/config.py
+
+"""
+Runtime configuration for the agent.
+All settings come from environment variables so that each deployment
+can tune behaviour without code changes.
+"""
+
+import os
+
+
+def _flag(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _optional(name: str, cast=str):
+    """Setting that falls back to the active profile when unset."""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return None
+    return cast(value)
+
+
+def _optional_flag(name: str):
+    return None if _optional(name) is None else _flag(name)
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ----------------------------------
+# Database & DuckDB runtime profile (see agent/db.py)
+# ----------------------------------
+DB_PATH = os.environ.get("OLIST_DB_PATH", os.path.join(ROOT_DIR, "db", "olist.db"))
+DB_PROFILE = os.environ.get("OLIST_DB_PROFILE", "default")
+DB_THREADS = _optional("OLIST_DB_THREADS", int)
+DB_MEMORY_LIMIT = _optional("OLIST_DB_MEMORY_LIMIT")
+DB_TEMP_DIR = _optional("OLIST_DB_TEMP_DIR")
+DB_MAX_TEMP_SIZE = _optional("OLIST_DB_MAX_TEMP_SIZE")
+DB_OBJECT_CACHE = _optional_flag("OLIST_DB_OBJECT_CACHE")
+DB_READ_ONLY = _optional_flag("OLIST_DB_READ_ONLY")
+
+# Published snapshots kept besides the current one (rollback, slow readers)
+SNAPSHOT_KEEP = int(os.environ.get("OLIST_SNAPSHOT_KEEP", "1"))
+
+# Parallel build steps in db/setup_db.py (default: one per core)
+BUILD_WORKERS = _optional("OLIST_BUILD_WORKERS", int)
+
+
+# ----------------------------------
+# Columnar engine (hot aggregate intents)
+# ----------------------------------
+COLUMNAR_ENGINE = _flag("OLIST_COLUMNAR_ENGINE")
+
+# ----------------------------------
+# Top-K ranked tables (largest N served as a prefix read)
+# ----------------------------------
+TOPK_MAX_N = int(os.environ.get("OLIST_TOPK_MAX_N", "1000"))
+
+# ----------------------------------
+# Approximate mode (stratified sample of f_order_facts)
+# ----------------------------------
+SAMPLE_FRACTION = float(os.environ.get("OLIST_SAMPLE_FRACTION", "0.05"))
+SAMPLE_MIN_ROWS = int(os.environ.get("OLIST_SAMPLE_MIN_ROWS", "30"))
+
+# ----------------------------------
+# Geo analytics (grid cell size of the spatial index, in degrees)
+# ----------------------------------
+GEO_CELL_DEG = float(os.environ.get("OLIST_GEO_CELL_DEG", "0.5"))
+
+# ----------------------------------
+# Logistics mart (lead-time histogram bucket width, in days)
+# ----------------------------------
+LOGISTICS_BUCKET_DAYS = float(os.environ.get("OLIST_LOGISTICS_BUCKET_DAYS", "0.25"))
+
+# ----------------------------------
+# Aggregate sketches (HyperLogLog precision: 2^p registers; quantile
+# sketch relative accuracy)
+# ----------------------------------
+SKETCH_HLL_PRECISION = int(os.environ.get("OLIST_SKETCH_HLL_PRECISION", "12"))
+SKETCH_RELATIVE_ACCURACY = float(os.environ.get("OLIST_SKETCH_RELATIVE_ACCURACY", "0.01"))
+
+# ----------------------------------
+# Tracing (per-stage latency of answer())
+# OLIST_TRACE_EXPORTERS: comma list of log, jsonl, prometheus
+# ----------------------------------
+TRACE_EXPORTERS = [
+    name.strip()
+    for name in os.environ.get("OLIST_TRACE_EXPORTERS", "").split(",")
+    if name.strip()
+]
+TRACE_JSONL_PATH = os.environ.get("OLIST_TRACE_JSONL", os.path.join(ROOT_DIR, "traces.jsonl"))
+TRACE_PROMETHEUS_PATH = os.environ.get("OLIST_TRACE_PROMETHEUS")
+TRACE_WINDOW = int(os.environ.get("OLIST_TRACE_WINDOW", "2048"))
+
+# ----------------------------------
+# Slow-query profiling (DuckDB JSON plans)
+# ----------------------------------
+SLOW_QUERY_MS = float(os.environ.get("OLIST_SLOW_QUERY_MS", "500"))
+PROFILE_STORE = os.environ.get("OLIST_PROFILE_STORE", os.path.join(ROOT_DIR, "db", "profiles.jsonl"))
+PROFILE_LABEL = os.environ.get("OLIST_PROFILE_LABEL", "current")
+
+# ----------------------------------
+# Knowledge artifact (precompiled, memory-mapped)
+# ----------------------------------
+KNOWLEDGE_ARTIFACT = os.environ.get(
+    "OLIST_KNOWLEDGE_ARTIFACT",
+    os.path.join(ROOT_DIR, "knowledge", "knowledge.bin"),
+)
+
+# ----------------------------------
+# Explanation prompts (token budget, estimated locally)
+# ----------------------------------
+EXPLAIN_PROMPT_TOKENS = int(os.environ.get("OLIST_EXPLAIN_PROMPT_TOKENS", "700"))
+EXPLAIN_TABLE_ROWS = int(os.environ.get("OLIST_EXPLAIN_TABLE_ROWS", "10"))
+
+# ----------------------------------
+# Explanation cache (SQLite, shared across sessions and processes)
+# ----------------------------------
+EXPLAIN_CACHE_PATH = os.environ.get("OLIST_EXPLAIN_CACHE", os.path.join(ROOT_DIR, "db", "explanations.sqlite"))
+EXPLAIN_CACHE_MAX_ENTRIES = int(os.environ.get("OLIST_EXPLAIN_CACHE_MAX_ENTRIES", "5000"))
+EXPLAIN_PREGENERATE = _flag("OLIST_EXPLAIN_PREGENERATE", True)
+EXPLAIN_WARM_INTENTS = [
+    name.strip()
+    for name in os.environ.get(
+        "OLIST_EXPLAIN_WARM_INTENTS",
+        "revenue_by_category,highest_revenue_category,monthly_revenue_trend,average_order_value_by_category",
+    ).split(",")
+    if name.strip()
+]
+
+# ----------------------------------
+# Speculative explanations (background queue)
+# ----------------------------------
+EXPLAIN_SPECULATIVE = _flag("OLIST_EXPLAIN_SPECULATIVE", True)
+EXPLAIN_WORKERS = int(os.environ.get("OLIST_EXPLAIN_WORKERS", "1"))
+EXPLAIN_QUEUE_MAX = int(os.environ.get("OLIST_EXPLAIN_QUEUE_MAX", "64"))
+
+# ----------------------------------
+# LLM endpoint (any OpenAI-compatible server: LM Studio, tools/llm_stub_server.py)
+# ----------------------------------
+LLM_BASE_URL = os.environ.get("OLIST_LLM_BASE_URL", "http://localhost:8000/v1")
+LLM_MODEL = os.environ.get("OLIST_LLM_MODEL", "qwen2.5-7b-instruct")
+LLM_API_KEY = os.environ.get("OLIST_LLM_API_KEY", "lm-studio")
+LLM_TIMEOUT_S = float(os.environ["OLIST_LLM_TIMEOUT_S"]) if os.environ.get("OLIST_LLM_TIMEOUT_S") else None
+LLM_MAX_RETRIES = int(os.environ.get("OLIST_LLM_MAX_RETRIES", "2"))
+
+# ----------------------------------
+# Chart rendering (image cache + worker pool)
+# ----------------------------------
+CHART_WORKERS = int(os.environ.get("OLIST_CHART_WORKERS", "2"))
+CHART_CACHE_MB = int(os.environ.get("OLIST_CHART_CACHE_MB", "64"))
+CHART_DPI = int(os.environ.get("OLIST_CHART_DPI", "100"))
+CHART_MAX_HEIGHT_IN = float(os.environ.get("OLIST_CHART_MAX_HEIGHT_IN", "12"))
+
+# Chart data reduction: bars drawn (incl. "Other"), points per line, lttb | minmax
+CHART_MAX_BARS = int(os.environ.get("OLIST_CHART_MAX_BARS", "20"))
+CHART_MAX_POINTS = int(os.environ.get("OLIST_CHART_MAX_POINTS", "500"))
+CHART_DOWNSAMPLE = os.environ.get("OLIST_CHART_DOWNSAMPLE", "lttb")
+
+# ----------------------------------
+# SQL guardrails
+# ----------------------------------
+SQL_MAX_RESULT_ROWS = int(os.environ.get("OLIST_SQL_MAX_RESULT_ROWS", "5000000"))
+
+# ----------------------------------
+# Query governor (admission control, timeout, row cap)
+# ----------------------------------
+QUERY_MAX_CONCURRENT = int(os.environ.get("OLIST_QUERY_MAX_CONCURRENT", "4"))
+QUERY_ADMISSION_WAIT_S = float(os.environ.get("OLIST_QUERY_ADMISSION_WAIT_S", "5"))
+QUERY_TIMEOUT_S = float(os.environ.get("OLIST_QUERY_TIMEOUT_S", "15"))
+QUERY_MAX_ROWS = int(os.environ.get("OLIST_QUERY_MAX_ROWS", "100000"))
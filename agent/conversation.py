@@ -3,7 +3,12 @@ from agent.knowledge import lookup_definition
 
 ANALYTICAL_TRIGGERS = [
     "which", "show", "top", "total", "trend",
-    "compare", "highest", "lowest", "average"
+    "compare", "highest", "lowest", "average",
+    "roughly", "approximately", "estimate",
+    "within", "region", "distance",
+    "delivery", "percentile", "median",
+    "retention", "cohort", "repeat",
+    "unique", "distinct", "by state", "seller state"
 ]
 
 def normalize(text: str) -> str:
@@ -54,6 +59,7 @@ def handle_conversation(question: str):
             "- Highest revenue category\n"
             "- Average order value by category\n"
             "- Top 5 categories\n"
+            "- Revenue within 100 km of Sao Paulo\n"
         )
 
     return None
@@ -0,0 +1,100 @@
+# agent/db.py
+
+"""
+DuckDB connections.
+
+Every connection to the analytics database goes through connect(), so
+one runtime profile applies to the whole process. DuckDB refuses a
+second connection to the same file with a different configuration
+(e.g. read-only next to read-write), so mixing settings per call site
+is not an option.
+
+Profiles (OLIST_DB_PROFILE):
+- default      DuckDB defaults
+- interactive  many small concurrent queries on a shared host:
+               few threads each, bounded memory, object cache
+- batch        big reports on a dedicated box: every core, most of
+               the memory, generous spill to disk
+
+Individual settings are overridden with OLIST_DB_THREADS,
+OLIST_DB_MEMORY_LIMIT, OLIST_DB_TEMP_DIR, OLIST_DB_MAX_TEMP_SIZE,
+OLIST_DB_OBJECT_CACHE and OLIST_DB_READ_ONLY. The agent only reads;
+db/setup_db.py connects with read_only=False.
+
+Paths are resolved through agent/snapshots.py: the logical DB_PATH
+opens its current published snapshot.
+"""
+
+from agent.config import (
+    DB_MAX_TEMP_SIZE,
+    DB_MEMORY_LIMIT,
+    DB_OBJECT_CACHE,
+    DB_PATH,
+    DB_PROFILE,
+    DB_READ_ONLY,
+    DB_TEMP_DIR,
+    DB_THREADS,
+)
+
+DB_PROFILES = {
+    "default": {},
+    "interactive": {
+        "threads": 2,
+        "memory_limit": "1GB",
+        "enable_object_cache": True,
+    },
+    "batch": {
+        "memory_limit": "80%",
+        "max_temp_directory_size": "50GB",
+        "enable_object_cache": True,
+    },
+}
+
+# Read-only unless the profile / environment says otherwise
+READ_ONLY_DEFAULT = True
+
+
+def runtime_settings(profile: str = None) -> dict:
+    """DuckDB config for a profile, with OLIST_DB_* overrides applied."""
+    profile = profile or DB_PROFILE
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown DB profile: {profile} (choose from {', '.join(DB_PROFILES)})")
+
+    settings = dict(DB_PROFILES[profile])
+    overrides = {
+        "threads": DB_THREADS,
+        "memory_limit": DB_MEMORY_LIMIT,
+        "temp_directory": DB_TEMP_DIR,
+        "max_temp_directory_size": DB_MAX_TEMP_SIZE,
+        "enable_object_cache": DB_OBJECT_CACHE,
+    }
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    return settings
+
+
+def _memory_limit(value: str) -> str:
+    """DuckDB wants absolute sizes; "80%" is resolved against physical RAM."""
+    if not str(value).endswith("%"):
+        return value
+    import os
+
+    total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    return f"{int(total * float(value[:-1]) / 100 / 2**20)}MB"
+
+
+def connect(path: str = None, read_only: bool = None, profile: str = None):
+    """Opens DB_PATH (or path), i.e. its current snapshot, with the active runtime profile."""
+    # duckdb is imported on first query, not when the agent is imported
+    import duckdb
+
+    from agent.snapshots import active_path
+
+    if read_only is None:
+        read_only = READ_ONLY_DEFAULT if DB_READ_ONLY is None else DB_READ_ONLY
+
+    config = runtime_settings(profile)
+    if "memory_limit" in config:
+        config["memory_limit"] = _memory_limit(config["memory_limit"])
+    config = {k: str(v).lower() if isinstance(v, bool) else v for k, v in config.items()}
+
+    return duckdb.connect(active_path(path or DB_PATH), read_only=read_only, config=config)
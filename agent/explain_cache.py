@@ -0,0 +1,207 @@
+# agent/explain_cache.py
+
+"""
+Explanation cache.
+
+Explanations are keyed by what they explain, not by how the question
+was phrased: (intent, filters, a hash of the result data, the prompt
+version and the model). Any phrasing that yields the same DataFrame
+reuses the same explanation.
+
+Entries live in SQLite (WAL mode) so every session and worker process
+shares them; the least recently used entries are evicted beyond
+OLIST_EXPLAIN_CACHE_MAX_ENTRIES. pregenerate() fills the cache for the
+hottest intents in the background.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from agent.config import (
+    EXPLAIN_CACHE_MAX_ENTRIES,
+    EXPLAIN_CACHE_PATH,
+    EXPLAIN_WARM_INTENTS,
+)
+
+logger = logging.getLogger("agent.explain_cache")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS explanations (
+    key            TEXT PRIMARY KEY,
+    intent         TEXT,
+    filters        TEXT,
+    text           TEXT NOT NULL,
+    prompt_tokens  INTEGER,
+    created_at     REAL,
+    last_used      REAL,
+    hits           INTEGER DEFAULT 0
+)
+"""
+
+
+# ----------------------------------
+# Keys
+# ----------------------------------
+def result_fingerprint(df) -> str:
+    """Stable hash of column names, dtypes and values (index ignored)."""
+    import pandas as pd
+
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def cache_key(intent: str, filters: dict, df) -> str:
+    from agent.llm_client import MODEL
+    from agent.llm_explain import PROMPT_VERSION
+
+    payload = json.dumps(
+        [intent, filters or {}, result_fingerprint(df), PROMPT_VERSION, MODEL],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ----------------------------------
+# Store
+# ----------------------------------
+class ExplanationCache:
+    def __init__(self, path: str = EXPLAIN_CACHE_PATH, max_entries: int = EXPLAIN_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One connection per call: safe from Streamlit's script threads
+        con = sqlite3.connect(self.path, timeout=10)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT text, prompt_tokens FROM explanations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            con.execute(
+                "UPDATE explanations SET hits = hits + 1, last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return {"text": row[0], "prompt_tokens": row[1]}
+
+    def put(self, key: str, intent: str, filters: dict, text: str, prompt_tokens: int = None):
+        now = time.time()
+        with self._connect() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO explanations VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, intent, json.dumps(filters or {}, default=str), text, prompt_tokens, now, now),
+            )
+            con.execute(
+                """
+                DELETE FROM explanations WHERE key IN (
+                    SELECT key FROM explanations
+                    ORDER BY last_used DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def hot_intents(self, n: int) -> list:
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT intent FROM explanations GROUP BY intent ORDER BY SUM(hits) DESC LIMIT ?",
+                (n,),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def __len__(self):
+        with self._connect() as con:
+            return con.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ExplanationCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExplanationCache()
+        return _cache
+
+
+# ----------------------------------
+# Cached explain
+# ----------------------------------
+def explain_cached(question: str, df, intent: str, filters: dict):
+    """
+    Returns (text, report, cache_hit). Failed generations (LLM
+    unavailable) are returned but never cached.
+    """
+    from agent.llm_client import LLM_UNAVAILABLE
+    from agent.llm_explain import explain_with_report
+
+    cache = get_cache()
+    key = cache_key(intent, filters, df)
+
+    hit = cache.get(key)
+    if hit is not None:
+        return hit["text"], {"prompt_tokens": hit["prompt_tokens"], "cached": True}, True
+
+    text, report = explain_with_report(question, df)
+    if text != LLM_UNAVAILABLE:
+        cache.put(key, intent, filters, text, report["prompt_tokens"])
+    return text, report, False
+
+
+def pregenerate(intents: list = None, n: int = 4) -> int:
+    """
+    Explains the default (unfiltered) result of the hottest intents:
+    most-hit in the cache, topped up from OLIST_EXPLAIN_WARM_INTENTS.
+    Returns how many were not cached yet.
+    """
+    from agent.agent_core import execute_intent
+    from agent.intent_map import INTENT_SYNONYMS
+
+    if intents is None:
+        intents = get_cache().hot_intents(n)
+        intents += [i for i in EXPLAIN_WARM_INTENTS if i not in intents]
+        intents = intents[:n]
+
+    misses = 0
+    for intent in intents:
+        try:
+            df, _ = execute_intent(intent, {})
+            if df.empty:
+                continue
+            question = INTENT_SYNONYMS.get(intent, [intent.replace("_", " ")])[0]
+            if not explain_cached(question, df, intent, {})[2]:
+                misses += 1
+        except Exception:
+            logger.exception("Pre-generating explanation for %s failed", intent)
+    return misses
+
+
+def start_pregeneration(intents: list = None, n: int = 4) -> threading.Thread:
+    thread = threading.Thread(
+        target=pregenerate, args=(intents, n), name="olist-explain-warmup", daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,207 @@
+# agent/explain_queue.py
+
+"""
+Speculative explanation queue.
+
+As soon as answer() returns data, the app submits an explanation job;
+by the time the user clicks "Explain", the text is usually ready.
+
+- priority: intents requested more often are generated first
+- dedupe:   one job per explanation cache key, shared by every
+            session waiting on it
+- stale:    when a session asks a new question it stops waiting on its
+            previous job; queued jobs nobody waits on are dropped
+
+Workers go through explain_cached(), so finished explanations land in
+the shared cache as well.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+from collections import Counter, OrderedDict
+
+from agent.config import EXPLAIN_QUEUE_MAX, EXPLAIN_WORKERS
+from agent.llm_client import LLM_UNAVAILABLE
+
+logger = logging.getLogger("agent.explain_queue")
+
+QUEUED, RUNNING, DONE, FAILED, DROPPED = "queued", "running", "done", "failed", "dropped"
+
+RESULTS_KEPT = 256
+
+
+class _Job:
+    def __init__(self, key, question, df, intent, filters):
+        self.key = key
+        self.question = question
+        self.df = df
+        self.intent = intent
+        self.filters = filters
+        self.waiters = set()
+        self.status = QUEUED
+        self.result = None
+        self.done = threading.Event()
+
+
+class ExplanationQueue:
+    def __init__(self, workers: int = EXPLAIN_WORKERS, max_queued: int = EXPLAIN_QUEUE_MAX):
+        self.max_queued = max_queued
+        self.popularity = Counter()
+        self._heap = []
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._session_job = {}
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._threads = [
+            threading.Thread(target=self._work, name=f"olist-explain-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    # ----------------------------------
+    # Submitting
+    # ----------------------------------
+    def submit(self, question: str, df, intent: str, filters: dict, session: str = None) -> str:
+        from agent.explain_cache import cache_key
+
+        key = cache_key(intent, filters, df)
+        with self._lock:
+            self.popularity[intent] += 1
+            self._move_session(session, key)
+
+            job = self._jobs.get(key)
+            if job is None and key not in self._finished:
+                job = self._jobs[key] = _Job(key, question, df, intent, filters)
+                heapq.heappush(self._heap, (-self.popularity[intent], next(self._seq), key))
+                self._trim()
+                self._ready.notify()
+            if job is not None and session is not None:
+                job.waiters.add(session)
+        return key
+
+    def _move_session(self, session, key):
+        """The session's previous job loses a waiter; drop it if nobody is left."""
+        if session is None:
+            return
+        previous = self._session_job.get(session)
+        self._session_job[session] = key
+        if previous is None or previous == key:
+            return
+        job = self._jobs.get(previous)
+        if job is not None:
+            job.waiters.discard(session)
+            if not job.waiters and job.status == QUEUED:
+                self._drop(job)
+
+    def _drop(self, job):
+        job.status = DROPPED
+        del self._jobs[job.key]
+        job.done.set()
+
+    def _trim(self):
+        """Bounded queue: drop the least popular queued jobs."""
+        queued = [j for j in self._jobs.values() if j.status == QUEUED]
+        excess = len(queued) - self.max_queued
+        if excess > 0:
+            for job in sorted(queued, key=lambda j: self.popularity[j.intent])[:excess]:
+                self._drop(job)
+
+    # ----------------------------------
+    # Workers
+    # ----------------------------------
+    def _next_job(self):
+        with self._lock:
+            while True:
+                while self._heap:
+                    _, _, key = heapq.heappop(self._heap)
+                    job = self._jobs.get(key)
+                    if job is not None and job.status == QUEUED:
+                        job.status = RUNNING
+                        return job
+                self._ready.wait()
+
+    def _work(self):
+        from agent.explain_cache import explain_cached
+
+        while True:
+            job = self._next_job()
+            try:
+                job.result = explain_cached(job.question, job.df, job.intent, job.filters)
+                status = DONE
+            except Exception:
+                logger.exception("Explanation job for %s failed", job.intent)
+                status = FAILED
+            self._finish(job, status)
+
+    def _finish(self, job, status):
+        with self._lock:
+            job.status = status
+            self._jobs.pop(job.key, None)
+            # "LLM unavailable" is not kept: the next fetch retries
+            if status == DONE and job.result[0] != LLM_UNAVAILABLE:
+                self._finished[job.key] = job.result
+                while len(self._finished) > RESULTS_KEPT:
+                    self._finished.popitem(last=False)
+            job.done.set()
+
+    # ----------------------------------
+    # Reading
+    # ----------------------------------
+    def status(self, key: str):
+        with self._lock:
+            if key in self._jobs:
+                return self._jobs[key].status
+            return DONE if key in self._finished else None
+
+    def fetch(self, question: str, df, intent: str, filters: dict, timeout: float = None):
+        """
+        The explanation for this result, now: finished → returned,
+        running → waited for, queued or unknown → generated inline
+        (a queued job is taken over, not run twice).
+        Returns (text, report, cached).
+        """
+        from agent.explain_cache import cache_key, explain_cached
+
+        key = cache_key(intent, filters, df)
+        with self._lock:
+            if key in self._finished:
+                return self._finished[key]
+            job = self._jobs.get(key)
+            take_over = job is not None and job.status == QUEUED
+            if take_over:
+                job.status = RUNNING
+
+        if job is not None and not take_over:
+            job.done.wait(timeout)
+            if job.result is not None:
+                return job.result
+
+        if not take_over:
+            return explain_cached(question, df, intent, filters)
+
+        # The job is RUNNING on our behalf: settle it whatever happens,
+        # so other fetches waiting on it wake up
+        status = FAILED
+        try:
+            job.result = explain_cached(question, df, intent, filters)
+            status = DONE
+        finally:
+            self._finish(job, status)
+        return job.result
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> ExplanationQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ExplanationQueue()
+        return _queue
@@ -13,6 +13,7 @@ def handle_follow_up(question: str):
     - top 5
     - give top 10
     - show top 3
+    - bottom 5 / lowest 3
     """
 
     q = normalize(question)
@@ -30,6 +31,18 @@ def handle_follow_up(question: str):
         limit = int(match.group(2))
         modifiers = get_modifiers() or {}
         modifiers["limit"] = limit
+        modifiers.pop("order", None)
+        return prev_intent, modifiers
+
+    # ----------------------------
+    # BOTTOM N detection
+    # ----------------------------
+    match = re.search(r"(bottom|lowest|worst)\s+(\d+)", q)
+    if match:
+        limit = int(match.group(2))
+        modifiers = get_modifiers() or {}
+        modifiers["limit"] = limit
+        modifiers["order"] = "asc"
         return prev_intent, modifiers
 
     return None
@@ -0,0 +1,314 @@
+# agent/geo.py
+
+"""
+Geolocation analytics from precomputed, grid-indexed aggregates.
+
+The raw geolocation table has ~1M points (many per zip prefix, some
+outside Brazil). build_geo_tables() (a db/setup_db.py step) reduces it
+once to:
+
+- geo_zip               one centroid per zip prefix (median of the
+                        in-country points) + its grid cell
+- geo_places            gazetteer: zip prefixes, cities and states →
+                        centroid, for "within 100 km of <place>"
+- geo_zip_revenue       revenue / orders per customer zip prefix, sorted
+                        by grid cell (cell_lat, cell_lng)
+- geo_region_revenue    revenue / orders per state and macro-region
+- geo_distance_delivery delivered orders by seller → customer distance
+                        band: delivery days, late rate
+
+A radius question becomes a bounding box of grid cells (zone maps on
+the sorted cell columns skip everything else) plus an exact haversine
+test on the zip centroids that survive. Nothing joins raw geolocation
+at question time. Customers whose zip prefix has no geolocation are
+left out of the geo tables.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from typing import Optional
+
+from agent.config import GEO_CELL_DEG
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Brazil's extreme points; Olist geolocation has a few points abroad
+BRAZIL_BOUNDS = {"lat": (-33.75, 5.27), "lng": (-73.99, -34.79)}
+
+REGIONS = {
+    "North": ["AC", "AP", "AM", "PA", "RO", "RR", "TO"],
+    "Northeast": ["AL", "BA", "CE", "MA", "PB", "PE", "PI", "RN", "SE"],
+    "Center-West": ["DF", "GO", "MT", "MS"],
+    "Southeast": ["ES", "MG", "RJ", "SP"],
+    "South": ["PR", "RS", "SC"],
+}
+
+# (upper bound km, label); the last band is open-ended
+DISTANCE_BANDS = [
+    (50, "< 50 km"),
+    (200, "50–200 km"),
+    (500, "200–500 km"),
+    (1000, "500–1000 km"),
+    (2000, "1000–2000 km"),
+    (None, "2000+ km"),
+]
+
+# Intents whose template reads geo_zip_revenue and accepts a radius
+RADIUS_INTENTS = {"revenue_within_radius"}
+
+
+def haversine_sql(lat1: str, lng1: str, lat2: str, lng2: str) -> str:
+    """Great-circle distance in km between two SQL lat/lng expressions."""
+    return (
+        f"(2 * {EARTH_RADIUS_KM} * asin(least(1, sqrt("
+        f"power(sin(radians({lat2} - {lat1}) / 2), 2) + "
+        f"cos(radians({lat1})) * cos(radians({lat2})) * "
+        f"power(sin(radians({lng2} - {lng1}) / 2), 2)))))"
+    )
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((p2 - p1) / 2) ** 2
+        + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+# ----------------------------------
+# Build (called from db/setup_db.py)
+# ----------------------------------
+def build_geo_tables(con, cell_deg: float = None):
+    """(Re)builds every geo table from geolocation + the order facts."""
+    cell_deg = float(cell_deg or GEO_CELL_DEG)
+    (lat_lo, lat_hi), (lng_lo, lng_hi) = BRAZIL_BOUNDS["lat"], BRAZIL_BOUNDS["lng"]
+
+    con.execute(f"""
+        CREATE OR REPLACE TABLE geo_zip AS
+        SELECT
+            zip_prefix, lat, lng, city, state, n_points,
+            CAST(floor(lat / {cell_deg}) AS INTEGER) AS cell_lat,
+            CAST(floor(lng / {cell_deg}) AS INTEGER) AS cell_lng
+        FROM (
+            SELECT
+                geolocation_zip_code_prefix AS zip_prefix,
+                median(geolocation_lat) AS lat,
+                median(geolocation_lng) AS lng,
+                mode(lower(strip_accents(geolocation_city))) AS city,
+                mode(geolocation_state) AS state,
+                COUNT(*) AS n_points
+            FROM geolocation
+            WHERE geolocation_lat BETWEEN {lat_lo} AND {lat_hi}
+              AND geolocation_lng BETWEEN {lng_lo} AND {lng_hi}
+            GROUP BY geolocation_zip_code_prefix
+        )
+        ORDER BY cell_lat, cell_lng, zip_prefix
+    """)
+
+    con.execute("""
+        CREATE OR REPLACE TABLE geo_places AS
+        SELECT 'zip' AS kind, CAST(zip_prefix AS VARCHAR) AS name, state, lat, lng, 1 AS zips
+        FROM geo_zip
+        UNION ALL
+        SELECT 'city', city, state, AVG(lat), AVG(lng), COUNT(*)
+        FROM geo_zip
+        GROUP BY city, state
+        UNION ALL
+        SELECT 'state', lower(state), state, AVG(lat), AVG(lng), COUNT(*)
+        FROM geo_zip
+        GROUP BY state
+    """)
+
+    con.execute("""
+        CREATE OR REPLACE TABLE geo_zip_revenue AS
+        SELECT
+            g.zip_prefix, g.city, g.state, g.lat, g.lng, g.cell_lat, g.cell_lng,
+            SUM(f.payment_value) AS revenue,
+            COUNT(DISTINCT f.order_id) AS orders
+        FROM f_order_facts f
+        JOIN customers c ON f.customer_id = c.customer_id
+        JOIN geo_zip g ON c.customer_zip_code_prefix = g.zip_prefix
+        GROUP BY ALL
+        ORDER BY g.cell_lat, g.cell_lng, g.zip_prefix
+    """)
+
+    regions = ", ".join(
+        f"('{state}', '{region}')" for region, states in REGIONS.items() for state in states
+    )
+    con.execute(f"""
+        CREATE OR REPLACE TABLE geo_region_revenue AS
+        SELECT
+            COALESCE(r.region, 'Unknown') AS region,
+            f.customer_state AS state,
+            SUM(f.payment_value) AS revenue,
+            COUNT(DISTINCT f.order_id) AS orders
+        FROM f_order_facts f
+        LEFT JOIN (VALUES {regions}) AS r(state, region) ON f.customer_state = r.state
+        GROUP BY ALL
+    """)
+
+    band = "CASE " + " ".join(
+        f"WHEN distance_km < {upper} THEN {i}" for i, (upper, _) in enumerate(DISTANCE_BANDS[:-1])
+    ) + f" ELSE {len(DISTANCE_BANDS) - 1} END"
+    labels = ", ".join(f"({i}, '{label}')" for i, (_, label) in enumerate(DISTANCE_BANDS))
+
+    # One row per delivered (order, seller) shipment
+    con.execute(f"""
+        CREATE OR REPLACE TABLE geo_distance_delivery AS
+        WITH shipments AS (
+            SELECT DISTINCT
+                o.order_id,
+                oi.seller_id,
+                {haversine_sql('gc.lat', 'gc.lng', 'gs.lat', 'gs.lng')} AS distance_km,
+                date_diff('hour', o.order_purchase_timestamp, o.order_delivered_customer_date) / 24.0
+                    AS delivery_days,
+                o.order_delivered_customer_date > o.order_estimated_delivery_date AS late
+            FROM orders o
+            JOIN order_items oi ON o.order_id = oi.order_id
+            JOIN customers c ON o.customer_id = c.customer_id
+            JOIN sellers s ON oi.seller_id = s.seller_id
+            JOIN geo_zip gc ON c.customer_zip_code_prefix = gc.zip_prefix
+            JOIN geo_zip gs ON s.seller_zip_code_prefix = gs.zip_prefix
+            WHERE o.order_delivered_customer_date IS NOT NULL
+        )
+        SELECT
+            b.label AS distance_band,
+            ROUND(AVG(delivery_days), 1) AS avg_delivery_days,
+            ROUND(median(delivery_days), 1) AS median_delivery_days,
+            COUNT(*) AS shipments,
+            ROUND(AVG(distance_km), 0) AS avg_distance_km,
+            ROUND(AVG(CAST(late AS DOUBLE)), 3) AS late_rate,
+            b.band
+        FROM shipments
+        JOIN (VALUES {labels}) AS b(band, label) ON b.band = {band}
+        GROUP BY b.band, b.label
+        ORDER BY b.band
+    """)
+
+
+# ----------------------------------
+# Parsing ("within 100 km of São Paulo")
+# ----------------------------------
+_RADIUS = re.compile(
+    r"\b(?:within|in|around)\s+(?:a\s+)?(\d+(?:\.\d+)?)\s*"
+    r"(km|kms|kilometers?|kilometres?|mi|miles?)\b(?:\s+radius)?\s+(?:of|from|around)\s+"
+    r"(.+?)\s*(?=[?.!,;]|\s+(?:in|during|for|last|past|this)\b|$)"
+)
+
+
+def _normalize_place(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+def parse_radius(question: str) -> Optional[tuple]:
+    """(km, place) for "within N km|miles of <place>", else None."""
+    m = _RADIUS.search(question.lower())
+    if not m:
+        return None
+    km = float(m.group(1))
+    if m.group(2).startswith("mi"):
+        km *= 1.609344
+    return km, _normalize_place(m.group(3))
+
+
+_places = {}  # db path → {(kind, name): [(state, lat, lng, zips), ...]}
+_lock = threading.Lock()
+
+
+def _gazetteer(db_path: str) -> dict:
+    if db_path not in _places:
+        with _lock:
+            if db_path not in _places:
+                from agent.db import connect
+
+                con = connect(db_path)
+                try:
+                    rows = con.execute(
+                        "SELECT kind, name, state, lat, lng, zips FROM geo_places"
+                    ).fetchall()
+                finally:
+                    con.close()
+                index = {}
+                for kind, name, state, lat, lng, zips in rows:
+                    index.setdefault((kind, name), []).append((state, lat, lng, zips))
+                _places[db_path] = index
+    return _places[db_path]
+
+
+def resolve_place(place: str, db_path: str) -> Optional[tuple]:
+    """
+    (label, lat, lng) for a zip prefix, state code or city name
+    ("sao paulo", "campinas sp"); the city with most zip prefixes
+    wins when the name exists in several states.
+    """
+    index = _gazetteer(db_path)
+    place = _normalize_place(place)
+
+    if place.isdigit():
+        hit = index.get(("zip", str(int(place))))
+        return (f"zip {place}", hit[0][1], hit[0][2]) if hit else None
+
+    if len(place) == 2 and ("state", place) in index:
+        _, lat, lng, _ = index[("state", place)][0]
+        return (place.upper(), lat, lng)
+
+    m = re.match(r"^(.+?)[\s,/-]+([a-z]{2})$", place)
+    candidates = []
+    if m and ("city", m.group(1)) in index:
+        candidates = [c for c in index[("city", m.group(1))] if c[0].lower() == m.group(2)]
+        place = m.group(1)
+    candidates = candidates or index.get(("city", place), [])
+    if not candidates:
+        return None
+    state, lat, lng, _ = max(candidates, key=lambda c: c[3])
+    return (f"{place.title()} ({state})", lat, lng)
+
+
+# ----------------------------------
+# SQL rewrite: geo_zip_revenue → zip prefixes within the radius
+# ----------------------------------
+_FROM_ZIPS = re.compile(r"\bfrom\s+geo_zip_revenue\b", re.IGNORECASE)
+
+
+def supports_radius(intent: str) -> bool:
+    return intent in RADIUS_INTENTS
+
+
+def cell_range(lat: float, lng: float, km: float, cell_deg: float = None):
+    """Grid cells (lat_lo, lat_hi, lng_lo, lng_hi) covering the circle's bounding box."""
+    cell_deg = float(cell_deg or GEO_CELL_DEG)
+    dlat = km / 111.195
+    dlng = km / (111.195 * max(math.cos(math.radians(lat)), 0.01))
+    return (
+        math.floor((lat - dlat) / cell_deg),
+        math.floor((lat + dlat) / cell_deg),
+        math.floor((lng - dlng) / cell_deg),
+        math.floor((lng + dlng) / cell_deg),
+    )
+
+
+def apply_radius(sql: str, lat: float, lng: float, km: float) -> str:
+    """
+    FROM geo_zip_revenue
+    →   FROM (SELECT * FROM geo_zip_revenue WHERE <cells> AND <distance>) AS geo_zip_revenue
+    """
+    if not _FROM_ZIPS.search(sql):
+        raise ValueError("Radius filters need a query over geo_zip_revenue")
+    lat, lng, km = float(lat), float(lng), float(km)
+    lat_lo, lat_hi, lng_lo, lng_hi = cell_range(lat, lng, km)
+    where = (
+        f"cell_lat BETWEEN {lat_lo} AND {lat_hi} "
+        f"AND cell_lng BETWEEN {lng_lo} AND {lng_hi} "
+        f"AND {haversine_sql('lat', 'lng', repr(lat), repr(lng))} <= {km!r}"
+    )
+    body = f"SELECT * FROM geo_zip_revenue WHERE {where}"
+    return _FROM_ZIPS.sub(f"FROM ({body}) AS geo_zip_revenue", sql, count=1)
+
+
+def describe_radius(radius: tuple) -> str:
+    label, _, _, km = radius
+    return f"within {km:,.0f} km of {label}"
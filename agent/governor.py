@@ -0,0 +1,118 @@
+# agent/governor.py
+
+"""
+Query execution governor.
+
+Every SQL query the agent runs goes through run_governed():
+
+- admission: at most OLIST_QUERY_MAX_CONCURRENT queries run at once;
+  others wait up to OLIST_QUERY_ADMISSION_WAIT_S, then are refused
+- resources: memory_limit / threads come from the DuckDB runtime
+  profile (agent/db.py); they are per database instance, so they
+  bound all concurrent queries together
+- timeout: a timer interrupts the query after OLIST_QUERY_TIMEOUT_S
+- row cap: results are cut at OLIST_QUERY_MAX_ROWS rows, inside the
+  query (LIMIT), with df.attrs["truncated"] / ["row_cap"] set
+  (df.attrs["elapsed_ms"] is execution time, admission wait excluded)
+
+One heavy question therefore holds one slot for a bounded time and
+cannot pull an unbounded result into pandas.
+"""
+
+import logging
+import threading
+import time
+
+from agent.config import (
+    QUERY_ADMISSION_WAIT_S,
+    QUERY_MAX_CONCURRENT,
+    QUERY_MAX_ROWS,
+    QUERY_TIMEOUT_S,
+)
+from agent.tracing import annotate, span
+
+logger = logging.getLogger("agent.governor")
+
+
+class QueryTimeout(TimeoutError):
+    """The query ran longer than its wall-clock budget and was interrupted."""
+
+
+class QueryRejected(RuntimeError):
+    """No execution slot became free within the admission wait."""
+
+
+_slots = threading.BoundedSemaphore(QUERY_MAX_CONCURRENT)
+_stats = {"admitted": 0, "rejected": 0, "timed_out": 0, "truncated": 0, "running": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key: str, delta: int = 1):
+    with _stats_lock:
+        _stats[key] += delta
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def capped_sql(sql: str, max_rows: int) -> str:
+    """Wraps the query so DuckDB stops after max_rows + 1 rows (one extra detects truncation)."""
+    return f"SELECT * FROM ({sql.strip()}) AS governed LIMIT {int(max_rows) + 1}"
+
+
+def run_governed(con, sql: str, timeout_s: float = None, max_rows: int = None,
+                 admission_wait_s: float = None):
+    """
+    Executes sql on con under the governor and returns a DataFrame.
+    Raises QueryRejected (busy) or QueryTimeout (interrupted).
+    """
+    timeout_s = QUERY_TIMEOUT_S if timeout_s is None else timeout_s
+    max_rows = QUERY_MAX_ROWS if max_rows is None else max_rows
+    admission_wait_s = QUERY_ADMISSION_WAIT_S if admission_wait_s is None else admission_wait_s
+
+    with span("admission"):
+        if not _slots.acquire(timeout=admission_wait_s):
+            _count("rejected")
+            raise QueryRejected(
+                f"{QUERY_MAX_CONCURRENT} queries already running; try again shortly"
+            )
+    _count("admitted")
+    _count("running")
+    try:
+        import duckdb
+
+        timer = None
+        if timeout_s:
+            timer = threading.Timer(timeout_s, con.interrupt)
+            timer.daemon = True
+            timer.start()
+
+        t0 = time.perf_counter()
+        try:
+            with span("execute"):
+                result = con.execute(capped_sql(sql, max_rows) if max_rows else sql)
+            with span("fetchdf"):
+                df = result.fetchdf()
+            elapsed_ms = (time.perf_counter() - t0) * 1e3
+        except duckdb.InterruptException:
+            _count("timed_out")
+            logger.warning("Query interrupted after %.1fs: %s", time.perf_counter() - t0, " ".join(sql.split())[:200])
+            raise QueryTimeout(f"Query exceeded {timeout_s:g}s and was cancelled") from None
+        finally:
+            if timer is not None:
+                timer.cancel()
+    finally:
+        _count("running", -1)
+        _slots.release()
+
+    truncated = bool(max_rows) and len(df) > max_rows
+    if truncated:
+        df = df.iloc[:max_rows]
+        _count("truncated")
+        annotate("truncated", True)
+    df.attrs["truncated"] = truncated
+    df.attrs["row_cap"] = max_rows
+    df.attrs["elapsed_ms"] = elapsed_ms
+    return df
@@ -82,5 +82,150 @@ INTENT_SYNONYMS = {
     "what is average order value"
 ],
 
+    "revenue_by_region": [
+        "revenue by region",
+        "revenue per region",
+        "regional revenue"
+    ],
+
+    "revenue_by_state": [
+        "revenue by state",
+        "revenue per state"
+    ],
+
+    "revenue_within_radius": [
+        "km of",
+        "km from",
+        "km around",
+        "miles of",
+        "radius"
+    ],
+
+    "delivery_time_by_seller_state": [
+        "delivery time by seller state",
+        "delivery time per seller state",
+        "late deliveries by seller state"
+    ],
+
+    "delivery_time_by_customer_state": [
+        "delivery time by state",
+        "delivery time by customer state",
+        "delivery time per state",
+        "late deliveries by state"
+    ],
+
+    "delivery_time_by_category": [
+        "delivery time by category",
+        "delivery time per category"
+    ],
+
+    "monthly_delivery_time": [
+        "monthly delivery time",
+        "delivery time by month",
+        "delivery time trend"
+    ],
+
+    "delivery_time_by_distance": [
+        "delivery time by distance",
+        "delivery time vs distance",
+        "distance vs delivery",
+        "seller customer distance",
+        "distance and delivery"
+    ],
+
+    "payment_value_percentiles": [
+        "median payment",
+        "payment percentile",
+        "payment value percentile",
+        "percentile payment",
+        "percentile of payment",
+        "percentiles of payment",
+        "p25 payment",
+        "p50 payment",
+        "p75 payment",
+        "p90 payment",
+        "p99 payment",
+        "payment distribution",
+        "typical payment"
+    ],
+
+    "review_score_by_category": [
+        "median review",
+        "review percentile",
+        "review score percentile",
+        "percentile review",
+        "percentile of review",
+        "percentiles of review",
+        "p10 review",
+        "p25 review",
+        "p50 review",
+        "review distribution",
+        "review scores by category"
+    ],
+
+    "unique_customers_by_state": [
+        "unique customers",
+        "distinct customers",
+        "customers by state",
+        "customers per state"
+    ],
+
+    "seller_state_reach": [
+        "seller state reach",
+        "orders by seller state",
+        "customers by seller state",
+        "seller states by orders"
+    ],
+
+    "delivery_time_percentiles": [
+        "delivery percentile",
+        "percentile delivery",
+        "percentile of delivery",
+        "percentiles of delivery",
+        "p50 delivery",
+        "p75 delivery",
+        "p90 delivery",
+        "p95 delivery",
+        "p99 delivery",
+        "median delivery",
+        "delivery time to",
+        "delivery time from",
+        "lead time",
+        "handling time",
+        "transit time",
+        "approval time",
+        "delivery time"
+    ],
+
+    "cohort_retention": [
+        "cohort retention",
+        "retention by cohort",
+        "retention matrix",
+        "cohort analysis",
+        "cohorts"
+    ],
+
+    "retention_curve": [
+        "retention curve",
+        "retention rate",
+        "customer retention",
+        "retention"
+    ],
+
+    "repeat_purchase_rate": [
+        "repeat purchase",
+        "repeat customers",
+        "repeat rate",
+        "returning customers",
+        "buy again"
+    ],
+
+    "cohort_ltv": [
+        "ltv by cohort",
+        "cohort ltv",
+        "true ltv",
+        "lifetime value by cohort"
+    ],
+
      
 }
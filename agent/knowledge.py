@@ -1,21 +1,10 @@
 # agent/knowledge.py
 
-import json
-import os
 import re
 from typing import List, Optional
 
-# --------------------------------------------------
-# Load knowledge files
-# --------------------------------------------------
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-KNOWLEDGE_DIR = os.path.join(BASE_DIR, "knowledge")
-
-with open(os.path.join(KNOWLEDGE_DIR, "glossary.json"), encoding="utf-8") as f:
-    GLOSSARY = json.load(f)
-
-with open(os.path.join(KNOWLEDGE_DIR, "product_enrichment.json"), encoding="utf-8") as f:
-    PRODUCT_INFO = json.load(f)
+# Glossary / enrichment lookups read the compiled, memory-mapped artifact
+from agent.knowledge_artifact import load_artifact
 
 # --------------------------------------------------
 # Category aliases (PT ↔ EN + business synonyms)
@@ -91,23 +80,20 @@ def lookup_definition(query: str) -> Optional[str]:
     3. Direct category enrichment
     """
     q_norm = normalize(query)
+    kb = load_artifact()
 
     # 1️⃣ Glossary terms
-    for term, definition in GLOSSARY.items():
-        if normalize(term) in q_norm:
-            return definition
+    definition = kb.first_contained("glossary", q_norm)
+    if definition is not None:
+        return definition
 
     # 2️⃣ Alias → category enrichment
-    for alias, category in ALIAS_TO_CATEGORY.items():
-        if normalize(alias) in q_norm:
-            return PRODUCT_INFO.get(category)
+    category = kb.first_contained("aliases", q_norm)
+    if category is not None:
+        return kb.get("product_info", category)
 
     # 3️⃣ Direct category match
-    for category, explanation in PRODUCT_INFO.items():
-        if normalize(category) in q_norm:
-            return explanation
-
-    return None
+    return kb.first_contained("categories", q_norm)
 
 
 # --------------------------------------------------
@@ -118,13 +104,7 @@ def translate_category(text: str) -> Optional[str]:
     Translates English aliases to Portuguese category names
     using CONTAINMENT matching.
     """
-    q_norm = normalize(text)
-
-    for alias, category in ALIAS_TO_CATEGORY.items():
-        if normalize(alias) in q_norm:
-            return category
-
-    return None
+    return load_artifact().first_contained("aliases", normalize(text))
 
 
 
@@ -137,11 +117,13 @@ def get_category_context(categories: List[str], max_items: int = 3) -> str:
     Used for AI explanations and 'why' insights.
     """
     insights = []
+    kb = load_artifact()
 
     for cat in categories[:max_items]:
-        if cat in PRODUCT_INFO:
+        info = kb.get("product_info", cat)
+        if info is not None:
             insights.append(
-                f"- **{cat.replace('_',' ').title()}**: {PRODUCT_INFO[cat]}"
+                f"- **{cat.replace('_',' ').title()}**: {info}"
             )
 
     if not insights:
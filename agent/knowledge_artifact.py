@@ -0,0 +1,195 @@
+# agent/knowledge_artifact.py
+
+"""
+Precompiled knowledge artifact.
+
+The glossary, product enrichment, category aliases and the markdown KB
+(whole and as retrieval chunks with a BM25 index, see agent/rag.py)
+are compiled into one versioned binary file whose match keys are
+already normalized, so lookups never parse JSON or re-normalize terms.
+The file is memory-mapped read-only: worker processes share the same
+page-cache pages, and a text value is only decoded when a lookup hits.
+
+Layout:
+    header  magic | format version (u32) | sha256 of sources | toc length (u32)
+    toc     JSON: {"sections": {name: [[key, offset, length], ...]},
+                  "indexes": {"bm25": ...}}
+    blob    UTF-8 text values (offsets are relative to the blob)
+
+Sections keep source order, which is the lookup priority order.
+
+Build (also run by db/setup_db.py):
+    python -m agent.knowledge_artifact [--out PATH]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from functools import lru_cache
+
+from agent.config import KNOWLEDGE_ARTIFACT
+
+logger = logging.getLogger("agent.knowledge")
+
+MAGIC = b"OLISTKB\0"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sI32sI")
+
+KNOWLEDGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge")
+SOURCES = ["glossary.json", "product_enrichment.json", "products.md"]
+
+
+# ----------------------------------
+# Compile
+# ----------------------------------
+def source_digest(knowledge_dir: str = None) -> bytes:
+    """sha256 over every source file plus the in-code alias table."""
+    from agent.knowledge import CATEGORY_ALIASES
+
+    knowledge_dir = knowledge_dir or KNOWLEDGE_DIR
+    h = hashlib.sha256()
+    for name in SOURCES:
+        h.update(name.encode())
+        with open(os.path.join(knowledge_dir, name), "rb") as f:
+            h.update(f.read())
+    h.update(json.dumps(CATEGORY_ALIASES, sort_keys=True).encode())
+    return h.digest()
+
+
+def compile_bytes(knowledge_dir: str = None) -> bytes:
+    from agent.knowledge import CATEGORY_ALIASES, normalize
+    from agent.rag import build_bm25, split_markdown
+
+    knowledge_dir = knowledge_dir or KNOWLEDGE_DIR
+
+    def read(name):
+        with open(os.path.join(knowledge_dir, name), encoding="utf-8") as f:
+            return f.read()
+
+    glossary = json.loads(read("glossary.json"))
+    product_info = json.loads(read("product_enrichment.json"))
+    markdown = read("products.md")
+    chunks = split_markdown(markdown)
+
+    blob = bytearray()
+    offsets = {}
+
+    def put(text: str):
+        # identical values (e.g. a category reached by name and by alias) are stored once
+        if text not in offsets:
+            data = text.encode("utf-8")
+            offsets[text] = (len(blob), len(data))
+            blob.extend(data)
+        return list(offsets[text])
+
+    sections = {
+        "glossary": [[normalize(term), *put(text)] for term, text in glossary.items()],
+        "aliases": [
+            [normalize(alias), *put(category)]
+            for category, aliases in CATEGORY_ALIASES.items()
+            for alias in aliases
+        ],
+        "product_info": [[category, *put(text)] for category, text in product_info.items()],
+        "categories": [[normalize(category), *put(text)] for category, text in product_info.items()],
+        "kb": [["products.md", *put(markdown)]],
+        "chunks": [[c["heading"], *put(c["text"])] for c in chunks],
+    }
+    indexes = {"bm25": build_bm25(chunks)}
+
+    toc = json.dumps({"sections": sections, "indexes": indexes, "built_at": time.time()}).encode("utf-8")
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, source_digest(knowledge_dir), len(toc))
+    return header + toc + bytes(blob)
+
+
+def build_artifact(path: str = KNOWLEDGE_ARTIFACT, knowledge_dir: str = None) -> int:
+    """Writes the artifact atomically; returns its size in bytes."""
+    data = compile_bytes(knowledge_dir)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+# ----------------------------------
+# Load
+# ----------------------------------
+class KnowledgeArtifact:
+    def __init__(self, buf):
+        magic, version, digest, toc_len = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a knowledge artifact")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Artifact format v{version}, expected v{FORMAT_VERSION}")
+
+        toc = json.loads(buf[HEADER.size:HEADER.size + toc_len])
+        self.digest = digest
+        self.built_at = toc.get("built_at")
+        self.sections = toc["sections"]
+        self.indexes = toc.get("indexes", {})
+        self._buf = buf
+        self._base = HEADER.size + toc_len
+        self._maps = {}
+
+    def text(self, offset: int, length: int) -> str:
+        start = self._base + offset
+        return self._buf[start:start + length].decode("utf-8")
+
+    def entries(self, section: str) -> list:
+        return self.sections.get(section, [])
+
+    def get(self, section: str, key: str, default=None):
+        index = self._maps.get(section)
+        if index is None:
+            index = self._maps[section] = {k: (o, n) for k, o, n in reversed(self.entries(section))}
+        if key not in index:
+            return default
+        return self.text(*index[key])
+
+    def first_contained(self, section: str, q_norm: str):
+        """Value of the first entry whose key occurs in the normalized question."""
+        for key, offset, length in self.entries(section):
+            if key in q_norm:
+                return self.text(offset, length)
+        return None
+
+
+def _sources_present() -> bool:
+    return all(os.path.exists(os.path.join(KNOWLEDGE_DIR, name)) for name in SOURCES)
+
+
+@lru_cache(maxsize=1)
+def load_artifact(path: str = KNOWLEDGE_ARTIFACT) -> KnowledgeArtifact:
+    """
+    Maps the compiled artifact. If it is missing, from another format
+    version, or older than the sources, compiles in memory instead.
+    """
+    try:
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        artifact = KnowledgeArtifact(buf)
+        if not _sources_present() or artifact.digest == source_digest():
+            return artifact
+        logger.warning("Knowledge artifact %s is stale; compiling from sources", path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.info("Knowledge artifact unavailable (%s); compiling from sources", e)
+
+    return KnowledgeArtifact(compile_bytes())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m agent.knowledge_artifact")
+    parser.add_argument("--out", default=KNOWLEDGE_ARTIFACT)
+    args = parser.parse_args(argv)
+
+    size = build_artifact(args.out)
+    print(f"📚 Knowledge artifact v{FORMAT_VERSION} → {args.out} ({size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,47 @@
-from openai import OpenAI
+import logging
+from functools import lru_cache
 
-client = OpenAI(
-    base_url="http://localhost:8000/v1",
-    api_key="lm-studio"
+from agent.config import LLM_API_KEY, LLM_BASE_URL, LLM_MAX_RETRIES, LLM_MODEL, LLM_TIMEOUT_S
+
+logger = logging.getLogger("agent.llm_client")
+
+MODEL = LLM_MODEL
+
+LLM_UNAVAILABLE = (
+    "⚠️ Unable to generate AI explanation at the moment. "
+    "The data result above is still accurate."
 )
 
-MODEL = "qwen2.5-7b-instruct"
+
+@lru_cache(maxsize=1)
+def get_client():
+    """
+    OpenAI-compatible client, built on first LLM call.
+    The openai SDK is heavy to import and most questions never reach it.
+    """
+    from openai import OpenAI
+
+    return OpenAI(
+        base_url=LLM_BASE_URL,
+        api_key=LLM_API_KEY,
+        timeout=LLM_TIMEOUT_S,
+        max_retries=LLM_MAX_RETRIES,
+    )
+
 
 def llm_generate(prompt: str):
     """
     Generate AI explanation text.
-    - No hard timeout (local models need time)
-    - Used only on-demand via UI button
-    - Result is cached at Streamlit level
+    - No hard timeout by default (local models need time);
+      OLIST_LLM_TIMEOUT_S sets one
+    - Called through explain_cached() (agent/explain_cache.py): results
+      land in the shared SQLite cache, which the "Explain" button and the
+      speculative queue (agent/explain_queue.py) read before calling here
+    - Returns LLM_UNAVAILABLE on failure (never cached)
     """
 
     try:
-        resp = client.chat.completions.create(
+        resp = get_client().chat.completions.create(
             model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
@@ -25,7 +50,5 @@ def llm_generate(prompt: str):
         return resp.choices[0].message.content.strip()
 
     except Exception as e:
-        return (
-            "⚠️ Unable to generate AI explanation at the moment. "
-            "The data result above is still accurate."
-        )
+        logger.warning("LLM explanation failed: %s", e)
+        return LLM_UNAVAILABLE
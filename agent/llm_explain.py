@@ -1,15 +1,26 @@
+import logging
+
 from agent.llm_client import llm_generate
 from agent.knowledge import get_category_context
+from agent.rag import retrieve_context
+from agent.prompt_budget import encode_table, fit_sections, section
+from agent.config import EXPLAIN_PROMPT_TOKENS, EXPLAIN_TABLE_ROWS
 
-def explain(question: str, df):
+logger = logging.getLogger("agent.llm_explain")
+
+# Bump when the prompt wording or layout changes (invalidates cached explanations)
+PROMPT_VERSION = 3
+
+
+def build_prompt(question: str, df):
     """
-    Generates an analyst-style explanation.
-    - Avoids meaningless statistics for single-row results
-    - Uses domain knowledge only for interpretation
+    Assembles the explanation prompt within EXPLAIN_PROMPT_TOKENS.
+    Trimmed first: knowledge excerpts, then category context, then
+    table rows. Returns (prompt, report).
     """
 
-    # Preview for grounding
-    preview = df.head(5).to_string(index=False)
+    # Compact preview for grounding
+    table = encode_table(df, max_rows=EXPLAIN_TABLE_ROWS)
 
     # Category enrichment (for "why" reasoning)
     category_context = ""
@@ -17,6 +28,9 @@ def explain(question: str, df):
         categories = df["category"].dropna().unique().tolist()[:3]
         category_context = get_category_context(categories)
 
+    # Only the knowledge-base sections relevant to this question
+    kb_context = retrieve_context(f"{question} {' '.join(map(str, df.columns))}")
+
     # Decide whether to include comparative reasoning
     include_comparison = df.shape[0] > 1
 
@@ -31,27 +45,42 @@ def explain(question: str, df):
             "Focus on interpreting what this single result represents and why it matters."
         )
 
-    prompt = f"""
-You are a senior e-commerce data analyst.
-
-User question:
-{question}
-
-Query result:
-{preview}
-
-Category business context (for interpretation only):
-{category_context}
-
-Instructions:
-- Base conclusions strictly on the data shown
+    instructions = f"""- Base conclusions strictly on the data shown
 - Do NOT invent statistics or causes
 - Avoid generic filler explanations
 - Explain patterns using category characteristics where relevant
 - {comparison_instruction}
 - Clearly state business implications
 
-Write a concise, professional explanation in 5–7 sentences.
-"""
+Write a concise, professional explanation in 5–7 sentences."""
+
+    return fit_sections(
+        [
+            section("", "You are a senior e-commerce data analyst."),
+            section("User question:", question),
+            section("Query result (CSV):", table, priority=1, min_lines=2),
+            section("Category business context (for interpretation only):", category_context, priority=2),
+            section("Knowledge base excerpts (definitions and caveats):", kb_context, priority=3),
+            section("Instructions:", instructions),
+        ],
+        EXPLAIN_PROMPT_TOKENS,
+    )
+
 
-    return llm_generate(prompt)
+def explain_with_report(question: str, df):
+    """Explanation text plus the prompt-size report."""
+    prompt, report = build_prompt(question, df)
+    logger.info(
+        "explain prompt_tokens=%d budget=%d trimmed=%s dropped=%s",
+        report["prompt_tokens"], report["budget"], report["trimmed"], report["dropped"],
+    )
+    return llm_generate(prompt), report
+
+
+def explain(question: str, df):
+    """
+    Generates an analyst-style explanation.
+    - Avoids meaningless statistics for single-row results
+    - Uses domain knowledge only for interpretation
+    """
+    return explain_with_report(question, df)[0]
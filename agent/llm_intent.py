@@ -1,11 +1,8 @@
-from openai import OpenAI
+import logging
 
-client = OpenAI(
-    base_url="http://localhost:8000/v1",
-    api_key="lm-studio"
-)
+from agent.llm_client import MODEL, get_client
 
-MODEL = "qwen2.5-7b-instruct"
+logger = logging.getLogger("agent.llm_intent")
 
 def llm_detect_intent(question: str, allowed_intents: list):
 
@@ -21,12 +18,17 @@ Rules:
 - If none match, return NONE
 """
 
-    resp = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-        max_tokens=20
-    )
+    try:
+        resp = get_client().chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+            max_tokens=20
+        )
+    except Exception as e:
+        # LLM down / failing → treat as "no intent" rather than crash answer()
+        logger.warning("LLM intent detection failed: %s", e)
+        return None
 
     intent = resp.choices[0].message.content.strip().lower()
     intent = intent.replace("`", "").replace('"', "")
@@ -0,0 +1,240 @@
+# agent/logistics.py
+
+"""
+Delivery / logistics mart.
+
+build_logistics_mart() (a db/setup_db.py step) computes lead times once
+per delivered order and pre-aggregates them:
+
+- f_delivery                  one row per delivered order: purchase →
+                              approval / carrier / customer lead times
+                              (days), delay vs estimate, late flag
+- logistics_lead_hist         lead-time histograms (LOGISTICS_BUCKET_DAYS
+                              wide) per customer_state × seller_state ×
+                              category × month cell
+- logistics_by_customer_state exact avg / p50 / p90 / late rate per
+  logistics_by_seller_state   dimension, for the "by state / category /
+  logistics_by_category       month" intents
+  logistics_by_month
+
+"p90 delivery time to SP" merges the histogram buckets of the matching
+cells (a few thousand rows at most) and interpolates inside the bucket
+that crosses the percentile, so no question sorts the orders. Results
+are exact to within one bucket. A time window is widened to the whole
+months it touches (describe_month_span() names them).
+"""
+
+import re
+from typing import Optional
+
+from agent.config import LOGISTICS_BUCKET_DAYS
+from agent.geo import REGIONS
+from agent.time_windows import month_span
+
+# metric → lead-time column of f_delivery
+LEAD_METRICS = {
+    "delivery": "delivery_days",   # purchase → customer
+    "approval": "approval_days",   # purchase → payment approved
+    "handling": "handling_days",   # approved → handed to carrier
+    "transit": "transit_days",     # carrier → customer
+}
+
+DEFAULT_PERCENTILES = [50, 75, 90, 95, 99]
+
+# Intents answered by lead_time_sql()
+LEAD_TIME_INTENTS = {"delivery_time_percentiles"}
+
+STATES = {state for states in REGIONS.values() for state in states}
+
+# table → grouping column for the per-dimension rollups
+DIMENSION_TABLES = {
+    "logistics_by_customer_state": "customer_state",
+    "logistics_by_seller_state": "seller_state",
+    "logistics_by_category": "category",
+    "logistics_by_month": "year_month",
+}
+
+
+# ----------------------------------
+# Build (called from db/setup_db.py)
+# ----------------------------------
+def build_logistics_mart(con, bucket_days: float = None):
+    """(Re)builds f_delivery, the lead-time histograms and the rollups."""
+    width = float(bucket_days or LOGISTICS_BUCKET_DAYS)
+
+    def days(start, end):
+        return f"date_diff('minute', {start}, {end}) / 1440.0"
+
+    # Seller / category of an order = those of its most expensive item
+    con.execute(f"""
+        CREATE OR REPLACE TABLE f_delivery AS
+        WITH main_item AS (
+            SELECT
+                oi.order_id,
+                arg_max(oi.seller_id, oi.price) AS seller_id,
+                arg_max(COALESCE(p.product_category_name, 'Unknown'), oi.price) AS category
+            FROM order_items oi
+            JOIN products p ON oi.product_id = p.product_id
+            GROUP BY oi.order_id
+        )
+        SELECT
+            o.order_id,
+            o.order_purchase_timestamp,
+            strftime(o.order_purchase_timestamp, '%Y-%m') AS year_month,
+            c.customer_state,
+            s.seller_state,
+            m.category,
+            {days('o.order_purchase_timestamp', 'o.order_approved_at')} AS approval_days,
+            {days('o.order_approved_at', 'o.order_delivered_carrier_date')} AS handling_days,
+            {days('o.order_delivered_carrier_date', 'o.order_delivered_customer_date')} AS transit_days,
+            {days('o.order_purchase_timestamp', 'o.order_delivered_customer_date')} AS delivery_days,
+            {days('o.order_estimated_delivery_date', 'o.order_delivered_customer_date')} AS delay_days,
+            o.order_delivered_customer_date > o.order_estimated_delivery_date AS is_late
+        FROM orders o
+        JOIN main_item m ON o.order_id = m.order_id
+        LEFT JOIN customers c ON o.customer_id = c.customer_id
+        LEFT JOIN sellers s ON m.seller_id = s.seller_id
+        WHERE o.order_status = 'delivered'
+          AND o.order_delivered_customer_date IS NOT NULL
+        ORDER BY o.order_purchase_timestamp
+    """)
+
+    # Negative lead times (bad timestamps) are dropped from the histograms
+    unpivot = " UNION ALL ".join(
+        f"SELECT '{metric}' AS metric, customer_state, seller_state, category, year_month, "
+        f"{column} AS value FROM f_delivery WHERE {column} >= 0"
+        for metric, column in LEAD_METRICS.items()
+    )
+    con.execute(f"""
+        CREATE OR REPLACE TABLE logistics_lead_hist AS
+        SELECT
+            metric, customer_state, seller_state, category, year_month,
+            floor(value / {width}) * {width} AS bucket,
+            {width} AS width,
+            COUNT(*) AS n
+        FROM ({unpivot})
+        GROUP BY ALL
+        ORDER BY metric, customer_state, seller_state, category, year_month, bucket
+    """)
+
+    for table, column in DIMENSION_TABLES.items():
+        con.execute(f"""
+            CREATE OR REPLACE TABLE {table} AS
+            SELECT
+                {column},
+                ROUND(AVG(delivery_days), 1) AS avg_delivery_days,
+                ROUND(quantile_cont(delivery_days, 0.5), 1) AS p50_delivery_days,
+                ROUND(quantile_cont(delivery_days, 0.9), 1) AS p90_delivery_days,
+                COUNT(*) AS orders,
+                ROUND(AVG(CAST(is_late AS DOUBLE)), 3) AS late_rate,
+                ROUND(AVG(handling_days), 1) AS avg_handling_days,
+                ROUND(AVG(transit_days), 1) AS avg_transit_days
+            FROM f_delivery
+            GROUP BY {column}
+            ORDER BY {column}
+        """)
+
+
+# ----------------------------------
+# Parsing ("p90 delivery time to SP", "median handling time from RJ")
+# ----------------------------------
+def parse_lead_time(question: str) -> Optional[dict]:
+    """
+    Lead-time spec found in the question as typed (state codes in caps
+    count anywhere), or None:
+    {"metric", "percentiles", "customer_state", "seller_state"}.
+    """
+    q = question.lower()
+    spec = {}
+
+    percentiles = [int(p) for p in re.findall(r"\bp(\d{1,2})\b", q)]
+    percentiles += [int(p) for p in re.findall(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+percentile\b", q)]
+    if re.search(r"\bmedian\b", q):
+        percentiles.append(50)
+    if percentiles:
+        spec["percentiles"] = sorted({p for p in percentiles if 0 < p < 100})
+
+    for metric, words in (
+        ("handling", ("handling", "dispatch")),
+        ("transit", ("transit", "carrier")),
+        ("approval", ("approval", "approve")),
+    ):
+        if any(w in q for w in words):
+            spec["metric"] = metric
+            break
+
+    # State codes: written in caps anywhere ("to SP for toys"), in lower
+    # case only at the end or before punctuation ("from rj?"), so words
+    # like "to go up" or "in es" are not read as states
+    for key, words in (("customer_state", "to|in|for"), ("seller_state", "from")):
+        m = re.search(rf"\b(?i:{words})\s+([A-Z]{{2}})\b", question) or re.search(
+            rf"\b(?:{words})\s+([a-z]{{2}})\s*(?:[?!.,;]|$)", q
+        )
+        if m and m.group(1).upper() in STATES:
+            spec[key] = m.group(1).upper()
+
+    return spec or None
+
+
+# ----------------------------------
+# SQL: histogram merge → percentiles
+# ----------------------------------
+def lead_time_sql(intent: str, filters: dict) -> Optional[str]:
+    """
+    Percentile SQL over the merged histogram cells matching the filters,
+    or None for intents it does not serve.
+    """
+    if intent not in LEAD_TIME_INTENTS:
+        return None
+
+    filters = filters or {}
+    lead = filters.get("lead") or {}
+    metric = lead.get("metric", "delivery")
+    if metric not in LEAD_METRICS:
+        raise ValueError(f"Unknown lead-time metric: {metric}")
+    percentiles = sorted(set(DEFAULT_PERCENTILES) | set(lead.get("percentiles", [])))
+
+    conditions = [f"metric = '{metric}'"]
+    for key in ("customer_state", "seller_state"):
+        if key in lead:
+            if lead[key] not in STATES:
+                raise ValueError(f"Unknown state: {lead[key]}")
+            conditions.append(f"{key} = '{lead[key]}'")
+    if "category" in filters:
+        conditions.append("category = '{}'".format(str(filters["category"]).replace("'", "''")))
+    if "window" in filters:
+        first, last = month_span(filters["window"])
+        conditions.append(f"year_month >= '{first}'")
+        conditions.append(f"year_month <= '{last}'")
+
+    columns = ",\n            ".join(
+        f"ROUND(arg_min(bucket + width * ({p / 100} * total - (cum - n)) / n, bucket) "
+        f"FILTER (WHERE cum >= {p / 100} * total), 1) AS p{p}_days"
+        for p in percentiles
+    )
+    return f"""
+        WITH h AS (
+            SELECT bucket, width, SUM(n) AS n
+            FROM logistics_lead_hist
+            WHERE {" AND ".join(conditions)}
+            GROUP BY bucket, width
+        ),
+        c AS (
+            SELECT bucket, width, n, SUM(n) OVER (ORDER BY bucket) AS cum, SUM(n) OVER () AS total
+            FROM h
+        )
+        SELECT
+            CAST(MAX(total) AS BIGINT) AS orders,
+            {columns}
+        FROM c
+        HAVING COUNT(*) > 0
+    """
+
+
+def describe_lead(lead: dict) -> str:
+    parts = [lead.get("metric", "delivery") + " time"]
+    if "customer_state" in lead:
+        parts.append(f"to {lead['customer_state']}")
+    if "seller_state" in lead:
+        parts.append(f"from {lead['seller_state']}")
+    return " ".join(parts)
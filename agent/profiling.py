@@ -0,0 +1,260 @@
+# agent/profiling.py
+
+"""
+Slow-query profiling.
+
+When a query in answer() takes longer than OLIST_SLOW_QUERY_MS, it is
+re-run in the background with DuckDB JSON profiling enabled, under the
+query governor like any other query (admission slot, timeout, row
+cap; when the governor refuses, the capture is skipped). The
+operator tree (timings + cardinalities) is stored in a JSONL file,
+keyed by intent and filters and tagged with a label (e.g. the schema
+version), so plans can be compared across schema changes.
+
+CLI:
+    python -m agent.profiling list [--top 10] [--label LABEL]
+    python -m agent.profiling capture --label before [--intent X]
+    python -m agent.profiling diff --intent X --before before --after after
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from agent.config import PROFILE_LABEL, PROFILE_STORE, SLOW_QUERY_MS
+from agent.governor import run_governed
+
+logger = logging.getLogger("agent.profiling")
+_lock = threading.Lock()
+_in_flight = set()
+
+
+def profile_key(intent: str, filters: dict) -> str:
+    return f"{intent}|{json.dumps(filters or {}, sort_keys=True, default=str)}"
+
+
+# ----------------------------------
+# Capture
+# ----------------------------------
+def _operator_tree(node: dict) -> dict:
+    """Keeps what matters for plan comparison (names differ across DuckDB versions)."""
+    return {
+        "operator": node.get("operator_name") or node.get("operator_type") or node.get("name"),
+        "timing": node.get("operator_timing", node.get("timing", 0.0)),
+        "cardinality": node.get("operator_cardinality", node.get("cardinality", 0)),
+        "extra_info": node.get("extra_info"),
+        "children": [_operator_tree(c) for c in node.get("children", [])],
+    }
+
+
+def profile_query(con, sql: str) -> dict:
+    """
+    Runs sql once through the governor with JSON profiling on this
+    connection and returns the plan.
+    """
+    fd, path = tempfile.mkstemp(suffix=".json", prefix="olist_profile_")
+    os.close(fd)
+    try:
+        con.execute("SET enable_profiling = 'json'")
+        con.execute(f"SET profiling_output = '{path}'")
+        try:
+            df = run_governed(con, sql)
+        finally:
+            con.execute("RESET enable_profiling")
+
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+    finally:
+        os.remove(path)
+
+    return {
+        "elapsed_ms": df.attrs["elapsed_ms"],
+        "latency_ms": raw.get("latency", 0.0) * 1e3,
+        "rows_returned": raw.get("rows_returned"),
+        "plan": [_operator_tree(c) for c in raw.get("children", [])],
+    }
+
+
+def store_profile(record: dict, path: str = PROFILE_STORE):
+    line = json.dumps(record, default=str)
+    with _lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def capture(connect, sql: str, intent: str, filters: dict, observed_ms: float = None,
+            label: str = PROFILE_LABEL, path: str = PROFILE_STORE) -> dict:
+    con = connect()
+    try:
+        profile = profile_query(con, sql)
+    finally:
+        con.close()
+
+    record = {
+        "key": profile_key(intent, filters),
+        "intent": intent,
+        "filters": filters or {},
+        "label": label,
+        "captured_at": time.time(),
+        "observed_ms": observed_ms,
+        "sql": " ".join(sql.split()),
+        **profile,
+    }
+    store_profile(record, path)
+    return record
+
+
+def maybe_capture(connect, sql: str, elapsed_ms: float, intent: str, filters: dict) -> bool:
+    """
+    Called after every execution. Above the threshold, profiles the
+    query on a background thread (one capture per key at a time).
+    """
+    if SLOW_QUERY_MS <= 0 or elapsed_ms < SLOW_QUERY_MS or not intent:
+        return False
+
+    key = profile_key(intent, filters)
+    with _lock:
+        if key in _in_flight:
+            return True
+        _in_flight.add(key)
+
+    def run():
+        try:
+            capture(connect, sql, intent, dict(filters or {}), observed_ms=elapsed_ms)
+        except Exception as e:
+            # Profiling must never affect answers
+            logger.warning("Profiling %s failed: %s", intent, e)
+        finally:
+            with _lock:
+                _in_flight.discard(key)
+
+    threading.Thread(target=run, name="olist-profiler", daemon=True).start()
+    return True
+
+
+# ----------------------------------
+# Reading & comparing
+# ----------------------------------
+def load_profiles(path: str = PROFILE_STORE) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def worst_intents(records: list, top: int = 10) -> list:
+    by_key = defaultdict(list)
+    for r in records:
+        by_key[(r["intent"], json.dumps(r["filters"], sort_keys=True))].append(r)
+
+    rows = []
+    for (intent, filters), rs in by_key.items():
+        times = [r.get("observed_ms") or r["elapsed_ms"] for r in rs]
+        rows.append({
+            "intent": intent,
+            "filters": filters,
+            "captures": len(rs),
+            "worst_ms": max(times),
+            "avg_ms": sum(times) / len(times),
+        })
+    return sorted(rows, key=lambda r: r["worst_ms"], reverse=True)[:top]
+
+
+def flatten_plan(plan: list, depth: int = 0) -> list:
+    rows = []
+    for node in plan:
+        rows.append((depth, node["operator"], node["timing"], node["cardinality"]))
+        rows += flatten_plan(node["children"], depth + 1)
+    return rows
+
+
+def latest(records: list, intent: str, label: str):
+    matches = [r for r in records if r["intent"] == intent and r["label"] == label]
+    return max(matches, key=lambda r: r["captured_at"]) if matches else None
+
+
+def diff_plans(before: dict, after: dict) -> str:
+    a, b = flatten_plan(before["plan"]), flatten_plan(after["plan"])
+    width = 44
+    lines = [
+        f"{'before':<{width}} | after",
+        f"{before['elapsed_ms']:.1f} ms".ljust(width) + f" | {after['elapsed_ms']:.1f} ms",
+        "-" * (width * 2 + 3),
+    ]
+    for i in range(max(len(a), len(b))):
+        cells = []
+        for rows in (a, b):
+            if i < len(rows):
+                depth, op, timing, card = rows[i]
+                cells.append(f"{'  ' * depth}{op} {timing * 1e3:.2f}ms rows={card}")
+            else:
+                cells.append("")
+        marker = " " if i < len(a) and i < len(b) and a[i][1] == b[i][1] else "*"
+        lines.append(f"{cells[0]:<{width}}{marker}| {cells[1]}")
+    return "\n".join(lines)
+
+
+# ----------------------------------
+# CLI
+# ----------------------------------
+def _capture_all(label: str, intent: str = None):
+    from agent.agent_core import _connect
+    from agent.sql_templates import SQL_TEMPLATES
+
+    intents = [intent] if intent else list(SQL_TEMPLATES)
+    for name in intents:
+        record = capture(_connect, SQL_TEMPLATES[name], name, {}, label=label)
+        print(f"📸 {name:<34} {record['elapsed_ms']:>9.1f} ms  [{label}]")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m agent.profiling")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_list = sub.add_parser("list", help="Worst intents by captured latency")
+    p_list.add_argument("--top", type=int, default=10)
+    p_list.add_argument("--label")
+
+    p_cap = sub.add_parser("capture", help="Profile template intents now")
+    p_cap.add_argument("--label", default=PROFILE_LABEL)
+    p_cap.add_argument("--intent")
+
+    p_diff = sub.add_parser("diff", help="Compare plans of one intent across labels")
+    p_diff.add_argument("--intent", required=True)
+    p_diff.add_argument("--before", required=True)
+    p_diff.add_argument("--after", required=True)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "capture":
+        _capture_all(args.label, args.intent)
+        return 0
+
+    records = load_profiles()
+
+    if args.command == "list":
+        if args.label:
+            records = [r for r in records if r["label"] == args.label]
+        print(f"{'intent':<34}{'filters':<28}{'n':>4}{'worst ms':>11}{'avg ms':>10}")
+        for r in worst_intents(records, args.top):
+            print(f"{r['intent']:<34}{r['filters'][:27]:<28}{r['captures']:>4}"
+                  f"{r['worst_ms']:>11.1f}{r['avg_ms']:>10.1f}")
+        return 0
+
+    before = latest(records, args.intent, args.before)
+    after = latest(records, args.intent, args.after)
+    if not before or not after:
+        print(f"No captures of {args.intent} for both labels "
+              f"'{args.before}' and '{args.after}'.")
+        return 1
+    print(diff_plans(before, after))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# agent/prompt_budget.py
+
+"""
+Prompt budgeting for LLM calls.
+
+- estimate_tokens(): fast local token estimate (no tokenizer download)
+- encode_table(): compact CSV-like encoding of a DataFrame
+  (rounded numbers, abbreviated IDs)
+- fit_sections(): assembles a prompt from prioritized sections and
+  trims the least important ones until it fits the token budget
+
+Every fitted prompt comes with a report (tokens, budget, what was
+trimmed or dropped) so callers can log and track prompt size.
+"""
+
+import math
+import re
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+ID_SUFFIXES = ("_id", "_unique_id")
+ID_PREFIX_LEN = 8
+
+
+# ----------------------------------
+# Token estimate
+# ----------------------------------
+def estimate_tokens(text: str) -> int:
+    """
+    BPE-style estimate: punctuation is one token each, words are one
+    token per ~4 characters. Within ~10-15% of real tokenizers on the
+    English/CSV text these prompts contain.
+    """
+    if not text:
+        return 0
+    return sum(
+        max(1, math.ceil(len(piece) / 4)) if piece[0].isalnum() else 1
+        for piece in _PIECES.findall(text)
+    )
+
+
+# ----------------------------------
+# Compact table encoding
+# ----------------------------------
+def _format_number(value) -> str:
+    if value != value:  # NaN
+        return ""
+    if float(value).is_integer():
+        return str(int(value))
+    if abs(value) >= 100:
+        return str(round(value))
+    return f"{value:.2f}"
+
+
+def _format_cell(column: str, value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (int, float)) or hasattr(value, "dtype"):
+        try:
+            return _format_number(float(value))
+        except (TypeError, ValueError):
+            pass
+    text = str(value)
+    if column.endswith(ID_SUFFIXES) and len(text) > ID_PREFIX_LEN:
+        text = text[:ID_PREFIX_LEN] + "…"
+    if "," in text or "\n" in text:
+        text = '"' + text.replace('"', "'").replace("\n", " ") + '"'
+    return text
+
+
+def encode_table(df, max_rows: int = 10) -> str:
+    """Header line + one comma-separated line per row (first max_rows rows)."""
+    columns = [str(c) for c in df.columns]
+    lines = [",".join(columns)]
+    for row in df.head(max_rows).itertuples(index=False):
+        lines.append(",".join(_format_cell(col, v) for col, v in zip(columns, row)))
+    if len(df) > max_rows:
+        lines.append(f"… ({len(df) - max_rows} more rows)")
+    return "\n".join(lines)
+
+
+# ----------------------------------
+# Sections & trimming
+# ----------------------------------
+def section(title: str, body: str, priority: int = 0, min_lines: int = 1) -> dict:
+    """
+    priority 0 is never trimmed; higher numbers are trimmed first.
+    A section that cannot keep min_lines of its body is dropped.
+    """
+    return {"title": title, "body": body or "", "priority": priority, "min_lines": min_lines}
+
+
+def _render(sec: dict) -> str:
+    return f"{sec['title']}\n{sec['body']}" if sec["title"] else sec["body"]
+
+
+def _truncate(sec: dict, max_tokens: int) -> bool:
+    """Keeps leading body lines within max_tokens; False if under min_lines."""
+    lines = sec["body"].splitlines()
+    kept, used = [], estimate_tokens(sec["title"]) + 2
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    if len(kept) < sec["min_lines"]:
+        return False
+    if len(kept) < len(lines):
+        kept.append("…")
+    sec["body"] = "\n".join(kept)
+    return True
+
+
+def fit_sections(sections: list, budget: int):
+    """
+    Joins sections in order, trimming by priority to fit the budget.
+    Returns (prompt, report).
+    """
+    sections = [dict(s) for s in sections if s["body"].strip()]
+    report = {"budget": budget, "trimmed": [], "dropped": []}
+
+    def total():
+        return estimate_tokens("\n\n".join(_render(s) for s in sections))
+
+    report["tokens_before"] = total()
+    for sec in sorted(sections, key=lambda s: s["priority"], reverse=True):
+        overflow = total() - budget
+        if overflow <= 0 or sec["priority"] == 0:
+            break
+        if _truncate(sec, estimate_tokens(_render(sec)) - overflow):
+            report["trimmed"].append(sec["title"])
+        else:
+            sections.remove(sec)
+            report["dropped"].append(sec["title"])
+
+    prompt = "\n\n".join(_render(s) for s in sections)
+    report["prompt_tokens"] = estimate_tokens(prompt)
+    report["over_budget"] = report["prompt_tokens"] > budget
+    return prompt, report
@@ -1,10 +1,131 @@
 # agent/rag.py
 
-from pathlib import Path
+"""
+Retrieval over the markdown knowledge base (knowledge/products.md).
+
+At build time the markdown is split into heading-sized chunks and a
+BM25 index is computed; both are stored in the knowledge artifact.
+At runtime retrieve() scores chunks against the question and returns
+the best ones that fit a token budget, so prompts carry only the
+relevant sections instead of the whole file.
+"""
+
+import math
+import re
+from collections import Counter
+
+from agent.knowledge_artifact import load_artifact
+from agent.prompt_budget import estimate_tokens
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how",
+    "in", "is", "it", "of", "on", "or", "the", "this", "to", "what", "which",
+    "with", "why", "show", "me", "does", "do",
+}
+
+
+def tokenize(text: str) -> list:
+    text = text.lower().replace("_", " ")
+    return [t for t in re.findall(r"[a-z0-9]+", text) if t not in STOPWORDS]
+
+
+# ----------------------------------
+# Build (called by the knowledge artifact compiler)
+# ----------------------------------
+def split_markdown(markdown: str) -> list:
+    """
+    One chunk per ## / ### section. The heading path is kept with the
+    text, so a category chunk still says which section it belongs to.
+    """
+    chunks, path, lines = [], {}, []
+
+    def flush():
+        body = "\n".join(l for l in lines if l.strip() != "---").strip()
+        if body and path:
+            heading = " › ".join(path[level] for level in sorted(path))
+            chunks.append({"heading": heading, "text": f"{heading}\n{body}"})
+        lines.clear()
+
+    for line in markdown.splitlines():
+        m = re.match(r"^(#{2,3})\s+(.*)", line)
+        if m:
+            flush()
+            level = len(m.group(1))
+            path = {lvl: h for lvl, h in path.items() if lvl < level}
+            path[level] = m.group(2).strip()
+        else:
+            lines.append(line)
+    flush()
+    return chunks
+
+
+def build_bm25(chunks: list) -> dict:
+    docs = [Counter(tokenize(c["text"])) for c in chunks]
+    n = len(docs)
+    df = Counter(term for doc in docs for term in doc)
+
+    return {
+        "k1": BM25_K1,
+        "b": BM25_B,
+        "doc_len": [sum(doc.values()) for doc in docs],
+        "avgdl": sum(sum(doc.values()) for doc in docs) / max(n, 1),
+        "terms": {
+            term: [
+                math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5)),
+                [[i, doc[term]] for i, doc in enumerate(docs) if term in doc],
+            ]
+            for term in df
+        },
+    }
+
+
+# ----------------------------------
+# Retrieval
+# ----------------------------------
+def _scores(question: str, index: dict) -> dict:
+    k1, b, avgdl, doc_len = index["k1"], index["b"], index["avgdl"], index["doc_len"]
+    scores = Counter()
+    for term in set(tokenize(question)):
+        if term not in index["terms"]:
+            continue
+        idf, postings = index["terms"][term]
+        for doc, tf in postings:
+            scores[doc] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len[doc] / avgdl))
+    return scores
+
+
+def retrieve(question: str, k: int = 3, token_budget: int = 400) -> list:
+    """
+    Best-matching knowledge chunks for the question, highest score
+    first, at most k of them and together within token_budget.
+    """
+    kb = load_artifact()
+    index = kb.indexes.get("bm25")
+    if not index:
+        return []
+
+    chunks = kb.entries("chunks")
+    results, used = [], 0
+    for doc, score in _scores(question, index).most_common():
+        heading, offset, length = chunks[doc]
+        text = kb.text(offset, length)
+        tokens = estimate_tokens(text)
+        if used + tokens > token_budget:
+            continue
+        results.append({"heading": heading, "text": text, "score": score, "tokens": tokens})
+        used += tokens
+        if len(results) == k:
+            break
+    return results
+
+
+def retrieve_context(question: str, k: int = 3, token_budget: int = 400) -> str:
+    return "\n\n".join(c["text"] for c in retrieve(question, k, token_budget))
 
-KNOWLEDGE_PATH = Path("knowledge/products.md")
 
 def get_context():
-    if KNOWLEDGE_PATH.exists():
-        return KNOWLEDGE_PATH.read_text(encoding="utf-8")
-    return ""
+    """The whole knowledge base (prefer retrieve_context for prompts)."""
+    return load_artifact().get("kb", "products.md", "")
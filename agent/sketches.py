@@ -0,0 +1,319 @@
+# agent/sketches.py
+
+"""
+Mergeable sketches in the aggregate layer.
+
+Distinct counts and percentiles cannot be summed from pre-aggregates,
+so the views behind seller / customer / payment questions re-scan
+f_order_facts for every filtered variant. build_sketch_tables() (a
+db/setup_db.py step) stores per fine-grained cell — year_month ×
+category × customer_state × seller_state × payment_type — sketches that
+merge instead:
+
+- sketch_cells       cell dimensions + exact additive measures (rows,
+                     revenue)
+- sketch_hll         HyperLogLog registers (sparse: cell, metric,
+                     register, rank) for distinct orders and distinct
+                     customers (customer_unique_id). Merge = MAX(rank)
+                     per register; ~1.04 / sqrt(2^p) standard error.
+- sketch_quantiles   log-bucketed quantile sketch (DDSketch: bucket i
+                     covers (γ^(i-1), γ^i]) of payment values and review
+                     scores. Merge = SUM(n) per bucket; every percentile
+                     is within SKETCH_RELATIVE_ACCURACY of the exact one.
+
+Any coarser rollup (by payment type, state, category, month window) is
+the merge of the matching cells, so "median payment by payment type" or
+"unique customers by state" never touch the facts. A payment or review
+whose order spans several cells (items of two categories) is split
+evenly between them, so rollups count it once.
+"""
+
+import math
+from typing import Optional
+
+from agent.config import SKETCH_HLL_PRECISION, SKETCH_RELATIVE_ACCURACY
+from agent.time_windows import month_span
+
+CELL_DIMENSIONS = ["year_month", "category", "customer_state", "seller_state", "payment_type"]
+
+# Bucket of zero / negative values (vouchers) in sketch_quantiles
+ZERO_BUCKET = -1_000_000
+
+# Decimals of the reported percentiles (review scores are 1–5 stars)
+QUANTILE_DIGITS = {"payment_value": 2, "review_score": 1}
+
+# intent → (group column, [(output column, kind, metric, percentile)], ORDER BY)
+#   kind: "hll" estimate, "count" / "quantile" from sketch_quantiles,
+#         "sum" exact from sketch_cells
+SKETCH_INTENTS = {
+    "payment_value_percentiles": ("payment_type", [
+        ("orders", "hll", "orders", None),
+        ("payments", "count", "payment_value", None),
+        ("p25_payment", "quantile", "payment_value", 25),
+        ("median_payment", "quantile", "payment_value", 50),
+        ("p75_payment", "quantile", "payment_value", 75),
+        ("p90_payment", "quantile", "payment_value", 90),
+        ("p99_payment", "quantile", "payment_value", 99),
+    ], "payments DESC"),
+    "review_score_by_category": ("category", [
+        ("orders", "hll", "orders", None),
+        ("reviews", "count", "review_score", None),
+        ("median_review", "quantile", "review_score", 50),
+        ("p10_review", "quantile", "review_score", 10),
+        ("p25_review", "quantile", "review_score", 25),
+    ], "reviews DESC"),
+    "unique_customers_by_state": ("customer_state", [
+        ("customers", "hll", "customers", None),
+        ("orders", "hll", "orders", None),
+        ("revenue", "sum", "revenue", None),
+        ("median_payment", "quantile", "payment_value", 50),
+    ], "customers DESC"),
+    "seller_state_reach": ("seller_state", [
+        ("orders", "hll", "orders", None),
+        ("customers", "hll", "customers", None),
+        ("revenue", "sum", "revenue", None),
+        ("median_review", "quantile", "review_score", 50),
+    ], "orders DESC"),
+}
+
+
+def gamma(relative_accuracy: float) -> float:
+    return (1 + relative_accuracy) / (1 - relative_accuracy)
+
+
+# ----------------------------------
+# Build (called from db/setup_db.py)
+# ----------------------------------
+def build_sketch_tables(con, precision: int = None, relative_accuracy: float = None):
+    """(Re)builds sketch_cells, sketch_hll and sketch_quantiles from f_order_facts."""
+    p = int(precision or SKETCH_HLL_PRECISION)
+    if not 7 <= p <= 16:
+        raise ValueError(f"HyperLogLog precision must be between 7 and 16, got {p}")
+    alpha = float(relative_accuracy or SKETCH_RELATIVE_ACCURACY)
+    g = gamma(alpha)
+
+    dims = ", ".join(CELL_DIMENSIONS)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE _sketch_facts AS
+        SELECT
+            strftime(f.order_purchase_timestamp, '%Y-%m') AS year_month,
+            COALESCE(f.category, 'Unknown') AS category,
+            COALESCE(f.customer_state, 'Unknown') AS customer_state,
+            COALESCE(f.seller_state, 'Unknown') AS seller_state,
+            COALESCE(f.payment_type, 'Unknown') AS payment_type,
+            f.order_id,
+            c.customer_unique_id,
+            f.payment_value,
+            f.review_score
+        FROM f_order_facts f
+        LEFT JOIN customers c ON f.customer_id = c.customer_id
+    """)
+    con.execute(f"""
+        CREATE OR REPLACE TABLE sketch_cells AS
+        SELECT
+            CAST(row_number() OVER (ORDER BY {dims}) AS INTEGER) AS cell_id,
+            *
+        FROM (
+            SELECT {dims}, COUNT(*) AS rows, SUM(payment_value) AS revenue
+            FROM _sketch_facts
+            GROUP BY {dims}
+        )
+        ORDER BY cell_id
+    """)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE _sketch_items AS
+        SELECT c.cell_id, f.order_id, f.customer_unique_id, f.payment_type, f.payment_value, f.review_score
+        FROM _sketch_facts f
+        JOIN sketch_cells c USING ({dims})
+    """)
+
+    # Register = low p bits of the hash; rank = leading zeros + 1 in the
+    # top 40 bits (kept under 2^40 so log2 is exact in a DOUBLE)
+    con.execute(f"""
+        CREATE OR REPLACE TABLE sketch_hll AS
+        SELECT
+            cell_id,
+            metric,
+            CAST(h & {2 ** p - 1} AS SMALLINT) AS reg,
+            CAST(MAX(CASE WHEN h >> 24 = 0 THEN 41 ELSE 40 - floor(log2(h >> 24)) END) AS TINYINT) AS rank,
+            CAST({2 ** p} AS INTEGER) AS registers
+        FROM (
+            SELECT cell_id, 'orders' AS metric, hash(order_id) AS h FROM _sketch_items
+            UNION ALL
+            SELECT cell_id, 'customers', hash(customer_unique_id) FROM _sketch_items
+            WHERE customer_unique_id IS NOT NULL
+        )
+        GROUP BY cell_id, metric, reg
+        ORDER BY cell_id, metric, reg
+    """)
+
+    # One value per payment / review (they repeat on every item row). A
+    # value whose order spans k cells weighs 1/k in each, so every rollup
+    # counts it once in total.
+    con.execute(f"""
+        CREATE OR REPLACE TABLE sketch_quantiles AS
+        SELECT
+            cell_id,
+            metric,
+            bucket,
+            CASE WHEN bucket = {ZERO_BUCKET} THEN 0.0 ELSE 2 * power({g}, bucket) / ({g} + 1) END AS value,
+            SUM(weight) AS n
+        FROM (
+            SELECT
+                cell_id,
+                metric,
+                CASE WHEN value <= 0 THEN {ZERO_BUCKET}
+                     ELSE CAST(ceil(ln(value) / ln({g})) AS INTEGER) END AS bucket,
+                1.0 / COUNT(*) OVER (PARTITION BY metric, item, value) AS weight
+            FROM (
+                SELECT DISTINCT
+                    cell_id, 'payment_value' AS metric, order_id || '/' || payment_type AS item, payment_value AS value
+                FROM _sketch_items WHERE payment_value IS NOT NULL
+                UNION ALL
+                SELECT DISTINCT cell_id, 'review_score', order_id, review_score
+                FROM _sketch_items WHERE review_score IS NOT NULL
+            )
+        )
+        GROUP BY cell_id, metric, bucket
+        ORDER BY cell_id, metric, bucket
+    """)
+
+
+# ----------------------------------
+# SQL: merge matching cells → estimates
+# ----------------------------------
+def sketch_sql(intent: str, filters: dict) -> Optional[str]:
+    """
+    Rollup SQL merging the sketches of the cells that match the filters
+    (category, whole months of the window), or None for intents it does
+    not serve.
+    """
+    if intent not in SKETCH_INTENTS:
+        return None
+
+    filters = filters or {}
+    group, columns, order_by = SKETCH_INTENTS[intent]
+
+    conditions = []
+    if "category" in filters:
+        conditions.append("category = '{}'".format(str(filters["category"]).replace("'", "''")))
+    if "window" in filters:
+        # Cells are monthly: the window covers every month it touches
+        first, last = month_span(filters["window"])
+        conditions.append(f"year_month >= '{first}'")
+        conditions.append(f"year_month <= '{last}'")
+    where = f"\n            WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    hll_metrics = sorted({metric for _, kind, metric, _ in columns if kind == "hll"})
+    quantile_metrics = sorted({metric for _, kind, metric, _ in columns if kind in ("count", "quantile")})
+
+    ctes = [f"""cells AS (
+            SELECT cell_id, {group}, revenue
+            FROM sketch_cells{where}
+        )"""]
+    joins = []
+    if hll_metrics:
+        metric_list = ", ".join(f"'{metric}'" for metric in hll_metrics)
+        ctes.append(f"""registers AS (
+            SELECT c.{group}, h.metric, h.reg, MAX(h.rank) AS rank, MAX(h.registers) AS m
+            FROM sketch_hll h
+            JOIN cells c ON h.cell_id = c.cell_id
+            WHERE h.metric IN ({metric_list})
+            GROUP BY c.{group}, h.metric, h.reg
+        )""")
+        pivots = ",\n                ".join(
+            f"MAX(estimate) FILTER (WHERE metric = '{metric}') AS hll_{metric}" for metric in hll_metrics
+        )
+        # Harmonic-mean estimate; linear counting while it is small and
+        # some registers are still empty
+        ctes.append(f"""hll AS (
+            SELECT
+                {group},
+                {pivots}
+            FROM (
+                SELECT
+                    {group},
+                    metric,
+                    CASE WHEN filled < m AND raw <= 2.5 * m THEN m * ln(m / (m - filled)) ELSE raw END AS estimate
+                FROM (
+                    SELECT {group}, metric, m, filled, 0.7213 / (1 + 1.079 / m) * m * m / ((m - filled) + z) AS raw
+                    FROM (
+                        SELECT {group}, metric, MAX(m) AS m, COUNT(*) AS filled, SUM(power(2, -rank)) AS z
+                        FROM registers
+                        GROUP BY {group}, metric
+                    )
+                )
+            )
+            GROUP BY {group}
+        )""")
+        joins.append(f"LEFT JOIN hll USING ({group})")
+    if quantile_metrics:
+        metric_list = ", ".join(f"'{metric}'" for metric in quantile_metrics)
+        ctes.append(f"""buckets AS (
+            SELECT c.{group}, q.metric, q.bucket, MAX(q.value) AS value, SUM(q.n) AS n
+            FROM sketch_quantiles q
+            JOIN cells c ON q.cell_id = c.cell_id
+            WHERE q.metric IN ({metric_list})
+            GROUP BY c.{group}, q.metric, q.bucket
+        )""")
+        ctes.append(f"""ranked AS (
+            SELECT
+                {group}, metric, bucket, value,
+                SUM(n) OVER (PARTITION BY {group}, metric ORDER BY bucket) AS cum,
+                SUM(n) OVER (PARTITION BY {group}, metric) AS total
+            FROM buckets
+        )""")
+        pivots = []
+        for name, kind, metric, percentile in columns:
+            if kind == "count":
+                pivots.append(f"CAST(ROUND(MAX(total) FILTER (WHERE metric = '{metric}')) AS BIGINT) AS {name}")
+            elif kind == "quantile":
+                rank = f"{percentile / 100} * (total - 1)"
+                pivots.append(
+                    f"ROUND(arg_min(value, bucket) FILTER (WHERE metric = '{metric}' AND cum > {rank}), "
+                    f"{QUANTILE_DIGITS[metric]}) AS {name}"
+                )
+        pivots = ",\n                ".join(pivots)
+        ctes.append(f"""quantiles AS (
+            SELECT
+                {group},
+                {pivots}
+            FROM ranked
+            GROUP BY {group}
+        )""")
+        joins.append(f"LEFT JOIN quantiles USING ({group})")
+
+    select = []
+    for name, kind, metric, _ in columns:
+        if kind == "hll":
+            select.append(f"CAST(ROUND(hll.hll_{metric}) AS BIGINT) AS {name}")
+        elif kind == "sum":
+            select.append(f"ROUND(g.{metric}, 2) AS {name}")
+        else:
+            select.append(f"quantiles.{name}")
+    select = ",\n            ".join(select)
+    join_sql = "\n        ".join(joins)
+    with_sql = ",\n        ".join(ctes)
+
+    if "order" in filters:
+        column = order_by.split()[0]
+        order_by = f"{column} {filters['order'].upper()}"
+    limit = f"\n        LIMIT {int(filters['limit'])}" if "limit" in filters else ""
+
+    return f"""
+        WITH {with_sql}
+        SELECT
+            {group},
+            {select}
+        FROM (
+            SELECT {group}, SUM(revenue) AS revenue FROM cells GROUP BY {group}
+        ) g
+        {join_sql}
+        ORDER BY {order_by}{limit}
+    """
+
+
+def describe_accuracy(precision: int = None, relative_accuracy: float = None) -> str:
+    p = int(precision or SKETCH_HLL_PRECISION)
+    alpha = float(relative_accuracy or SKETCH_RELATIVE_ACCURACY)
+    return f"≈ distinct counts ±{1.04 / math.sqrt(2 ** p):.1%}, percentiles ±{alpha:.0%}"
@@ -0,0 +1,224 @@
+# agent/snapshots.py
+
+"""
+Versioned, immutable database snapshots.
+
+db/setup_db.py never rebuilds the live file in place. It builds a new
+database next to it and publishes it:
+
+    db/olist.snapshots/
+        20261019T101500-4242.db     ← previous, still open in a worker
+        20261019T113000-5150.db     ← current
+        CURRENT                     ← "20261019T113000-5150.db"
+
+publish() swaps CURRENT atomically (write + os.replace), so readers
+see either the old or the new snapshot, never a half-built one.
+Readers resolve the logical DB path with active_path() before each
+query. A cheap stat notices a new CURRENT; in-flight queries finish on
+the file they opened. Every worker opens the same read-only file and
+shares the OS page cache.
+
+Each process holds a shared lock on the snapshot it is reading. gc()
+deletes snapshots that are neither current, among the newest
+SNAPSHOT_KEEP, nor locked by any process. Without fcntl (Windows) only
+the age rule applies.
+
+Without a snapshot directory, active_path() returns the path itself,
+so a database built in place keeps working.
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from agent.config import DB_PATH, SNAPSHOT_KEEP
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+POINTER = "CURRENT"
+SUFFIX = ".db"
+
+
+# ----------------------------------
+# Layout
+# ----------------------------------
+def snapshot_dir(db_path: str = DB_PATH) -> str:
+    """db/olist.db → db/olist.snapshots"""
+    root, _ = os.path.splitext(os.path.abspath(db_path))
+    return root + ".snapshots"
+
+
+def list_snapshots(db_path: str = DB_PATH) -> list:
+    """Published snapshot file names, oldest first."""
+    directory = snapshot_dir(db_path)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(f for f in os.listdir(directory) if f.endswith(SUFFIX))
+
+
+def current_snapshot(db_path: str = DB_PATH):
+    try:
+        with open(os.path.join(snapshot_dir(db_path), POINTER), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# ----------------------------------
+# Writer side
+# ----------------------------------
+def new_build_path(db_path: str = DB_PATH) -> str:
+    """Where setup_db builds the next snapshot (not visible until published)."""
+    directory = snapshot_dir(db_path)
+    os.makedirs(directory, exist_ok=True)
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+    return os.path.join(directory, version + SUFFIX + ".building")
+
+
+def _write_pointer(directory: str, name: str):
+    tmp = os.path.join(directory, f".{POINTER}.{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(directory, POINTER))
+
+
+def publish(build_path: str, db_path: str = DB_PATH) -> str:
+    """Makes a finished build the current snapshot; returns its path."""
+    final = build_path[: -len(".building")] if build_path.endswith(".building") else build_path
+    os.replace(build_path, final)
+    _write_pointer(snapshot_dir(db_path), os.path.basename(final))
+    gc(db_path)
+    return final
+
+
+def rollback(name: str, db_path: str = DB_PATH) -> str:
+    """Points CURRENT back at an older, still existing snapshot."""
+    if name not in list_snapshots(db_path):
+        raise ValueError(f"Unknown snapshot: {name}")
+    _write_pointer(snapshot_dir(db_path), name)
+    return os.path.join(snapshot_dir(db_path), name)
+
+
+def _in_use(path: str) -> bool:
+    """True if any process holds a reader lock on this snapshot."""
+    if fcntl is None:
+        return False
+    try:
+        fd = os.open(path + ".lock", os.O_RDWR)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return False
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+
+
+def gc(db_path: str = DB_PATH, keep: int = SNAPSHOT_KEEP) -> list:
+    """Deletes unused snapshots beyond the newest `keep`; returns their names."""
+    directory = snapshot_dir(db_path)
+    current = current_snapshot(db_path)
+    candidates = [s for s in list_snapshots(db_path) if s != current][: -keep or None]
+
+    removed = []
+    for name in candidates:
+        path = os.path.join(directory, name)
+        if _in_use(path):
+            continue
+        for leftover in (path, path + ".wal", path + ".lock"):
+            try:
+                os.remove(leftover)
+            except FileNotFoundError:
+                pass
+        removed.append(name)
+    return removed
+
+
+# ----------------------------------
+# Reader side
+# ----------------------------------
+_resolved = {}  # logical path → (pointer version, snapshot path, lock fd)
+_lock = threading.Lock()
+
+
+def _reader_lock(path: str):
+    if fcntl is None:
+        return None
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_SH)
+    return fd
+
+
+def active_path(db_path: str = DB_PATH) -> str:
+    """
+    The file to open for this logical DB path: the current snapshot if
+    any were published, else the path itself. One stat per call.
+    """
+    pointer = os.path.join(snapshot_dir(db_path), POINTER)
+    try:
+        st = os.stat(pointer)
+    except FileNotFoundError:
+        return db_path
+    # os.replace gives every published pointer a new inode
+    version = (st.st_ino, st.st_mtime_ns)
+
+    cached = _resolved.get(db_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _lock:
+        cached = _resolved.get(db_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        name = current_snapshot(db_path)
+        if name is None:
+            return db_path
+        path = os.path.join(snapshot_dir(db_path), name)
+        fd = _reader_lock(path)
+        if cached is not None and cached[2] is not None:
+            # Queries already running keep their open file; gc() only
+            # needs to know this process has moved on
+            os.close(cached[2])
+        _resolved[db_path] = (version, path, fd)
+        return path
+
+
+# ----------------------------------
+# CLI
+# ----------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m agent.snapshots")
+    parser.add_argument("--db", default=DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Published snapshots")
+    p_gc = sub.add_parser("gc", help="Delete unused old snapshots")
+    p_gc.add_argument("--keep", type=int, default=SNAPSHOT_KEEP)
+    p_rb = sub.add_parser("rollback", help="Point CURRENT at an older snapshot")
+    p_rb.add_argument("name")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        current = current_snapshot(args.db)
+        for name in list_snapshots(args.db):
+            path = os.path.join(snapshot_dir(args.db), name)
+            size_mb = os.path.getsize(path) / 1e6
+            flags = ", ".join(f for f, on in (("current", name == current), ("in use", _in_use(path))) if on)
+            print(f"{'👉' if name == current else '  '} {name:<28}{size_mb:>9,.1f} MB  {flags}")
+    elif args.command == "gc":
+        removed = gc(args.db, args.keep)
+        print(f"🧹 removed {len(removed)} snapshot(s): {', '.join(removed) or '-'}")
+    elif args.command == "rollback":
+        print(f"⏪ CURRENT → {rollback(args.name, args.db)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,266 @@
+# agent/sql_guardrails.py
+
+"""
+SQL guardrails.
+
+Queries are parsed by DuckDB itself (json_serialize_sql), not matched
+with regexes, so the checks see what DuckDB will execute:
+
+- exactly one statement, and it is a SELECT (anything else fails
+  to serialize)
+- every relation is a plain, unquoted identifier naming an analytics
+  view/table on the allowlist (CTE names excepted); no table functions
+  (read_csv, read_parquet, ...), no quoted file paths (replacement
+  scans), no other catalogs or schemas
+- every function is on the allowlist
+- the estimated result size stays under SQL_MAX_RESULT_ROWS
+
+Verdicts are cached by the exact SQL text: a literal can name a
+relation ("FROM 'file.csv'"), so queries that differ only in literals
+do not necessarily share a verdict.
+"""
+
+import json
 import re
+import threading
+
+from agent.config import SQL_MAX_RESULT_ROWS
+
+# ----------------------------------
+# Allowlists
+# ----------------------------------
+ALLOWED_RELATIONS = {
+    "f_order_facts",
+    "dim_date",
+    "orders",
+    "order_items",
+    "payments",
+    "products",
+    "category_translation",
+}
+
+# Analytics views, ranked top-K tables, approximate-mode samples, geo,
+# logistics and cohort aggregates, mergeable sketches
+ALLOWED_RELATION_PREFIXES = ("v_", "topk_", "s_", "geo_", "logistics_", "cohort_", "sketch_")
+
+ALLOWED_SCHEMAS = {"", "main"}
+
+ALLOWED_FUNCTIONS = {
+    # aggregates
+    "sum", "count", "count_star", "avg", "mean", "min", "max", "median",
+    "quantile", "quantile_cont", "quantile_disc", "approx_count_distinct",
+    "approx_quantile", "var_samp", "var_pop", "stddev", "stddev_samp",
+    "stddev_pop", "first", "last", "any_value", "arg_max", "arg_min",
+    "string_agg", "list", "bool_and", "bool_or",
+    # window
+    "row_number", "rank", "dense_rank", "percent_rank", "cume_dist",
+    "ntile", "lag", "lead",
+    # math
+    "abs", "round", "floor", "ceil", "ceiling", "sqrt", "power", "pow",
+    "ln", "log", "log10", "exp", "greatest", "least", "sign",
+    "sin", "cos", "asin", "radians", "degrees",
+    # dates
+    "extract", "date_part", "date_trunc", "date_diff", "datediff",
+    "strftime", "strptime", "year", "month", "day", "quarter", "week",
+    "dayofweek", "to_days", "to_months", "make_date", "current_date",
+    # strings
+    "lower", "upper", "trim", "replace", "concat", "length", "substring",
+    "substr", "left", "right", "starts_with", "contains", "regexp_matches",
+    "like_escape",
+    # casts and null handling
+    "coalesce", "nullif", "ifnull", "cast", "try_cast",
+}
+
+
+class UnsafeSQLError(ValueError):
+    """A query rejected by the guardrails."""
+
+
+# ----------------------------------
+# Parsing
+# ----------------------------------
+_parser = None
+_parser_lock = threading.Lock()
+
+# Relation names DuckDB resolves to tables (anything else is a file path
+# or other replacement scan)
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def _serialize(sql: str) -> dict:
+    global _parser
+    # duckdb is imported on first validation, not when the agent is imported
+    import duckdb
+
+    with _parser_lock:
+        if _parser is None:
+            _parser = duckdb.connect()
+        return json.loads(
+            _parser.execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0]
+        )
+
+
+def _collect(node, facts: dict, ctes: frozenset = frozenset()):
+    """
+    Walks the serialized tree, recording base relations (with their
+    offset in the query text), table functions and functions. A CTE name only shadows a relation after its own
+    definition, so "WITH customers AS (SELECT * FROM customers)" still
+    records the base table.
+    """
+    if isinstance(node, list):
+        for child in node:
+            _collect(child, facts, ctes)
+        return
+    if not isinstance(node, dict):
+        return
+
+    cte_map = node.get("cte_map")
+    if cte_map:
+        for entry in cte_map.get("map", []):
+            _collect(entry["value"], facts, ctes)
+            ctes = ctes | {entry["key"].lower()}
+
+    kind = node.get("type")
+    if kind == "BASE_TABLE":
+        catalog, schema, name = (
+            node.get("catalog_name", ""), node.get("schema_name", ""), node["table_name"].lower()
+        )
+        if catalog or schema or name not in ctes:
+            facts["relations"].add((catalog, schema, name, node.get("query_location")))
+    elif kind == "TABLE_FUNCTION":
+        facts["table_functions"].add(node["function"]["function_name"].lower())
+    elif node.get("class") == "FUNCTION" and not node.get("is_operator"):
+        facts["functions"].add(node["function_name"].lower())
+
+    for key, value in node.items():
+        if key != "cte_map" and isinstance(value, (dict, list)):
+            _collect(value, facts, ctes)
+
 
-def validate_sql(sql: str):
-    cleaned = sql.strip().lower()
+def _relation_allowed(name: str) -> bool:
+    return name in ALLOWED_RELATIONS or name.startswith(ALLOWED_RELATION_PREFIXES)
 
-    if not cleaned.startswith("select"):
-        raise ValueError("Only SELECT queries allowed")
 
-    if ";" in cleaned:
-        raise ValueError("Multiple SQL statements not allowed")
+def _quoted(sql: str, location) -> bool:
+    return isinstance(location, int) and location < len(sql) and sql[location] in "'\""
 
-    forbidden = r"\b(drop|delete|update|insert|alter|truncate)\b"
-    if re.search(forbidden, cleaned):
-        raise ValueError("Unsafe SQL detected")
 
+def _check(sql: str) -> frozenset:
+    """Returns the relations read; raises UnsafeSQLError."""
+    tree = _serialize(sql)
+    if tree.get("error"):
+        if "Only SELECT" in tree.get("error_message", ""):
+            raise UnsafeSQLError("Only SELECT queries allowed")
+        raise UnsafeSQLError(f"Unparseable SQL: {tree.get('error_message', '')}")
+
+    if len(tree["statements"]) != 1:
+        raise UnsafeSQLError("Multiple SQL statements not allowed")
+
+    facts = {"relations": set(), "table_functions": set(), "functions": set()}
+    _collect(tree["statements"][0]["node"], facts)
+
+    if facts["table_functions"]:
+        raise UnsafeSQLError(f"Table functions not allowed: {sorted(facts['table_functions'])}")
+
+    relations = set()
+    for catalog, schema, name, location in facts["relations"]:
+        if _quoted(sql, location) or not _IDENTIFIER.match(name):
+            raise UnsafeSQLError(f"Relation not allowed: {name!r} (quoted names and file paths are not relations)")
+        if catalog or schema.lower() not in ALLOWED_SCHEMAS or not _relation_allowed(name):
+            raise UnsafeSQLError(f"Relation not allowed: {'.'.join(p for p in (catalog, schema, name) if p)}")
+        relations.add(name)
+
+    blocked = facts["functions"] - ALLOWED_FUNCTIONS
+    if blocked:
+        raise UnsafeSQLError(f"Functions not allowed: {sorted(blocked)}")
+
+    return frozenset(relations)
+
+
+_verdicts = {}
+_verdicts_lock = threading.Lock()
+VERDICTS_KEPT = 1024
+
+
+def relations_used(sql: str) -> frozenset:
+    """
+    Relations the query reads, or UnsafeSQLError. Verdicts (rejections
+    included) are cached by query text.
+    """
+    verdict = _verdicts.get(sql)
+    if verdict is None:
+        try:
+            verdict = _check(sql)
+        except UnsafeSQLError as e:
+            verdict = e
+        with _verdicts_lock:
+            if len(_verdicts) >= VERDICTS_KEPT:
+                _verdicts.clear()
+            _verdicts[sql] = verdict
+
+    if isinstance(verdict, UnsafeSQLError):
+        raise UnsafeSQLError(str(verdict))
+    return verdict
+
+
+def validate_sql(sql: str) -> bool:
+    """
+    Raises UnsafeSQLError (a ValueError) unless the query is a single
+    SELECT over allowed relations and functions.
+    """
+    relations_used(sql)
     return True
+
+
+# ----------------------------------
+# Result size
+# ----------------------------------
+def _estimated_rows(plan: list):
+    """Cardinality estimate of the plan root (first node that has one)."""
+    nodes = list(plan)
+    while nodes:
+        node = nodes.pop(0)
+        estimate = node.get("extra_info", {}).get("Estimated Cardinality")
+        if estimate is not None:
+            return int(str(estimate).lstrip("~"))
+        nodes.extend(node.get("children", []))
+    return None
+
+
+_LIMIT = re.compile(r"\blimit\s+(\d+)\s*$", re.IGNORECASE)
+
+_estimates = {}
+_estimates_lock = threading.Lock()
+ESTIMATES_KEPT = 1024
+
+
+def estimate_rows(con, sql: str) -> int:
+    """Result rows: a trailing LIMIT, else the planner's root estimate."""
+    m = _LIMIT.search(sql.strip())
+    limit = int(m.group(1)) if m else None
+
+    plan = json.loads(con.execute("EXPLAIN (FORMAT JSON) " + sql).fetchall()[0][1])
+    rows = _estimated_rows(plan)
+    if rows is None:
+        return limit or 0
+    return min(rows, limit) if limit is not None else rows
+
+
+def check_result_size(con, sql: str, db_key: str = "", max_rows: int = None) -> int:
+    """
+    Raises UnsafeSQLError if the estimated result exceeds max_rows
+    (default SQL_MAX_RESULT_ROWS). Estimates are cached per database
+    and query text.
+    """
+    max_rows = max_rows or SQL_MAX_RESULT_ROWS
+    key = (db_key, sql)
+    rows = _estimates.get(key)
+    if rows is None:
+        rows = estimate_rows(con, sql)
+        with _estimates_lock:
+            if len(_estimates) >= ESTIMATES_KEPT:
+                _estimates.clear()
+            _estimates[key] = rows
+    if rows > max_rows:
+        raise UnsafeSQLError(f"Result too large: ~{rows:,} rows (limit {max_rows:,})")
+    return rows
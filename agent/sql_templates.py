@@ -8,6 +8,9 @@ SQL TEMPLATES FOR OLIST ANALYTICS AGENT
 ✔ Works with rule + LLM intent detection
 """
 
+from agent.logistics import LEAD_TIME_INTENTS, lead_time_sql
+from agent.sketches import SKETCH_INTENTS, sketch_sql
+
 SQL_TEMPLATES = {
 
     # ==================================================
@@ -183,5 +186,181 @@ SQL_TEMPLATES = {
             average_order_value
     FROM v_category_aov
     ORDER BY average_order_value DESC
+    """,
+
+    # ==================================================
+    # 🗺️ GEO ANALYTICS (precomputed, see agent/geo.py)
+    # ==================================================
+
+    "revenue_by_region": """
+        SELECT region, SUM(revenue) AS revenue, CAST(SUM(orders) AS BIGINT) AS orders
+        FROM geo_region_revenue
+        GROUP BY region
+        ORDER BY revenue DESC
+    """,
+
+    "revenue_by_state": """
+        SELECT state, region, revenue, orders
+        FROM geo_region_revenue
+        ORDER BY revenue DESC
+    """,
+
+    # Narrowed to a radius by agent.geo.apply_radius
+    "revenue_within_radius": """
+        SELECT city, state, SUM(revenue) AS revenue, CAST(SUM(orders) AS BIGINT) AS orders
+        FROM geo_zip_revenue
+        GROUP BY city, state
+        ORDER BY revenue DESC
+    """,
+
+    "delivery_time_by_distance": """
+        SELECT
+            distance_band,
+            avg_delivery_days,
+            median_delivery_days,
+            shipments,
+            avg_distance_km,
+            late_rate
+        FROM geo_distance_delivery
+        ORDER BY band
+    """,
+
+    # ==================================================
+    # 🚚 LOGISTICS (precomputed, see agent/logistics.py)
+    # ==================================================
+
+    "delivery_time_by_seller_state": """
+        SELECT
+            seller_state,
+            avg_delivery_days,
+            p50_delivery_days,
+            p90_delivery_days,
+            orders,
+            late_rate,
+            avg_handling_days
+        FROM logistics_by_seller_state
+        ORDER BY avg_delivery_days DESC
+    """,
+
+    "delivery_time_by_customer_state": """
+        SELECT
+            customer_state,
+            avg_delivery_days,
+            p50_delivery_days,
+            p90_delivery_days,
+            orders,
+            late_rate,
+            avg_transit_days
+        FROM logistics_by_customer_state
+        ORDER BY avg_delivery_days DESC
+    """,
+
+    "delivery_time_by_category": """
+        SELECT
+            category,
+            avg_delivery_days,
+            p50_delivery_days,
+            p90_delivery_days,
+            orders,
+            late_rate
+        FROM logistics_by_category
+        ORDER BY avg_delivery_days DESC
+    """,
+
+    "monthly_delivery_time": """
+        SELECT
+            year_month,
+            avg_delivery_days,
+            p50_delivery_days,
+            p90_delivery_days,
+            orders,
+            late_rate
+        FROM logistics_by_month
+        ORDER BY year_month
+    """,
+
+    # ==================================================
+    # 👥 COHORTS & RETENTION (customer_unique_id)
+    # agent.cohorts.CohortEngine answers these from the
+    # cohort matrices; the SQL is the reference / fallback
+    # ==================================================
+
+    # Share of each first-purchase cohort active N months later
+    "cohort_retention": """
+        SELECT
+            cohort_month,
+            MAX(cohort_customers) AS customers,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 1) / MAX(cohort_customers), 4) AS m1,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 2) / MAX(cohort_customers), 4) AS m2,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 3) / MAX(cohort_customers), 4) AS m3,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 4) / MAX(cohort_customers), 4) AS m4,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 5) / MAX(cohort_customers), 4) AS m5,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 6) / MAX(cohort_customers), 4) AS m6,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 7) / MAX(cohort_customers), 4) AS m7,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 8) / MAX(cohort_customers), 4) AS m8,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 9) / MAX(cohort_customers), 4) AS m9,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 10) / MAX(cohort_customers), 4) AS m10,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 11) / MAX(cohort_customers), 4) AS m11,
+            ROUND(MAX(active_customers) FILTER (WHERE month_offset = 12) / MAX(cohort_customers), 4) AS m12
+        FROM cohort_activity
+        GROUP BY cohort_month
+        ORDER BY cohort_month
+    """,
+
+    # Retention by months since first purchase, over every cohort
+    # observable that long
+    "retention_curve": """
+        SELECT
+            month_offset,
+            ROUND(SUM(active_customers) / SUM(cohort_customers), 4) AS retention_rate,
+            CAST(SUM(cohort_customers) AS BIGINT) AS customers_observed
+        FROM cohort_activity
+        WHERE month_offset > 0
+        GROUP BY month_offset
+        ORDER BY month_offset
+    """,
+
+    "repeat_purchase_rate": """
+        SELECT
+            first_month AS cohort_month,
+            COUNT(*) AS customers,
+            COUNT(*) FILTER (WHERE orders >= 2) AS repeat_customers,
+            ROUND(COUNT(*) FILTER (WHERE orders >= 2) / COUNT(*), 4) AS repeat_rate
+        FROM cohort_customers
+        GROUP BY first_month
+        ORDER BY first_month
+    """,
+
+    # Revenue per cohort customer after 3 / 6 / 12 months (NULL until
+    # the cohort has been observed that long) and to date
+    "cohort_ltv": """
+        SELECT
+            cohort_month,
+            MAX(cohort_customers) AS customers,
+            CASE WHEN MAX(month_offset) >= 2
+                THEN ROUND(SUM(revenue) FILTER (WHERE month_offset < 3) / MAX(cohort_customers), 2)
+            END AS ltv_3m,
+            CASE WHEN MAX(month_offset) >= 5
+                THEN ROUND(SUM(revenue) FILTER (WHERE month_offset < 6) / MAX(cohort_customers), 2)
+            END AS ltv_6m,
+            CASE WHEN MAX(month_offset) >= 11
+                THEN ROUND(SUM(revenue) FILTER (WHERE month_offset < 12) / MAX(cohort_customers), 2)
+            END AS ltv_12m,
+            ROUND(SUM(revenue) / MAX(cohort_customers), 2) AS ltv_to_date
+        FROM cohort_activity
+        GROUP BY cohort_month
+        ORDER BY cohort_month
     """
 }
+
+# Histogram-merge intents: agent.logistics.lead_time_sql() owns the SQL
+# (state / category / month filters, other metrics or percentiles); the
+# template is its unfiltered query
+for _intent in LEAD_TIME_INTENTS:
+    SQL_TEMPLATES[_intent] = lead_time_sql(_intent, {})
+
+# Sketch rollups: agent.sketches.sketch_sql() merges the HyperLogLog /
+# quantile sketches of the matching cells; the template is the rollup
+# over every cell
+for _intent in SKETCH_INTENTS:
+    SQL_TEMPLATES[_intent] = sketch_sql(_intent, {})
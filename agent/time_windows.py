@@ -0,0 +1,286 @@
+# agent/time_windows.py
+
+"""
+Time-window support for analytics questions.
+
+- Parses relative windows ("last 6 months", "Q3 2017", "YTD", "in 2017")
+- Resolves them against the DATASET's max date (Olist ends in 2018),
+  not wall-clock time
+- Rewrites a template's analytics view into an aggregate over the
+  date-sorted fact table (f_order_facts), so DuckDB's zone maps prune
+  every row group outside the window
+"""
+
+import re
+import threading
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+UNITS = {
+    "day": "days",
+    "days": "days",
+    "week": "weeks",
+    "weeks": "weeks",
+    "month": "months",
+    "months": "months",
+    "year": "years",
+    "years": "years",
+    "quarter": "quarters",
+    "quarters": "quarters",
+}
+
+# ----------------------------------
+# Parsing
+# ----------------------------------
+def parse_time_window(question: str) -> Optional[tuple]:
+    """
+    Returns a window spec, or None:
+    - ("last", n, unit)
+    - ("quarter", year, q)
+    - ("year", year)
+    - ("ytd",)
+    """
+    q = question.lower()
+
+    m = re.search(r"\b(?:last|past|previous)\s+(\d+)?\s*(day|week|month|quarter|year)s?\b", q)
+    if m:
+        n = int(m.group(1)) if m.group(1) else 1
+        return ("last", n, UNITS[m.group(2)])
+
+    m = re.search(r"\bq([1-4])\s*(?:of\s+)?(20\d{2})\b", q)
+    if m:
+        return ("quarter", int(m.group(2)), int(m.group(1)))
+
+    m = re.search(r"\b(20\d{2})\s*q([1-4])\b", q)
+    if m:
+        return ("quarter", int(m.group(1)), int(m.group(2)))
+
+    if re.search(r"\b(ytd|year to date)\b", q):
+        return ("ytd",)
+
+    m = re.search(r"\b(?:in|for|during)\s+(20\d{2})\b", q)
+    if m:
+        return ("year", int(m.group(1)))
+
+    return None
+
+
+# ----------------------------------
+# Resolution (anchored to the dataset)
+# ----------------------------------
+def resolve_window(spec: tuple, anchor: date) -> Tuple[str, str]:
+    """
+    Turns a window spec into a half-open [start, end) date range
+    (ISO strings) relative to the dataset's last order date.
+    """
+    from dateutil.relativedelta import relativedelta
+
+    kind = spec[0]
+    end = anchor + timedelta(days=1)
+
+    if kind == "last":
+        n, unit = spec[1], spec[2]
+        if unit == "quarters":
+            n, unit = n * 3, "months"
+        start = end - relativedelta(**{unit: n})
+
+    elif kind == "ytd":
+        start = date(anchor.year, 1, 1)
+
+    elif kind == "quarter":
+        year, quarter = spec[1], spec[2]
+        start = date(year, 3 * quarter - 2, 1)
+        end = start + relativedelta(months=3)
+
+    elif kind == "year":
+        start = date(spec[1], 1, 1)
+        end = date(spec[1] + 1, 1, 1)
+
+    else:
+        raise ValueError(f"Unknown time window: {spec}")
+
+    return start.isoformat(), end.isoformat()
+
+
+def month_span(window: Tuple[str, str]) -> Tuple[str, str]:
+    """
+    First and last month ('YYYY-MM', inclusive) touched by a [start, end)
+    window, for month-grain aggregates: the window is widened to whole
+    months rather than cut to them.
+    """
+    start, end = window
+    last = date.fromisoformat(end) - timedelta(days=1)
+    return start[:7], last.isoformat()[:7]
+
+
+def describe_month_span(window: Tuple[str, str]) -> str:
+    first, last = month_span(window)
+    return f"whole months {first} → {last}" if first != last else f"whole month {first}"
+
+
+_anchors = {}
+_lock = threading.Lock()
+
+
+def dataset_max_date(db_path: str) -> date:
+    """Last order date in the dataset (cached per DB)."""
+    if db_path not in _anchors:
+        with _lock:
+            if db_path not in _anchors:
+                from agent.db import connect
+
+                con = connect(db_path)
+                try:
+                    _anchors[db_path] = con.execute(
+                        "SELECT MAX(date) FROM dim_date"
+                    ).fetchone()[0]
+                finally:
+                    con.close()
+    return _anchors[db_path]
+
+
+# ----------------------------------
+# SQL rewrite: view → windowed aggregate over f_order_facts
+# Each body reproduces the view's columns; {where} is the window predicate.
+# ----------------------------------
+WINDOWED_VIEWS = {
+    "v_category_revenue": """
+        SELECT category, SUM(payment_value) AS revenue
+        FROM f_order_facts {where}
+        GROUP BY category
+    """,
+    "v_category_year_revenue": """
+        SELECT
+            EXTRACT(YEAR FROM order_purchase_timestamp) AS year,
+            category,
+            SUM(payment_value) AS revenue
+        FROM f_order_facts {where}
+        GROUP BY year, category
+    """,
+    "v_monthly_revenue": """
+        SELECT
+            strftime('%Y-%m', order_purchase_timestamp) AS year_month,
+            SUM(payment_value) AS revenue
+        FROM f_order_facts {where}
+        GROUP BY year_month
+    """,
+    "v_yearly_revenue": """
+        SELECT
+            EXTRACT(YEAR FROM order_purchase_timestamp) AS year,
+            SUM(payment_value) AS revenue
+        FROM f_order_facts {where}
+        GROUP BY year
+    """,
+    "v_category_units_sold": """
+        SELECT category, COUNT(*) AS units_sold
+        FROM f_order_facts {where}
+        GROUP BY category
+    """,
+    "v_product_performance": """
+        SELECT
+            product_id,
+            category,
+            COUNT(*) AS units_sold,
+            SUM(payment_value) AS revenue,
+            AVG(review_score) AS avg_rating
+        FROM f_order_facts {where}
+        GROUP BY product_id, category
+    """,
+    "v_customer_ltv": """
+        SELECT
+            customer_id,
+            customer_state,
+            SUM(payment_value) AS lifetime_value,
+            COUNT(DISTINCT order_id) AS total_orders
+        FROM f_order_facts {where}
+        GROUP BY customer_id, customer_state
+    """,
+    "v_seller_performance": """
+        SELECT
+            seller_id,
+            seller_state,
+            SUM(payment_value) AS revenue,
+            COUNT(DISTINCT order_id) AS orders,
+            AVG(review_score) AS avg_rating
+        FROM f_order_facts {where}
+        GROUP BY seller_id, seller_state
+    """,
+    "v_order_value_metrics": """
+        SELECT
+            COUNT(DISTINCT order_id) AS total_orders,
+            SUM(payment_value) AS total_revenue,
+            ROUND(
+                SUM(payment_value) / NULLIF(COUNT(DISTINCT order_id), 0),
+                2
+            ) AS average_order_value
+        FROM f_order_facts {where}
+    """,
+    "v_payment_analysis": """
+        SELECT
+            pay.payment_type,
+            COUNT(DISTINCT pay.order_id) AS orders,
+            SUM(pay.payment_value) AS revenue,
+            AVG(pay.payment_value) AS avg_payment
+        FROM orders o
+        JOIN payments pay ON o.order_id = pay.order_id
+        {where}
+        GROUP BY pay.payment_type
+    """,
+    "v_category_aov": """
+        SELECT
+            category,
+            ROUND(SUM(revenue) / COUNT(DISTINCT order_id), 2) AS average_order_value
+        FROM (
+            SELECT
+                o.order_id,
+                p.product_category_name AS category,
+                SUM(oi.price + oi.freight_value) AS revenue
+            FROM orders o
+            JOIN order_items oi ON o.order_id = oi.order_id
+            JOIN products p ON oi.product_id = p.product_id
+            {where}
+            GROUP BY o.order_id, p.product_category_name
+        )
+        GROUP BY category
+    """,
+}
+
+# Views whose window predicate is on the orders alias
+_ORDERS_ALIAS = {"v_payment_analysis", "v_category_aov"}
+
+_FROM_VIEW = re.compile(r"\bfrom\s+(v_\w+)\b", re.IGNORECASE)
+
+
+def _source_view(sql: str) -> Optional[str]:
+    m = _FROM_VIEW.search(sql)
+    return m.group(1).lower() if m else None
+
+
+def supports_time_window(sql: str) -> bool:
+    return _source_view(sql) in WINDOWED_VIEWS
+
+
+def apply_time_window(sql: str, start: str, end: str) -> str:
+    """
+    Replaces the template's view with a windowed aggregate:
+        FROM v_category_revenue
+    →   FROM (SELECT ... FROM f_order_facts WHERE <window> ...) AS v_category_revenue
+    """
+    view = _source_view(sql)
+    if view not in WINDOWED_VIEWS:
+        raise ValueError(f"Time windows are not supported on {view}")
+
+    col = "o.order_purchase_timestamp" if view in _ORDERS_ALIAS else "order_purchase_timestamp"
+    where = (
+        f"WHERE {col} >= TIMESTAMP '{start}' "
+        f"AND {col} < TIMESTAMP '{end}'"
+    )
+    body = WINDOWED_VIEWS[view].format(where=where).strip()
+
+    return _FROM_VIEW.sub(f"FROM ({body}) AS {view}", sql, count=1)
+
+
+def describe_window(window: Tuple[str, str]) -> str:
+    start, end = window
+    last = date.fromisoformat(end) - timedelta(days=1)
+    return f"{start} → {last.isoformat()}"
@@ -0,0 +1,167 @@
+# agent/topk.py
+
+"""
+Top-K subsystem.
+
+"Top N" / "bottom N" questions normally sort a whole aggregate
+(~32k products, ~99k customers) just to keep a handful of rows.
+Instead, setup_db pre-computes one ranked table per metric holding the
+best and worst TOPK_MAX_N rows, physically ordered by rank. Any
+top/bottom question with N ≤ TOPK_MAX_N becomes a prefix read.
+"""
+
+import threading
+from typing import Optional
+
+from agent.config import TOPK_MAX_N
+
+# ----------------------------------
+# Ranked tables
+# table → (source view, columns, rank metric, tie-break key)
+# ----------------------------------
+TOPK_TABLES = {
+    "topk_category_revenue": (
+        "v_category_revenue",
+        ["category", "revenue"],
+        "revenue",
+        "category",
+    ),
+    "topk_category_units": (
+        "v_category_units_sold",
+        ["category", "units_sold"],
+        "units_sold",
+        "category",
+    ),
+    "topk_product_revenue": (
+        "v_product_performance",
+        ["product_id", "category", "revenue", "units_sold", "avg_rating"],
+        "revenue",
+        "product_id",
+    ),
+    "topk_product_units": (
+        "v_product_performance",
+        ["product_id", "category", "units_sold"],
+        "units_sold",
+        "product_id",
+    ),
+    "topk_customer_ltv": (
+        "v_customer_ltv",
+        ["customer_id", "lifetime_value"],
+        "lifetime_value",
+        "customer_id",
+    ),
+    "topk_seller_revenue": (
+        "v_seller_performance",
+        ["seller_id", "seller_state", "revenue", "avg_rating"],
+        "revenue",
+        "seller_id",
+    ),
+}
+
+# intent → (ranked table, output columns, default direction, default N)
+TOPK_INTENTS = {
+    "highest_revenue_category": ("topk_category_revenue", ["category", "revenue"], "desc", 1),
+    "lowest_revenue_category": ("topk_category_revenue", ["category", "revenue"], "asc", 1),
+    "revenue_by_category": ("topk_category_revenue", ["category", "revenue"], "desc", None),
+    "most_selling_category": ("topk_category_units", ["category", "units_sold"], "desc", 1),
+    "least_selling_category": ("topk_category_units", ["category", "units_sold"], "asc", 1),
+    "units_by_category": ("topk_category_units", ["category", "units_sold"], "desc", None),
+    "top_products_by_revenue": ("topk_product_revenue", ["product_id", "category", "revenue"], "desc", 10),
+    "top_products_by_units": ("topk_product_units", ["product_id", "category", "units_sold"], "desc", 10),
+    "product_performance": (
+        "topk_product_revenue",
+        ["product_id", "category", "revenue", "units_sold", "avg_rating"],
+        "desc",
+        None,
+    ),
+    "top_customers": ("topk_customer_ltv", ["customer_id", "lifetime_value"], "desc", 10),
+    "top_sellers_by_revenue": ("topk_seller_revenue", ["seller_id", "seller_state", "revenue"], "desc", 10),
+    "seller_performance": ("topk_seller_revenue", ["seller_state", "revenue", "avg_rating"], "desc", None),
+}
+
+
+# ----------------------------------
+# Build (called from db/setup_db.py)
+# ----------------------------------
+def build_topk_tables(con, max_n: int = None):
+    """(Re)builds every ranked table; run whenever the DB is refreshed."""
+    max_n = max_n or TOPK_MAX_N
+
+    for table, (view, columns, metric, key) in TOPK_TABLES.items():
+        cols = ", ".join(columns)
+        con.execute(f"""
+            CREATE OR REPLACE TABLE {table} AS
+            SELECT *
+            FROM (
+                SELECT
+                    {cols},
+                    ROW_NUMBER() OVER (ORDER BY {metric} DESC NULLS LAST, {key}) AS rank_desc,
+                    ROW_NUMBER() OVER (ORDER BY {metric} ASC NULLS LAST, {key}) AS rank_asc
+                FROM {view}
+            )
+            WHERE rank_desc <= {max_n} OR rank_asc <= {max_n}
+            ORDER BY rank_desc
+        """)
+
+    con.execute(f"""
+        CREATE OR REPLACE TABLE topk_meta AS
+        SELECT {max_n} AS max_n
+    """)
+
+
+# ----------------------------------
+# Runtime
+# ----------------------------------
+_bounds = {}
+_lock = threading.Lock()
+
+
+def topk_bound(db_path: str) -> int:
+    """TOPK_MAX_N the tables were built with (0 if they don't exist)."""
+    if db_path not in _bounds:
+        with _lock:
+            if db_path not in _bounds:
+                import duckdb
+
+                from agent.db import connect
+
+                con = connect(db_path)
+                try:
+                    _bounds[db_path] = con.execute(
+                        "SELECT max_n FROM topk_meta"
+                    ).fetchone()[0]
+                except duckdb.CatalogException:
+                    _bounds[db_path] = 0
+                finally:
+                    con.close()
+    return _bounds[db_path]
+
+
+def topk_sql(intent: str, filters: dict, max_n: int) -> Optional[str]:
+    """
+    Prefix-read SQL for a top/bottom question, or None when the
+    question can't be served from the ranked tables (other filters,
+    no N, or N above the built bound).
+    """
+    spec = TOPK_INTENTS.get(intent)
+    if not spec:
+        return None
+
+    filters = filters or {}
+    if set(filters) - {"limit", "order"}:
+        return None
+
+    table, columns, direction, default_n = spec
+    n = filters.get("limit", default_n)
+    if n is None or int(n) > max_n:
+        return None
+
+    direction = filters.get("order", direction)
+    rank = "rank_asc" if direction == "asc" else "rank_desc"
+
+    return f"""
+        SELECT {", ".join(columns)}
+        FROM {table}
+        WHERE {rank} <= {int(n)}
+        ORDER BY {rank}
+    """
@@ -0,0 +1,282 @@
+# agent/tracing.py
+
+"""
+Pipeline tracing for answer().
+
+- start_trace(question) opens a root trace for one question
+- span("stage") times a pipeline stage inside the current trace
+- annotate(key, value) records facts such as the resolution path
+  (rule / llm / follow-up / memory) and the execution engine
+
+Finished traces are:
+1. aggregated in-process (per-stage p50 / p95 / p99 over a rolling window)
+2. handed to every registered exporter (log lines, JSONL file,
+   Prometheus text format)
+
+Outside a trace, span() and annotate() are no-ops, so modules can be
+instrumented unconditionally.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Optional
+
+from agent.config import (
+    TRACE_EXPORTERS,
+    TRACE_JSONL_PATH,
+    TRACE_PROMETHEUS_PATH,
+    TRACE_WINDOW,
+)
+
+logger = logging.getLogger("agent.tracing")
+
+_current = contextvars.ContextVar("olist_trace", default=None)
+
+
+# ----------------------------------
+# Trace & spans
+# ----------------------------------
+class Trace:
+    def __init__(self, question: str):
+        self.question = question
+        self.started_at = time.time()
+        self.spans = []
+        self.attributes = {}
+        self.total_ms = None
+        self._t0 = time.perf_counter()
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self._t0) * 1e3
+
+    def stage_ms(self) -> dict:
+        """Total time per stage name (a stage may run more than once)."""
+        totals = defaultdict(float)
+        for s in self.spans:
+            totals[s["name"]] += s["duration_ms"]
+        return dict(totals)
+
+    def to_dict(self) -> dict:
+        return {
+            "question": self.question,
+            "started_at": self.started_at,
+            "total_ms": self.total_ms,
+            "attributes": dict(self.attributes),
+            "spans": list(self.spans),
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.spans.append({
+            "name": name,
+            "start_ms": (t0 - trace._t0) * 1e3,
+            "duration_ms": (time.perf_counter() - t0) * 1e3,
+            **attrs,
+        })
+
+
+def annotate(key: str, value):
+    trace = _current.get()
+    if trace is not None:
+        trace.set(key, value)
+
+
+@contextmanager
+def start_trace(question: str):
+    trace = Trace(question)
+    token = _current.set(trace)
+    try:
+        yield trace
+    except Exception as e:
+        trace.set("error", type(e).__name__)
+        raise
+    finally:
+        trace.finish()
+        _current.reset(token)
+        _record(trace)
+
+
+# ----------------------------------
+# In-process aggregation
+# ----------------------------------
+class StageStats:
+    """Rolling per-stage latency window + lifetime count/sum."""
+
+    def __init__(self, window: int = TRACE_WINDOW):
+        self._window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self._window))
+        self._count = defaultdict(int)
+        self._sum = defaultdict(float)
+        self._resolution = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def observe(self, trace: Trace):
+        stages = trace.stage_ms()
+        stages["total"] = trace.total_ms
+        with self._lock:
+            for name, ms in stages.items():
+                self._samples[name].append(ms)
+                self._count[name] += 1
+                self._sum[name] += ms
+            path = trace.attributes.get("resolution")
+            if path:
+                self._resolution[path] += 1
+
+    def percentiles(self, stage: str, qs=(0.5, 0.95, 0.99)) -> dict:
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+        if not samples:
+            return {}
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in qs}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = list(self._samples)
+            counts = dict(self._count)
+            sums = dict(self._sum)
+            resolution = dict(self._resolution)
+
+        return {
+            "stages": {
+                name: {
+                    "count": counts[name],
+                    "sum_ms": sums[name],
+                    **{f"p{int(q * 100)}_ms": v for q, v in self.percentiles(name).items()},
+                }
+                for name in stages
+            },
+            "resolution": resolution,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._count.clear()
+            self._sum.clear()
+            self._resolution.clear()
+
+
+STATS = StageStats()
+
+
+def stage_percentiles() -> dict:
+    return STATS.snapshot()
+
+
+# ----------------------------------
+# Exporters
+# ----------------------------------
+class LogExporter:
+    """One log line per question."""
+
+    def export(self, trace: Trace):
+        stages = " ".join(f"{k}={v:.2f}ms" for k, v in trace.stage_ms().items())
+        attrs = " ".join(f"{k}={v}" for k, v in trace.attributes.items())
+        logger.info("trace total=%.2fms %s %s", trace.total_ms, attrs, stages)
+
+
+class JsonlExporter:
+    """Appends every trace as one JSON line."""
+
+    def __init__(self, path: str = TRACE_JSONL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        line = json.dumps(trace.to_dict(), default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class PrometheusExporter:
+    """
+    Prometheus text exposition of the in-process aggregates.
+    With a path, the file is rewritten atomically after each trace
+    (node_exporter textfile collector); render() serves a /metrics handler.
+    """
+
+    def __init__(self, path: Optional[str] = TRACE_PROMETHEUS_PATH, stats: StageStats = None):
+        self.path = path
+        self.stats = stats or STATS
+
+    def render(self) -> str:
+        snap = self.stats.snapshot()
+        lines = [
+            "# HELP olist_answer_stage_seconds Latency of answer() pipeline stages.",
+            "# TYPE olist_answer_stage_seconds summary",
+        ]
+        for stage, s in sorted(snap["stages"].items()):
+            for key, q in (("p50_ms", "0.5"), ("p95_ms", "0.95"), ("p99_ms", "0.99")):
+                if key in s:
+                    lines.append(
+                        f'olist_answer_stage_seconds{{stage="{stage}",quantile="{q}"}} '
+                        f"{s[key] / 1e3:.6f}"
+                    )
+            lines.append(f'olist_answer_stage_seconds_sum{{stage="{stage}"}} {s["sum_ms"] / 1e3:.6f}')
+            lines.append(f'olist_answer_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+
+        lines += [
+            "# HELP olist_answer_resolution_total Questions by intent resolution path.",
+            "# TYPE olist_answer_resolution_total counter",
+        ]
+        for path, n in sorted(snap["resolution"].items()):
+            lines.append(f'olist_answer_resolution_total{{path="{path}"}} {n}')
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, trace: Trace):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
+
+
+EXPORTER_TYPES = {
+    "log": LogExporter,
+    "jsonl": JsonlExporter,
+    "prometheus": PrometheusExporter,
+}
+
+_exporters = [EXPORTER_TYPES[name]() for name in TRACE_EXPORTERS if name in EXPORTER_TYPES]
+
+
+def register_exporter(exporter):
+    """Adds any object with an export(trace) method."""
+    _exporters.append(exporter)
+
+
+def clear_exporters():
+    _exporters.clear()
+
+
+def _record(trace: Trace):
+    STATS.observe(trace)
+    for exporter in list(_exporters):
+        try:
+            exporter.export(trace)
+        except Exception:
+            logger.exception("Trace exporter %r failed", exporter)
@@ -0,0 +1,83 @@
+# benchmarks/bench_chart.py
+
+"""
+Chart rendering: first render vs cached re-render, resident memory
+over many distinct renders (figures must not accumulate), and render
+time / image size as results grow (chart data reduction keeps both flat).
+
+Usage:
+    python benchmarks/bench_chart.py --renders 200 --sizes 100,10000,1000000
+"""
+
+import argparse
+import os
+import resource
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from agent.chart import _render, render_chart
+
+
+def rss_mb() -> float:
+    # Current RSS on Linux; peak RSS elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def frame(seed: int, n: int = 20):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "category": [f"category_{i}" for i in range(n)],
+        "revenue": rng.uniform(1e3, 1e6, n).round(2),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--renders", type=int, default=200)
+    parser.add_argument("--sizes", default="100,10000,1000000")
+    args = parser.parse_args()
+
+    df = frame(0)
+    t0 = time.perf_counter()
+    render_chart(df, "category", "revenue")
+    first = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    render_chart(df, "category", "revenue")
+    cached = time.perf_counter() - t0
+
+    print(f"🖼️ first render {first * 1e3:,.1f} ms, cached {cached * 1e3:,.3f} ms")
+
+    start = rss_mb()
+    for i in range(1, args.renders + 1):
+        render_chart(frame(i), "category", "revenue")
+        if i % max(1, args.renders // 5) == 0:
+            print(f"   {i:>5} renders  RSS {rss_mb():,.1f} MB")
+    print(f"📈 RSS growth over {args.renders} renders: {rss_mb() - start:+,.1f} MB")
+
+    print(f"\n{'rows':>10}{'kind':>8}{'ms':>9}{'KB':>8}")
+    print("-" * 35)
+    rng = np.random.default_rng(1)
+    for n in [int(s) for s in args.sizes.split(",")]:
+        keys = np.arange(n).astype(str)
+        for kind, x_col in (("line", "year_month"), ("bars", "product_id")):
+            df = pd.DataFrame({x_col: keys, "revenue": rng.uniform(1e3, 1e6, n)})
+            t0 = time.perf_counter()
+            image = _render(df, x_col, "revenue", "png", 100)
+            ms = (time.perf_counter() - t0) * 1e3
+            print(f"{n:>10,}{kind:>8}{ms:>9,.1f}{len(image) / 1e3:>8,.0f}")
+
+
+if __name__ == "__main__":
+    main()
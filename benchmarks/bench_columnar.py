@@ -0,0 +1,83 @@
+# benchmarks/bench_columnar.py
+
+"""
+Columnar engine vs DuckDB for the hot aggregate intents.
+
+The DuckDB path is timed exactly like answer() runs it:
+connect → execute → fetchdf → close.
+
+Usage:
+    python benchmarks/bench_columnar.py [--db db/olist.db] [--runs 50]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from agent.columnar import HOT_INTENTS, ColumnarEngine
+from agent.db import connect
+from agent.sql_templates import SQL_TEMPLATES
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e3, result
+
+
+def same_result(a, b):
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    for col in a.columns:
+        x, y = a[col].to_numpy(), b[col].to_numpy()
+        if np.issubdtype(x.dtype, np.number) and np.issubdtype(y.dtype, np.number):
+            if not np.allclose(x, y, equal_nan=True):
+                return False
+        elif [str(v) for v in x] != [str(v) for v in y]:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default=os.path.join(ROOT, "db", "olist.db"))
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    con = connect(args.db)
+    engine = ColumnarEngine(con)
+    con.close()
+    load_ms = (time.perf_counter() - t0) * 1e3
+
+    print(f"📦 Loaded {engine.rows:,} fact rows in {load_ms:,.0f} ms\n")
+    print(f"{'intent':<34}{'duckdb ms':>11}{'numpy ms':>11}{'speedup':>10}  match")
+    print("-" * 74)
+
+    def run_sql(sql):
+        c = connect(args.db)
+        df = c.execute(sql).fetchdf()
+        c.close()
+        return df
+
+    for intent in HOT_INTENTS:
+        sql = SQL_TEMPLATES[intent]
+        sql_ms, expected = timed(lambda: run_sql(sql), args.runs)
+        np_ms, got = timed(lambda: engine.query(intent), args.runs)
+        match = "✔" if same_result(expected, got) else "✘"
+        print(f"{intent:<34}{sql_ms:>11.3f}{np_ms:>11.3f}{sql_ms / np_ms:>9.0f}x  {match}")
+
+
+if __name__ == "__main__":
+    main()
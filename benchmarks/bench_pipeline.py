@@ -0,0 +1,105 @@
+# benchmarks/bench_pipeline.py
+
+"""
+Load test of the full answer() + explain() pipeline against the bundled
+LLM stub (tools/llm_stub_server.py) — deterministic, no GPU needed.
+
+Concurrent clients replay a question mix in which some questions need
+the LLM for intent detection; every data result is then explained
+(prompt build + LLM call, explanation cache bypassed).
+
+Usage:
+    python benchmarks/bench_pipeline.py --clients 8 --rounds 5 --latency lognormal:300:0.4
+    python benchmarks/bench_pipeline.py --fail-rate 0.1
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from tools.llm_stub_server import StubServer
+
+QUESTIONS = [
+    "show revenue by category",
+    "show revenue for bed bath",        # LLM intent
+    "show monthly revenue",
+    "which products earn the most revenue",  # LLM intent
+    "average order value by category",
+    "show top sellers",
+    "revenue per year please",          # LLM intent
+    "asdfghjkl",                        # LLM → NONE
+]
+
+
+def one_question(question):
+    from agent.agent_core import answer
+    from agent.llm_client import LLM_UNAVAILABLE
+    from agent.llm_explain import explain_with_report
+
+    t0 = time.perf_counter()
+    result = answer(question)
+    t1 = time.perf_counter()
+
+    explain_s, failed = None, False
+    if isinstance(result, dict):
+        text, _ = explain_with_report(question, result["df"])
+        explain_s = time.perf_counter() - t1
+        failed = text == LLM_UNAVAILABLE
+    return t1 - t0, explain_s, time.perf_counter() - t0, failed
+
+
+def pct(samples):
+    p50, p95, p99 = np.percentile(np.array(samples) * 1e3, [50, 95, 99])
+    return f"{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", default="lognormal:200:0.4")
+    parser.add_argument("--token-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency, fail_rate=args.fail_rate, seed=args.seed) as stub:
+        from agent import llm_client
+
+        llm_client.LLM_BASE_URL = stub.base_url
+        llm_client.LLM_MAX_RETRIES = 0
+        llm_client.get_client.cache_clear()
+
+        jobs = QUESTIONS * args.rounds
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(args.clients) as pool:
+            results = list(pool.map(one_question, jobs))
+        wall = time.perf_counter() - t0
+
+        answer_s = [r[0] for r in results]
+        explain_s = [r[1] for r in results if r[1] is not None]
+        total_s = [r[2] for r in results]
+        failed = sum(r[3] for r in results)
+
+        print(f"🤖 stub {args.latency}, fail rate {args.fail_rate}, "
+              f"{args.clients} clients, {len(jobs)} questions in {wall:,.1f}s "
+              f"({len(jobs) / wall:,.1f} q/s), LLM calls {stub.behaviour.stats['requests']}")
+        print(f"{'stage':<12}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        print("-" * 39)
+        print(f"{'answer':<12}{pct(answer_s)}")
+        if explain_s:
+            print(f"{'explain':<12}{pct(explain_s)}")
+        print(f"{'end-to-end':<12}{pct(total_s)}")
+        print(f"\n⚠️ explanations degraded by LLM failures: {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_profiles.py
+
+"""
+DuckDB runtime profiles on the SQL_TEMPLATES question mix.
+
+Each profile (agent/db.py) runs in its own process, since DuckDB fixes
+its configuration when the database is first opened. Within a process,
+concurrent clients replay every template through run_sql() (governor
+included) → throughput, p50 / p95 / p99 latency and peak RSS.
+
+Usage:
+    python benchmarks/bench_profiles.py --clients 1 8 --runs 20
+    python benchmarks/bench_profiles.py --profiles interactive batch --db db/olist_10x.db
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench_scale import _peak_rss_mb, _percentiles  # noqa: E402
+
+
+# ----------------------------------
+# Child: one profile
+# ----------------------------------
+def child(clients, runs):
+    from agent.agent_core import run_sql
+    from agent.db import runtime_settings
+    from agent.sql_templates import SQL_TEMPLATES
+
+    def one(sql):
+        t0 = time.perf_counter()
+        run_sql(sql)
+        return time.perf_counter() - t0
+
+    # Warm: first connection opens the database, caches fill
+    for sql in SQL_TEMPLATES.values():
+        run_sql(sql)
+
+    jobs = list(SQL_TEMPLATES.values()) * runs
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        samples = list(pool.map(one, jobs))
+    wall = time.perf_counter() - t0
+
+    print(json.dumps({
+        "settings": runtime_settings(),
+        "qps": len(jobs) / wall,
+        "latency": _percentiles(samples),
+        "peak_rss_mb": _peak_rss_mb(),
+    }, default=str))
+
+
+# ----------------------------------
+# Parent
+# ----------------------------------
+def run_profile(profile, clients, runs, db_path):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", str(clients), "--runs", str(runs)],
+        env={**os.environ, "OLIST_DB_PROFILE": profile, "OLIST_DB_PATH": db_path},
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    from agent.db import DB_PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", nargs="+", default=list(DB_PROFILES))
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--db", default=os.path.join(ROOT, "db", "olist.db"))
+    parser.add_argument("--child", type=int, metavar="CLIENTS", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.runs)
+
+    print(f"🗄️ {args.db}")
+    print(f"{'profile':<13}{'clients':>8}{'q/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS MB':>9}  settings")
+    print("-" * 100)
+    for profile in args.profiles:
+        for clients in args.clients:
+            r = run_profile(profile, clients, args.runs, args.db)
+            p = r["latency"]
+            settings = ", ".join(f"{k}={v}" for k, v in r["settings"].items()) or "duckdb defaults"
+            print(f"{profile:<13}{clients:>8}{r['qps']:>9,.0f}{p['p50_ms']:>9.1f}{p['p95_ms']:>9.1f}"
+                  f"{p['p99_ms']:>9.1f}{r['peak_rss_mb']:>9,.0f}  {settings}")
+
+
+if __name__ == "__main__":
+    main()
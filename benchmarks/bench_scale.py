@@ -0,0 +1,203 @@
+# benchmarks/bench_scale.py
+
+"""
+Scale benchmark: synthetic Olist data at 1x … 1000x.
+
+For every scale factor:
+1. generate synthetic CSVs (db/generate_synthetic.py), unless cached
+2. build the DB through the normal db/setup_db.py path → build time, peak RSS
+3. run every SQL_TEMPLATES intent and a representative question mix
+   through answer() → p50 / p95 / p99 latency, peak RSS
+
+Each build and each query run happens in its own process, so peak RSS
+is per stage and per scale.
+
+Usage:
+    python benchmarks/bench_scale.py --scales 1 10 100 --runs 20
+    python benchmarks/bench_scale.py --scales 10 --json results.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Rule-resolvable questions (no LLM needed) covering every answer() path:
+# templates, follow-ups, time windows, top-K and approximate mode
+QUESTION_MIX = [
+    "show revenue by category",
+    "top 5",
+    "show highest revenue category",
+    "bottom 3",
+    "average order value by category",
+    "what is average order value",
+    "show monthly revenue",
+    "show yearly revenue",
+    "show revenue by category last 6 months",
+    "show top customers",
+    "show top sellers",
+    "show top products by revenue",
+    "show payment methods",
+    "show units sold by category",
+    "roughly, show revenue by category",
+]
+
+
+def _percentiles(samples):
+    import numpy as np
+
+    p50, p95, p99 = np.percentile(np.array(samples) * 1e3, [50, 95, 99])
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+
+
+def _peak_rss_mb():
+    import resource
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss / 1024 if sys.platform != "darwin" else rss / 1024 / 1024
+
+
+# ----------------------------------
+# Child: build
+# ----------------------------------
+def child_build():
+    import runpy
+
+    # Full build: the measurement must not reuse an earlier snapshot
+    sys.argv = ["setup_db.py", "--full"]
+    t0 = time.perf_counter()
+    runpy.run_path(os.path.join(ROOT, "db", "setup_db.py"), run_name="__main__")
+    print(json.dumps({
+        "build_s": time.perf_counter() - t0,
+        "build_peak_rss_mb": _peak_rss_mb(),
+    }))
+
+
+# ----------------------------------
+# Child: query workload
+# ----------------------------------
+def child_queries(db_path, runs):
+    import agent.agent_core as core
+    from agent.db import connect
+    from agent.memory import reset_memory
+    from agent.sql_templates import SQL_TEMPLATES
+
+    core.DB_PATH = db_path
+    intents, questions = {}, {}
+
+    for intent, sql in SQL_TEMPLATES.items():
+        samples = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            con = connect(db_path)
+            con.execute(sql).fetchdf()
+            con.close()
+            samples.append(time.perf_counter() - t0)
+        intents[intent] = _percentiles(samples)
+
+    for _ in range(runs):
+        reset_memory()
+        for q in QUESTION_MIX:
+            t0 = time.perf_counter()
+            core.answer(q)
+            questions.setdefault(q, []).append(time.perf_counter() - t0)
+
+    all_questions = [s for v in questions.values() for s in v]
+    print(json.dumps({
+        "intents": intents,
+        "questions": {q: _percentiles(s) for q, s in questions.items()},
+        "question_mix": _percentiles(all_questions),
+        "query_peak_rss_mb": _peak_rss_mb(),
+    }))
+
+
+# ----------------------------------
+# Parent: orchestrate scales
+# ----------------------------------
+def _run_child(args, env=None):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__)] + args,
+        env={**os.environ, **(env or {})},
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def bench_scale(scale, runs, work_dir, regenerate=False):
+    data_dir = os.path.join(work_dir, f"synthetic_{scale:g}x")
+    db_path = os.path.join(work_dir, f"olist_{scale:g}x.db")
+
+    if regenerate or not os.path.exists(os.path.join(data_dir, "olist_orders_dataset.csv")):
+        t0 = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, "db", "generate_synthetic.py"),
+             "--scale", str(scale), "--out", data_dir],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        print(f"  🧬 generated in {time.perf_counter() - t0:,.1f}s")
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    result = {"scale": scale}
+    result.update(_run_child(
+        ["--child-build"],
+        env={"OLIST_DATA_DIR": data_dir, "OLIST_DB_PATH": db_path},
+    ))
+    result.update(_run_child(["--child-queries", db_path, "--runs", str(runs)]))
+    return result
+
+
+def report(result):
+    print(f"\n📏 scale {result['scale']:g}x — build {result['build_s']:,.1f}s, "
+          f"build RSS {result['build_peak_rss_mb']:,.0f} MB, "
+          f"query RSS {result['query_peak_rss_mb']:,.0f} MB")
+
+    print(f"  {'intent / question':<44}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    print("  " + "-" * 74)
+    rows = list(result["intents"].items()) + [("— question mix —", result["question_mix"])]
+    for name, p in rows:
+        print(f"  {name:<44}{p['p50_ms']:>10.1f}{p['p95_ms']:>10.1f}{p['p99_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Olist scale benchmark")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--work-dir", default=os.path.join(ROOT, "data", "bench"))
+    parser.add_argument("--regenerate", action="store_true")
+    parser.add_argument("--json", help="Write raw results to this file")
+    parser.add_argument("--child-build", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--child-queries", metavar="DB", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_build:
+        return child_build()
+    if args.child_queries:
+        return child_queries(args.child_queries, args.runs)
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    results = []
+    for scale in args.scales:
+        print(f"🚀 Benchmarking scale {scale:g}x")
+        result = bench_scale(scale, args.runs, args.work_dir, args.regenerate)
+        report(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_startup.py
+
+"""
+Cold-start benchmark: how fast a fresh process can answer its first question.
+
+Each sample is a new interpreter (nothing cached in-process):
+- import     — `import agent.agent_core`
+- ui import  — the modules streamlit_app.py imports at startup
+- first      — import + answer() of the first question
+- warm first — import + warmup() + answer(), i.e. a replica that
+               warmed up before taking traffic (warmup time excluded)
+
+Also lists which heavy dependencies are loaded right after import;
+ideally none are.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--question "..."]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = ["duckdb", "openai", "matplotlib", "pandas", "numpy", "dateutil"]
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+loaded = [m for m in {heavy!r} if m in sys.modules]
+warm_s = 0.0
+if {warm}:
+    from agent.agent_core import warmup
+    w0 = time.perf_counter()
+    warmup()
+    warm_s = time.perf_counter() - w0
+q0 = time.perf_counter()
+if {question!r}:
+    from agent.agent_core import answer
+    answer({question!r})
+done = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - t0) * 1e3,
+    "answer_ms": (done - q0) * 1e3,
+    "total_ms": (done - t0 - warm_s) * 1e3,
+    "loaded": loaded,
+}}))
+"""
+
+CORE_IMPORTS = "import agent.agent_core"
+UI_IMPORTS = """
+import agent.agent_core
+import agent.llm_explain
+import agent.chart
+import agent.knowledge
+"""
+
+
+def run_child(imports, question="", warm=False):
+    code = CHILD.format(imports=imports, heavy=HEAVY_MODULES, question=question, warm=warm)
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def median_of(samples, key):
+    return statistics.median(s[key] for s in samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--question", default="show revenue by category")
+    args = parser.parse_args()
+
+    scenarios = {
+        "import": (CORE_IMPORTS, "", False),
+        "ui import": (UI_IMPORTS, "", False),
+        "first": (CORE_IMPORTS, args.question, False),
+        "warm first": (CORE_IMPORTS, args.question, True),
+    }
+
+    print(f"{'scenario':<14}{'import ms':>11}{'answer ms':>11}{'total ms':>11}")
+    print("-" * 47)
+    loaded = []
+    for name, (imports, question, warm) in scenarios.items():
+        samples = [run_child(imports, question, warm) for _ in range(args.runs)]
+        print(f"{name:<14}{median_of(samples, 'import_ms'):>11.1f}"
+              f"{median_of(samples, 'answer_ms'):>11.1f}{median_of(samples, 'total_ms'):>11.1f}")
+        if name == "ui import":
+            loaded = samples[0]["loaded"]
+
+    print(f"\n📦 Heavy modules loaded at startup: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+# db/generate_synthetic.py
+
+"""
+Synthetic Olist data generator.
+
+Produces CSVs with the same file names and columns as the Kaggle
+Olist dataset, at a configurable scale factor (1.0 ≈ 100k orders).
+Distributions are shaped after the real data: skewed category and
+state mix, lognormal prices, 1–2 items per order, mostly credit card
+payments, J-shaped review scores and 2016-09 → 2018-08 growth curve.
+
+Usage:
+    python db/generate_synthetic.py --scale 10 --out data/synthetic_10x
+    OLIST_DATA_DIR=data/synthetic_10x OLIST_DB_PATH=db/olist_10x.db python db/setup_db.py
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_ORDERS = 99_441
+BASE_PRODUCTS = 32_951
+BASE_SELLERS = 3_095
+BASE_GEO_ROWS = 1_000_163
+CHUNK_ORDERS = 500_000
+
+CATEGORIES = [
+    ("cama_mesa_banho", "bed_bath_table", 11.1),
+    ("beleza_saude", "health_beauty", 9.7),
+    ("esporte_lazer", "sports_leisure", 8.6),
+    ("moveis_decoracao", "furniture_decor", 8.3),
+    ("informatica_acessorios", "computers_accessories", 7.9),
+    ("utilidades_domesticas", "housewares", 6.2),
+    ("relogios_presentes", "watches_gifts", 5.3),
+    ("telefonia", "telephony", 4.0),
+    ("ferramentas_jardim", "garden_tools", 3.9),
+    ("automotivo", "auto", 3.8),
+    ("brinquedos", "toys", 3.7),
+    ("cool_stuff", "cool_stuff", 3.4),
+    ("perfumaria", "perfumery", 3.0),
+    ("bebes", "baby", 2.7),
+    ("eletronicos", "electronics", 2.5),
+    ("papelaria", "stationery", 2.2),
+    ("fashion_bolsas_e_acessorios", "fashion_bags_accessories", 1.8),
+    ("pet_shop", "pet_shop", 1.7),
+    ("moveis_escritorio", "office_furniture", 1.5),
+    ("consoles_games", "consoles_games", 1.0),
+    ("malas_acessorios", "luggage_accessories", 1.0),
+    ("construcao_ferramentas_construcao", "construction_tools_construction", 0.8),
+    ("eletrodomesticos", "home_appliances", 0.7),
+    ("instrumentos_musicais", "musical_instruments", 0.6),
+    ("eletroportateis", "small_appliances", 0.6),
+    ("casa_construcao", "home_construction", 0.5),
+    ("livros_interesse_geral", "books_general_interest", 0.5),
+    ("alimentos", "food", 0.4),
+    ("moveis_sala", "furniture_living_room", 0.4),
+    ("casa_conforto", "home_confort", 0.4),
+    ("bebidas", "drinks", 0.3),
+    ("audio", "audio", 0.3),
+    ("fashion_roupa_masculina", "fashion_male_clothing", 0.1),
+    ("fashion_roupa_feminina", "fashio_female_clothing", 0.04),
+    (None, None, 1.4),
+]
+
+# (state, share of customers, centroid lat, centroid lng, zip prefix range)
+STATES = [
+    ("SP", 41.9, -23.0, -47.5, (1000, 19999)),
+    ("RJ", 12.9, -22.5, -43.2, (20000, 28999)),
+    ("MG", 11.7, -19.5, -44.5, (30000, 39999)),
+    ("RS", 5.5, -30.0, -52.0, (90000, 99999)),
+    ("PR", 5.1, -24.8, -51.5, (80000, 87999)),
+    ("SC", 3.7, -27.3, -49.5, (88000, 89999)),
+    ("BA", 3.4, -12.9, -41.0, (40000, 48999)),
+    ("DF", 2.2, -15.8, -47.9, (70000, 73699)),
+    ("ES", 2.0, -20.0, -40.5, (29000, 29999)),
+    ("GO", 2.0, -16.5, -49.5, (72800, 76799)),
+    ("PE", 1.7, -8.3, -36.0, (50000, 56999)),
+    ("CE", 1.3, -4.5, -39.5, (60000, 63999)),
+    ("PA", 1.0, -3.5, -52.0, (66000, 68899)),
+    ("MT", 0.9, -13.0, -56.0, (78000, 78899)),
+    ("MA", 0.8, -5.0, -45.0, (65000, 65999)),
+    ("MS", 0.7, -20.5, -54.5, (79000, 79999)),
+    ("PB", 0.5, -7.2, -36.5, (58000, 58999)),
+    ("PI", 0.5, -7.0, -42.5, (64000, 64999)),
+    ("RN", 0.5, -5.8, -36.5, (59000, 59999)),
+    ("AL", 0.4, -9.6, -36.5, (57000, 57999)),
+    ("SE", 0.4, -10.6, -37.3, (49000, 49999)),
+    ("TO", 0.3, -10.2, -48.3, (77000, 77999)),
+    ("RO", 0.3, -10.8, -63.0, (76800, 76999)),
+    ("AM", 0.2, -3.1, -60.0, (69000, 69299)),
+    ("AC", 0.1, -9.9, -67.8, (69900, 69999)),
+    ("AP", 0.1, 0.03, -51.1, (68900, 68999)),
+    ("RR", 0.1, 2.8, -60.7, (69300, 69399)),
+]
+
+PAYMENT_TYPES = [
+    ("credit_card", 73.9),
+    ("boleto", 19.0),
+    ("voucher", 5.6),
+    ("debit_card", 1.5),
+]
+
+REVIEW_SCORES = [(5, 57.8), (4, 19.3), (3, 8.2), (2, 3.2), (1, 11.5)]
+
+START = np.datetime64("2016-09-04")
+END = np.datetime64("2018-09-03")
+
+
+def _weights(rows, idx):
+    w = np.array([r[idx] for r in rows], dtype=np.float64)
+    return w / w.sum()
+
+
+def _ids(rng, n):
+    """32-char hex ids, like the Kaggle dataset."""
+    raw = rng.integers(0, 2**63, size=(n, 2), dtype=np.int64)
+    return np.char.add(
+        np.char.zfill(np.char.mod("%x", raw[:, 0]), 16),
+        np.char.zfill(np.char.mod("%x", raw[:, 1]), 16),
+    ).astype(object)
+
+
+def _ts(days, seconds):
+    return (
+        START.astype("datetime64[s]")
+        + days.astype("timedelta64[D]")
+        + seconds.astype("timedelta64[s]")
+    )
+
+
+def _fmt(ts):
+    return pd.Series(ts).dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _purchase_days(rng, n):
+    """Order volume grows roughly linearly through the dataset window."""
+    span = int((END - START).astype(int))
+    u = rng.random(n)
+    # inverse CDF of a linear ramp density ~ (0.15 + t)
+    a = 0.15
+    t = -a + np.sqrt(a * a + u * (1 + 2 * a))
+    return np.minimum((t * span).astype(np.int64), span - 1)
+
+
+def write_csv(df, path, first):
+    df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def generate(scale: float, out_dir: str, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    path = lambda name: os.path.join(out_dir, name)
+
+    n_orders = max(100, int(BASE_ORDERS * scale))
+    # catalogue and seller base grow sub-linearly with order volume
+    n_products = max(50, int(BASE_PRODUCTS * scale ** 0.5))
+    n_sellers = max(20, int(BASE_SELLERS * scale ** 0.5))
+    n_unique_customers = max(50, int(n_orders * 0.97))
+
+    state_w = _weights(STATES, 1)
+    cat_w = _weights(CATEGORIES, 2)
+
+    # ---------------------------
+    # Dimensions
+    # ---------------------------
+    cat_names = np.array([c[0] for c in CATEGORIES], dtype=object)
+    product_ids = _ids(rng, n_products)
+    product_cat = rng.choice(len(CATEGORIES), size=n_products, p=cat_w)
+    product_price = np.round(rng.lognormal(4.4, 0.9, n_products) + 5, 2)
+    pd.DataFrame({
+        "product_id": product_ids,
+        "product_category_name": cat_names[product_cat],
+        "product_name_lenght": rng.integers(5, 76, n_products),
+        "product_description_lenght": rng.integers(4, 3993, n_products),
+        "product_photos_qty": rng.integers(1, 11, n_products),
+        "product_weight_g": rng.integers(50, 30000, n_products),
+        "product_length_cm": rng.integers(7, 105, n_products),
+        "product_height_cm": rng.integers(2, 105, n_products),
+        "product_width_cm": rng.integers(6, 118, n_products),
+    }).to_csv(path("olist_products_dataset.csv"), index=False)
+
+    pd.DataFrame({
+        "product_category_name": [c[0] for c in CATEGORIES if c[0]],
+        "product_category_name_english": [c[1] for c in CATEGORIES if c[0]],
+    }).to_csv(path("product_category_name_translation.csv"), index=False)
+
+    state_codes = np.array([s[0] for s in STATES], dtype=object)
+
+    def zips(states):
+        lo = np.array([STATES[s][4][0] for s in states])
+        hi = np.array([STATES[s][4][1] for s in states])
+        return lo + (rng.random(len(states)) * (hi - lo)).astype(np.int64)
+
+    seller_ids = _ids(rng, n_sellers)
+    # sellers are even more concentrated in the south-east than buyers
+    seller_w = state_w ** 1.5 / (state_w ** 1.5).sum()
+    seller_state = rng.choice(len(STATES), size=n_sellers, p=seller_w)
+    seller_zip = zips(seller_state)
+    pd.DataFrame({
+        "seller_id": seller_ids,
+        "seller_zip_code_prefix": seller_zip,
+        "seller_city": "city_" + pd.Series(seller_zip // 100).astype(str),
+        "seller_state": state_codes[seller_state],
+    }).to_csv(path("olist_sellers_dataset.csv"), index=False)
+
+    # Skewed popularity for products and sellers
+    product_pop = rng.pareto(1.2, n_products) + 1
+    product_pop /= product_pop.sum()
+    seller_pop = rng.pareto(1.0, n_sellers) + 1
+    seller_pop /= seller_pop.sum()
+
+    unique_ids = _ids(rng, n_unique_customers)
+    unique_state = rng.choice(len(STATES), size=n_unique_customers, p=state_w)
+    unique_zip = zips(unique_state)
+
+    # ---------------------------
+    # Facts (chunked)
+    # ---------------------------
+    first = True
+    written = 0
+    while written < n_orders:
+        n = min(CHUNK_ORDERS, n_orders - written)
+
+        order_ids = _ids(rng, n)
+        customer_ids = _ids(rng, n)
+
+        # ~3% of orders come from returning customers
+        who = rng.integers(0, n_unique_customers, n)
+        pd.DataFrame({
+            "customer_id": customer_ids,
+            "customer_unique_id": unique_ids[who],
+            "customer_zip_code_prefix": unique_zip[who],
+            "customer_city": "city_" + pd.Series(unique_zip[who] // 100).astype(str),
+            "customer_state": state_codes[unique_state[who]],
+        }).pipe(write_csv, path("olist_customers_dataset.csv"), first)
+
+        days = _purchase_days(rng, n)
+        secs = rng.integers(0, 86400, n)
+        purchase = _ts(days, secs)
+        approved = purchase + rng.integers(600, 2 * 86400, n).astype("timedelta64[s]")
+        carrier = approved + rng.integers(86400, 6 * 86400, n).astype("timedelta64[s]")
+        transit = rng.gamma(2.0, 4.5, n) * 86400
+        delivered = carrier + transit.astype(np.int64).astype("timedelta64[s]")
+        estimated = (purchase + rng.integers(15, 40, n).astype("timedelta64[D]")).astype("datetime64[D]")
+
+        status = np.where(rng.random(n) < 0.97, "delivered", "shipped").astype(object)
+        canceled = rng.random(n) < 0.006
+        status[canceled] = "canceled"
+        not_delivered = status != "delivered"
+
+        orders = pd.DataFrame({
+            "order_id": order_ids,
+            "customer_id": customer_ids,
+            "order_status": status,
+            "order_purchase_timestamp": _fmt(purchase),
+            "order_approved_at": _fmt(approved),
+            "order_delivered_carrier_date": _fmt(carrier),
+            "order_delivered_customer_date": _fmt(delivered),
+            "order_estimated_delivery_date": _fmt(estimated.astype("datetime64[s]")),
+        })
+        orders.loc[not_delivered, "order_delivered_customer_date"] = None
+        write_csv(orders, path("olist_orders_dataset.csv"), first)
+
+        # Items: 90% single item, otherwise 2–4
+        n_items = np.where(rng.random(n) < 0.9, 1, rng.integers(2, 5, n))
+        item_order = np.repeat(np.arange(n), n_items)
+        item_seq = np.concatenate([np.arange(1, k + 1) for k in n_items]) if n else np.array([])
+        m = len(item_order)
+        item_product = rng.choice(n_products, size=m, p=product_pop)
+        item_seller = rng.choice(n_sellers, size=m, p=seller_pop)
+        price = np.round(product_price[item_product] * rng.uniform(0.9, 1.1, m), 2)
+        freight = np.round(rng.gamma(2.0, 10.0, m), 2)
+        pd.DataFrame({
+            "order_id": order_ids[item_order],
+            "order_item_id": item_seq,
+            "product_id": product_ids[item_product],
+            "seller_id": seller_ids[item_seller],
+            "shipping_limit_date": _fmt(carrier[item_order]),
+            "price": price,
+            "freight_value": freight,
+        }).pipe(write_csv, path("olist_order_items_dataset.csv"), first)
+
+        # Payments: order total, occasionally split with a voucher
+        order_total = np.bincount(item_order, weights=price + freight, minlength=n)
+        ptype = rng.choice(len(PAYMENT_TYPES), size=n, p=_weights(PAYMENT_TYPES, 1))
+        split = rng.random(n) < 0.03
+        main_value = np.where(split, order_total * 0.7, order_total)
+        pay = pd.DataFrame({
+            "order_id": order_ids,
+            "payment_sequential": 1,
+            "payment_type": np.array([p[0] for p in PAYMENT_TYPES], dtype=object)[ptype],
+            "payment_installments": np.where(ptype == 0, rng.integers(1, 11, n), 1),
+            "payment_value": np.round(main_value, 2),
+        })
+        extra = pd.DataFrame({
+            "order_id": order_ids[split],
+            "payment_sequential": 2,
+            "payment_type": "voucher",
+            "payment_installments": 1,
+            "payment_value": np.round(order_total[split] * 0.3, 2),
+        })
+        write_csv(pd.concat([pay, extra]), path("olist_order_payments_dataset.csv"), first)
+
+        # Reviews: ~99% of orders, late deliveries score lower
+        reviewed = rng.random(n) < 0.99
+        late = delivered.astype("datetime64[D]") > estimated
+        score = rng.choice(
+            [s[0] for s in REVIEW_SCORES], size=n, p=_weights(REVIEW_SCORES, 1)
+        )
+        score = np.where(late & (rng.random(n) < 0.5), rng.integers(1, 3, n), score)
+        review_date = delivered.astype("datetime64[D]") + np.timedelta64(1, "D")
+        pd.DataFrame({
+            "review_id": _ids(rng, int(reviewed.sum())),
+            "order_id": order_ids[reviewed],
+            "review_score": score[reviewed],
+            "review_comment_title": None,
+            "review_comment_message": None,
+            "review_creation_date": _fmt(review_date[reviewed].astype("datetime64[s]")),
+            "review_answer_timestamp": _fmt(
+                review_date[reviewed].astype("datetime64[s]") + np.timedelta64(86400, "s")
+            ),
+        }).pipe(write_csv, path("olist_order_reviews_dataset.csv"), first)
+
+        written += n
+        first = False
+        print(f"  … {written:,}/{n_orders:,} orders")
+
+    # ---------------------------
+    # Geolocation (~10 noisy points per zip prefix)
+    # ---------------------------
+    n_geo = max(1000, int(BASE_GEO_ROWS * min(scale, 1.0)))
+    geo_state = rng.choice(len(STATES), size=n_geo, p=state_w)
+    lat = np.array([STATES[s][2] for s in geo_state]) + rng.normal(0, 1.2, n_geo)
+    lng = np.array([STATES[s][3] for s in geo_state]) + rng.normal(0, 1.2, n_geo)
+    geo_zip = zips(geo_state)
+    pd.DataFrame({
+        "geolocation_zip_code_prefix": geo_zip,
+        "geolocation_lat": lat,
+        "geolocation_lng": lng,
+        "geolocation_city": "city_" + pd.Series(geo_zip // 100).astype(str),
+        "geolocation_state": state_codes[geo_state],
+    }).to_csv(path("olist_geolocation_dataset.csv"), index=False)
+
+    return n_orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Olist CSVs")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Scale factor (1.0 ≈ 100k orders)")
+    parser.add_argument("--out", default=None, help="Output directory")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = args.out or os.path.join(base, "data", f"synthetic_{args.scale:g}x")
+
+    print(f"🧬 Generating synthetic Olist data (scale={args.scale:g}) → {out}")
+    n = generate(args.scale, out, args.seed)
+    print(f"✅ Wrote {n:,} orders")
+
+
+if __name__ == "__main__":
+    main()
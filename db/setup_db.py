@@ -1,25 +1,57 @@
 # db/setup_db.py
 
-import duckdb
+"""
+Builds the Olist analytics database as a DAG of steps (agent/build_dag.py).
+
+Independent steps (CSV loads, views, top-K tables, samples) run in
+parallel; steps whose SQL, parameters and input files are unchanged
+since the current snapshot are skipped.
+
+    python db/setup_db.py                           # incremental
+    python db/setup_db.py --full                    # everything, from scratch
+    python db/setup_db.py --target f_order_facts    # one target (+ stale inputs)
+    python db/setup_db.py --list                    # steps and dependencies
+"""
+
+import argparse
 import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.approx import build_sample_tables
+from agent.build_dag import RAN, BuildStep, run_dag, topological
+from agent.config import (
+    BUILD_WORKERS,
+    DB_PATH,
+    GEO_CELL_DEG,
+    LOGISTICS_BUCKET_DAYS,
+    SAMPLE_FRACTION,
+    SAMPLE_MIN_ROWS,
+    SKETCH_HLL_PRECISION,
+    SKETCH_RELATIVE_ACCURACY,
+    TOPK_MAX_N,
+)
+from agent.cohorts import build_cohort_tables
+from agent.db import connect
+from agent.geo import build_geo_tables
+from agent.logistics import build_logistics_mart
+from agent.knowledge_artifact import build_artifact
+from agent.sketches import build_sketch_tables
+from agent.snapshots import active_path, new_build_path, publish
+from agent.topk import TOPK_TABLES, build_topk_tables
 
 # ---------------------------
 # Paths
 # ---------------------------
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-DB_DIR = os.path.join(BASE_DIR, "db")
-DB_PATH = os.path.join(DB_DIR, "olist.db")
-
-os.makedirs(DB_DIR, exist_ok=True)
-
-con = duckdb.connect(DB_PATH)
-
-print("📦 Creating Olist database at:", DB_PATH)
+DATA_DIR = os.environ.get("OLIST_DATA_DIR", os.path.join(BASE_DIR, "data"))
 
 # ---------------------------
-# 1️⃣ Load raw tables
+# 1️⃣ Raw tables
 # ---------------------------
 
 tables = {
@@ -34,33 +66,47 @@ tables = {
     "category_translation": "product_category_name_translation.csv",
 }
 
-for table, file in tables.items():
-    path = os.path.join(DATA_DIR, file)
-    print(f"➡️ Loading {table}")
-    con.execute(f"""
-        CREATE OR REPLACE TABLE {table} AS
-        SELECT * FROM read_csv_auto('{path}')
-    """)
+ORDER_TIMESTAMPS = [
+    "order_purchase_timestamp",
+    "order_approved_at",
+    "order_delivered_carrier_date",
+    "order_delivered_customer_date",
+    "order_estimated_delivery_date",
+]
 
-# ---------------------------
-# 2️⃣ Fix timestamp columns
-# ---------------------------
 
-print("⏱ Fixing timestamp types")
-
-con.execute("""
-    ALTER TABLE orders
-    ALTER COLUMN order_purchase_timestamp
-    SET DATA TYPE TIMESTAMP
-""")
+def load_step(table: str, file: str) -> BuildStep:
+    path = os.path.join(DATA_DIR, file)
+    select = f"SELECT * FROM read_csv_auto('{path}')"
+    if table == "orders":
+        # Typed timestamps (lead times are computed from them), physically
+        # ordered by purchase date so zone maps prune time windows
+        casts = ", ".join(f"CAST({c} AS TIMESTAMP) AS {c}" for c in ORDER_TIMESTAMPS)
+        select = f"""
+            SELECT * REPLACE ({casts})
+            FROM read_csv_auto('{path}')
+            ORDER BY order_purchase_timestamp
+        """
+    return BuildStep(
+        table,
+        sql=f"CREATE OR REPLACE TABLE {table} AS {select}",
+        inputs=[path],
+        label=f"➡️ load {table}",
+    )
+
+
+STEPS = [load_step(table, file) for table, file in tables.items()]
 
 # ---------------------------
-# 3️⃣ CORE FACT VIEW
+# 2️⃣ CORE FACT VIEW + DATE-SORTED FACT TABLE + DATE DIMENSION
 # ---------------------------
 
-print("📊 Creating core fact view")
-
-con.execute("""
+STEPS += [
+    BuildStep(
+        "v_order_facts",
+        deps=["orders", "order_items", "products", "payments", "reviews", "customers", "sellers"],
+        label="📊 v_order_facts",
+        sql="""
 CREATE OR REPLACE VIEW v_order_facts AS
 SELECT
     o.order_id,
@@ -81,65 +127,90 @@ JOIN payments pay ON o.order_id = pay.order_id
 LEFT JOIN reviews r ON o.order_id = r.order_id
 LEFT JOIN customers c ON o.customer_id = c.customer_id
 LEFT JOIN sellers s ON oi.seller_id = s.seller_id
-""")
+""",
+    ),
+    # Materialized facts sorted by purchase date: each row group covers a
+    # narrow date range, so min/max zone maps skip everything outside a
+    # time-window predicate.
+    BuildStep(
+        "f_order_facts",
+        deps=["v_order_facts"],
+        label="📅 f_order_facts",
+        sql="""
+CREATE OR REPLACE TABLE f_order_facts AS
+SELECT
+    *,
+    CAST(order_purchase_timestamp AS DATE) AS order_date
+FROM v_order_facts
+ORDER BY order_purchase_timestamp
+""",
+    ),
+    BuildStep(
+        "dim_date",
+        deps=["orders"],
+        label="📅 dim_date",
+        sql="""
+CREATE OR REPLACE TABLE dim_date AS
+SELECT
+    CAST(d AS DATE) AS date,
+    EXTRACT(YEAR FROM d) AS year,
+    EXTRACT(QUARTER FROM d) AS quarter,
+    EXTRACT(MONTH FROM d) AS month,
+    strftime(d, '%Y-%m') AS year_month,
+    ISODOW(d) AS day_of_week,
+    ISODOW(d) >= 6 AS is_weekend
+FROM (
+    SELECT UNNEST(generate_series(
+        CAST(MIN(order_purchase_timestamp) AS DATE),
+        CAST(MAX(order_purchase_timestamp) AS DATE),
+        INTERVAL 1 DAY
+    )) AS d
+    FROM orders
+)
+ORDER BY date
+""",
+    ),
+]
 
 # ---------------------------
-# 4️⃣ REVENUE & SALES VIEWS
+# 3️⃣ ANALYTICS VIEWS
+# view → (dependencies, SELECT)
 # ---------------------------
 
-print("💰 Revenue & sales views")
-
-# Revenue by category
-con.execute("""
-CREATE OR REPLACE VIEW v_category_revenue AS
+views = {
+    # Revenue & sales
+    "v_category_revenue": (["v_order_facts"], """
 SELECT
     category,
     SUM(payment_value) AS revenue
 FROM v_order_facts
 GROUP BY category
-""")
-
-# Revenue by category & year
-con.execute("""
-CREATE OR REPLACE VIEW v_category_year_revenue AS
+"""),
+    "v_category_year_revenue": (["v_order_facts"], """
 SELECT
     EXTRACT(YEAR FROM order_purchase_timestamp) AS year,
     category,
     SUM(payment_value) AS revenue
 FROM v_order_facts
 GROUP BY year, category
-""")
-
-# Monthly revenue
-con.execute("""
-CREATE OR REPLACE VIEW v_monthly_revenue AS
+"""),
+    "v_monthly_revenue": (["v_order_facts"], """
 SELECT
     strftime('%Y-%m', order_purchase_timestamp) AS year_month,
     SUM(payment_value) AS revenue
 FROM v_order_facts
 GROUP BY year_month
 ORDER BY year_month
-""")
-
-# ---------------------------
-# 5️⃣ PRODUCT & CATEGORY PERFORMANCE
-# ---------------------------
-
-print("📦 Product & category performance")
-
-# Category units sold
-con.execute("""
-CREATE OR REPLACE VIEW v_category_units_sold AS
+"""),
+    # Product & category performance
+    "v_category_units_sold": (["v_order_facts"], """
 SELECT
     category,
     COUNT(*) AS units_sold
 FROM v_order_facts
 GROUP BY category
-""")
-
-# Product performance
-con.execute("""
-CREATE OR REPLACE VIEW v_product_performance AS
+"""),
+    "v_product_performance": (["v_order_facts"], """
 SELECT
     product_id,
     category,
@@ -148,17 +219,9 @@ SELECT
     AVG(review_score) AS avg_rating
 FROM v_order_facts
 GROUP BY product_id, category
-""")
-
-# ---------------------------
-# 6️⃣ CUSTOMER ANALYTICS
-# ---------------------------
-
-print("👤 Customer analytics")
-
-# Customer lifetime value
-con.execute("""
-CREATE OR REPLACE VIEW v_customer_ltv AS
+"""),
+    # Customer analytics
+    "v_customer_ltv": (["v_order_facts"], """
 SELECT
     customer_id,
     customer_state,
@@ -166,16 +229,9 @@ SELECT
     COUNT(DISTINCT order_id) AS total_orders
 FROM v_order_facts
 GROUP BY customer_id, customer_state
-""")
-
-# ---------------------------
-# 7️⃣ SELLER ANALYTICS
-# ---------------------------
-
-print("🏪 Seller analytics")
-
-con.execute("""
-CREATE OR REPLACE VIEW v_seller_performance AS
+"""),
+    # Seller analytics
+    "v_seller_performance": (["v_order_facts"], """
 SELECT
     seller_id,
     seller_state,
@@ -184,16 +240,9 @@ SELECT
     AVG(review_score) AS avg_rating
 FROM v_order_facts
 GROUP BY seller_id, seller_state
-""")
-
-# ---------------------------
-# 8️⃣ PAYMENT ANALYTICS
-# ---------------------------
-
-print("💳 Payment analytics")
-
-con.execute("""
-CREATE OR REPLACE VIEW v_payment_analysis AS
+"""),
+    # Payment analytics
+    "v_payment_analysis": (["payments"], """
 SELECT
     payment_type,
     COUNT(DISTINCT order_id) AS orders,
@@ -201,28 +250,18 @@ SELECT
     AVG(payment_value) AS avg_payment
 FROM payments
 GROUP BY payment_type
-""")
-
-# ---------------------------
-# 9️⃣ TIME INTELLIGENCE
-# ---------------------------
-
-print("📅 Time intelligence")
-
-# Yearly revenue
-con.execute("""
-CREATE OR REPLACE VIEW v_yearly_revenue AS
+"""),
+    # Time intelligence
+    "v_yearly_revenue": (["v_order_facts"], """
 SELECT
     EXTRACT(YEAR FROM order_purchase_timestamp) AS year,
     SUM(payment_value) AS revenue
 FROM v_order_facts
 GROUP BY year
 ORDER BY year
-""")
-
-# order category reveneue
-con.execute("""
-CREATE OR REPLACE VIEW v_order_category_revenue AS
+"""),
+    # Order value
+    "v_order_category_revenue": (["orders", "order_items", "products"], """
 SELECT
     o.order_id,
     p.product_category_name AS category,
@@ -231,28 +270,15 @@ FROM orders o
 JOIN order_items oi ON o.order_id = oi.order_id
 JOIN products p ON oi.product_id = p.product_id
 GROUP BY o.order_id, p.product_category_name
-""")
-
-#derived view
-con.execute("""
-CREATE OR REPLACE VIEW v_category_aov AS
+"""),
+    "v_category_aov": (["v_order_category_revenue"], """
 SELECT
     category,
     ROUND(SUM(revenue) / COUNT(DISTINCT order_id), 2) AS average_order_value
 FROM v_order_category_revenue
 GROUP BY category
-""")
-
-# ---------------------------
-# DONE
-# ---------------------------
-
-print("✅ Database setup complete with analytics views")
-print("📐 Order value metrics")
-
-# Average Order Value (AOV)
-con.execute("""
-CREATE OR REPLACE VIEW v_order_value_metrics AS
+"""),
+    "v_order_value_metrics": (["v_order_facts"], """
 SELECT
     COUNT(DISTINCT order_id) AS total_orders,
     SUM(payment_value) AS total_revenue,
@@ -261,14 +287,130 @@ SELECT
         2
     ) AS average_order_value
 FROM v_order_facts
-""")
-con.execute("""
-CREATE OR REPLACE VIEW v_category_aov AS
-SELECT
-    category,
-    ROUND(SUM(revenue) / COUNT(DISTINCT order_id), 2) AS average_order_value
-FROM v_order_category_revenue
-GROUP BY category
-""")
+"""),
+}
+
+STEPS += [
+    BuildStep(name, deps=deps, sql=f"CREATE OR REPLACE VIEW {name} AS {select}", label=f"🔎 {name}")
+    for name, (deps, select) in views.items()
+]
+
+# ---------------------------
+# 4️⃣ TOP-K RANKED TABLES, STRATIFIED SAMPLE (approximate mode), GEO + LOGISTICS MARTS, COHORTS, SKETCHES
+# ---------------------------
+
+STEPS += [
+    BuildStep(
+        "topk",
+        deps=sorted({view for view, *_ in TOPK_TABLES.values()}),
+        run=build_topk_tables,
+        params={"max_n": TOPK_MAX_N},
+        label="🏆 top-K ranked tables",
+    ),
+    BuildStep(
+        "samples",
+        deps=["f_order_facts"],
+        run=build_sample_tables,
+        params={"fraction": SAMPLE_FRACTION, "min_rows": SAMPLE_MIN_ROWS},
+        label="🎲 stratified sample",
+    ),
+    BuildStep(
+        "geo",
+        deps=["geolocation", "customers", "sellers", "orders", "order_items", "f_order_facts"],
+        run=build_geo_tables,
+        params={"cell_deg": GEO_CELL_DEG},
+        label="🗺️ geo centroids + grid index",
+    ),
+    BuildStep(
+        "logistics",
+        deps=["orders", "order_items", "products", "customers", "sellers"],
+        run=build_logistics_mart,
+        params={"bucket_days": LOGISTICS_BUCKET_DAYS},
+        label="🚚 logistics mart + lead-time histograms",
+    ),
+    BuildStep(
+        "cohorts",
+        deps=["orders", "customers", "payments"],
+        run=build_cohort_tables,
+        label="👥 customer cohorts + retention matrices",
+    ),
+    BuildStep(
+        "sketches",
+        deps=["f_order_facts", "customers"],
+        run=build_sketch_tables,
+        params={"precision": SKETCH_HLL_PRECISION, "relative_accuracy": SKETCH_RELATIVE_ACCURACY},
+        label="🧮 HyperLogLog + quantile sketches",
+    ),
+]
+
+
+# ---------------------------
+# Build
+# ---------------------------
 
-con.close()
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python db/setup_db.py")
+    parser.add_argument("--target", action="append", help="rebuild this step (repeatable)")
+    parser.add_argument("--full", action="store_true", help="rebuild everything from an empty database")
+    parser.add_argument("--workers", type=int, default=BUILD_WORKERS)
+    parser.add_argument("--list", action="store_true", help="show steps and dependencies")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for step in topological(STEPS):
+            print(f"{step.name:<28} ← {', '.join(step.deps) or '-'}")
+        return
+
+    os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
+
+    # Built as a new snapshot, published atomically at the end: running
+    # readers keep serving the previous one. Incremental builds start
+    # from a copy of it and only redo what changed.
+    build_path = new_build_path(DB_PATH)
+    base = active_path(DB_PATH)
+    if not args.full and os.path.exists(base):
+        shutil.copyfile(base, build_path)
+        print("📦 Updating Olist database snapshot for:", DB_PATH)
+    else:
+        print("📦 Creating Olist database snapshot for:", DB_PATH)
+
+    t0 = time.perf_counter()
+    # The only writer: every other connection is read-only
+    con = connect(build_path, read_only=False)
+    try:
+        report = run_dag(con, STEPS, targets=args.target, force=args.full, workers=args.workers)
+    except Exception:
+        con.close()
+        os.remove(build_path)
+        raise
+    con.close()
+    wall = time.perf_counter() - t0
+
+    ran = [r for r in report if r[1] == RAN]
+    print(f"\n{'step':<28}{'status':>9}{'seconds':>10}")
+    print("-" * 47)
+    for name, status, seconds in report:
+        print(f"{name:<28}{status:>9}{seconds:>10.2f}")
+    print(f"⏱ {len(ran)} step(s) in {wall:.2f}s wall, {sum(r[2] for r in ran):.2f}s total")
+
+    # ---------------------------
+    # 📸 PUBLISH SNAPSHOT
+    # ---------------------------
+
+    if ran:
+        print("📸 Published snapshot:", publish(build_path, DB_PATH))
+    else:
+        os.remove(build_path)
+        print("✅ Nothing changed, current snapshot kept")
+
+    # ---------------------------
+    # 📚 KNOWLEDGE ARTIFACT
+    # ---------------------------
+
+    print("📚 Compiling knowledge artifact")
+
+    build_artifact()
+
+
+if __name__ == "__main__":
+    main()
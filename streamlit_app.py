@@ -15,9 +15,11 @@ if ROOT_DIR not in sys.path:
 # --------------------------------------------------
 # Imports
 # --------------------------------------------------
-from agent.agent_core import answer
-from agent.llm_explain import explain
-from agent.chart import plot
+from agent.agent_core import answer, warmup
+from agent.explain_cache import cache_key, start_pregeneration
+from agent.explain_queue import get_queue, DONE
+from agent.config import EXPLAIN_PREGENERATE, EXPLAIN_SPECULATIVE
+from agent.chart import render_chart
 from agent.knowledge import get_category_context
 
 # --------------------------------------------------
@@ -28,6 +30,24 @@ st.set_page_config(
     layout="wide",
 )
 
+# --------------------------------------------------
+# Warmup (once per process, while the page renders)
+# --------------------------------------------------
+@st.cache_resource
+def start_warmup():
+    import threading
+
+    def run():
+        warmup()
+        if EXPLAIN_PREGENERATE:
+            start_pregeneration()
+
+    threading.Thread(target=run, name="olist-warmup", daemon=True).start()
+    return True
+
+
+start_warmup()
+
 st.title("🛒 Olist Analytics Assistant")
 st.caption("Conversational analytics on Brazilian e-commerce data (Olist 2016–2018)")
 
@@ -46,6 +66,11 @@ if "last_result" not in st.session_state:
 if "explanations" not in st.session_state:
     st.session_state.explanations = {}
 
+if "session_id" not in st.session_state:
+    import uuid
+
+    st.session_state.session_id = uuid.uuid4().hex
+
 # --------------------------------------------------
 # Helpers
 # --------------------------------------------------
@@ -123,6 +148,13 @@ if q:
         result = answer(q)
         st.session_state.last_result = result
         st.session_state.last_question = q
+
+        # Start the explanation now; the user may click "Explain" later
+        if EXPLAIN_SPECULATIVE and isinstance(result, dict):
+            get_queue().submit(
+                q, result["df"], result["intent"], result["filters"],
+                session=st.session_state.session_id,
+            )
     else:
         result = st.session_state.last_result
 
@@ -143,6 +175,11 @@ if q:
         # -------------------------------
         st.markdown("## 📊 Analysis Result")
         st.markdown(result["summary"])
+        if result.get("truncated"):
+            st.warning(
+                f"Showing the first {len(df):,} rows only — narrow the question "
+                "(a category, a year or a smaller top N) to see everything."
+            )
 
         # -------------------------------
         # KPI cards
@@ -163,8 +200,8 @@ if q:
         if view == "📋 Table":
             st.dataframe(df, use_container_width=True)
         else:
-            fig = plot(df, df.columns[0], df.columns[1])
-            st.pyplot(fig)
+            # Cached by result + chart spec: toggling back is free
+            st.image(render_chart(df, df.columns[0], df.columns[1]))
 
         # -------------------------------
         # Download
@@ -198,6 +235,23 @@ if q:
         if result.get("insight"):
             st.success(result["insight"])
 
+        # -------------------------------
+        # Pipeline timing (trace)
+        # -------------------------------
+        trace = result.get("trace")
+        if trace:
+            with st.expander("⏱ Pipeline timing"):
+                attrs = trace["attributes"]
+                st.caption(
+                    f"Total {trace['total_ms']:.1f} ms · "
+                    f"resolved via {attrs.get('resolution', '—')} · "
+                    f"engine {attrs.get('engine', '—')}"
+                )
+                st.dataframe(
+                    pd.DataFrame(trace["spans"])[["name", "duration_ms"]],
+                    use_container_width=True,
+                )
+
         st.markdown("---")
 
         # -------------------------------
@@ -205,13 +259,26 @@ if q:
         # -------------------------------
         st.markdown("## 🤖 AI Explanation")
 
+        # Keyed by the result itself, so rephrased questions share explanations
+        key = cache_key(result["intent"], result["filters"], result["df"])
+
+        if key not in st.session_state.explanations and get_queue().status(key) == DONE:
+            st.caption("✅ Explanation ready")
+
         if st.button("🧠 Explain this result"):
-            if q not in st.session_state.explanations:
+            if key not in st.session_state.explanations:
                 with st.spinner("Generating explanation..."):
-                    st.session_state.explanations[q] = explain(q, df)
-
-        if q in st.session_state.explanations:
-            st.write(st.session_state.explanations[q])
+                    st.session_state.explanations[key] = get_queue().fetch(
+                        q, result["df"], result["intent"], result["filters"]
+                    )
+
+        if key in st.session_state.explanations:
+            text, report, cached = st.session_state.explanations[key]
+            st.write(text)
+            st.caption(
+                f"Prompt: ~{report['prompt_tokens']} tokens"
+                + (" · from cache" if cached else "")
+            )
 
 # --------------------------------------------------
 # Conversation history
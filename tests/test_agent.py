@@ -8,6 +8,8 @@ Covers:
 - Revenue analytics
 - AOV analytics
 - Follow-ups
+- Time windows
+- Approximate mode
 - Translation & enrichment
 - Insight generation
 - Safety
@@ -155,6 +157,14 @@ def main():
         reset=False,
     )
 
+    run_test(
+        "Revenue follow-up bottom 3",
+        "bottom 3",
+        metric="revenue",
+        exact_rows=3,
+        reset=False,
+    )
+
     run_test(
         "Filtered revenue (category alias)",
         "show revenue for bed bath",
@@ -203,6 +213,43 @@ def main():
         reset=False,
     )
 
+    # ------------------------------
+    # Time windows (anchored to dataset max date)
+    # ------------------------------
+    reset_memory()
+    run_test(
+        "Revenue by category, last 6 months",
+        "show revenue by category last 6 months",
+        metric="revenue",
+        min_rows=5,
+        reset=False,
+    )
+
+    run_test(
+        "Windowed follow-up top 3",
+        "top 3",
+        metric="revenue",
+        exact_rows=3,
+        reset=False,
+    )
+
+    run_test(
+        "Quarter window",
+        "show yearly revenue for Q3 2017",
+        metric="revenue",
+        exact_rows=1,
+    )
+
+    # ------------------------------
+    # Approximate mode (stratified sample + CI)
+    # ------------------------------
+    run_test(
+        "Approximate revenue by category",
+        "roughly, show revenue by category",
+        metric="revenue",
+        min_rows=5,
+    )
+
     # ------------------------------
     # Safety & robustness
     # ------------------------------
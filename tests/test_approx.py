@@ -0,0 +1,102 @@
+"""
+Approximate mode: stratified estimates vs the exact SQL templates.
+"""
+
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import db
+from agent.agent_core import _db_path, apply_filters
+from agent.approx import APPROX_INTENTS, approximate_sql, wants_approximate
+from agent.sql_guardrails import validate_sql
+from agent.sql_templates import SQL_TEMPLATES
+
+CI = ["revenue_ci_low", "revenue_ci_high"]
+
+
+@pytest.fixture(scope="module")
+def con():
+    con = db.connect(_db_path())
+    yield con
+    con.close()
+
+
+def _cases(intent):
+    groups = APPROX_INTENTS[intent][0]
+    cases = [{}, {"limit": 3, "order": "asc"}]
+    if "category" in groups:
+        cases.append({"category": "pet_shop"})
+    if "year" in groups:
+        cases.append({"year": 2017})
+    return cases
+
+
+def _compare(con, intent, filters):
+    """(estimate, exact) frames; exact as the template answers the same filters."""
+    default_limit = APPROX_INTENTS[intent][2]
+    if filters and default_limit and "limit" not in filters:
+        filters = {**filters, "limit": default_limit}
+    sql = approximate_sql(intent, filters)
+    assert validate_sql(sql)
+    got = con.execute(sql).df()
+    expected = con.execute(apply_filters(SQL_TEMPLATES[intent], filters)).df()
+    expected["revenue"] = expected["revenue"].astype(float)
+    return got, expected
+
+
+def test_estimates_have_the_template_shape(con):
+    for intent in sorted(APPROX_INTENTS):
+        for filters in _cases(intent):
+            got, expected = _compare(con, intent, filters)
+            assert list(got.columns) == list(expected.columns) + CI, (intent, filters)
+            assert len(got) == len(expected), (intent, filters)
+
+            keys = [c for c in expected.columns if c != "revenue"]
+            assert sorted(map(tuple, got[keys].values)) == sorted(map(tuple, expected[keys].values))
+            if APPROX_INTENTS[intent][1] in ("year", "year_month"):
+                pd.testing.assert_frame_equal(got[keys], expected[keys], check_dtype=False)
+
+            assert (got["revenue_ci_low"] <= got["revenue"]).all()
+            assert (got["revenue"] <= got["revenue_ci_high"]).all()
+
+
+def test_confidence_intervals_cover_the_exact_revenue(con):
+    inside, rows = 0, 0
+    for intent in sorted(APPROX_INTENTS):
+        got, expected = _compare(con, intent, {})
+        keys = [c for c in expected.columns if c != "revenue"]
+        both = got.merge(expected, on=keys, suffixes=("", "_exact"))
+        # Fully sampled strata have zero width; the templates round to cents
+        inside += (
+            (both["revenue_ci_low"] - 0.01 <= both["revenue_exact"])
+            & (both["revenue_exact"] <= both["revenue_ci_high"] + 0.01)
+        ).sum()
+        rows += len(both)
+    assert inside / rows >= 0.85
+
+
+def test_order_limit_and_filters(con):
+    bottom, _ = _compare(con, "revenue_by_category", {"limit": 3, "order": "asc"})
+    assert len(bottom) == 3 and bottom["revenue"].is_monotonic_increasing
+
+    years, _ = _compare(con, "category_revenue_by_year", {"year": 2017})
+    assert set(years["year"]) == {2017}
+
+    pet, _ = _compare(con, "revenue_by_category", {"category": "pet_shop"})
+    assert list(pet["category"]) == ["pet_shop"]
+
+
+def test_unsupported_intents_and_filters_return_none():
+    assert approximate_sql("average_order_value", {}) is None
+    assert approximate_sql("revenue_by_category", {"window": ("2017-01-01", "2017-02-01")}) is None
+    assert approximate_sql("monthly_revenue_trend", {"month": "2017-01"}) is None
+
+    assert wants_approximate("roughly how much revenue per category?")
+    assert not wants_approximate("revenue per category")
@@ -0,0 +1,93 @@
+"""
+Build DAG: dependency order, parallel steps, skip-unchanged and target rebuilds.
+"""
+
+import sys
+import os
+import threading
+import time
+
+import duckdb
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.build_dag import RAN, SKIPPED, BuildStep, run_dag, topological
+
+
+def _steps(csv_path):
+    return [
+        BuildStep("raw", sql=f"CREATE OR REPLACE TABLE raw AS SELECT * FROM read_csv_auto('{csv_path}')",
+                  inputs=[csv_path]),
+        BuildStep("total", deps=["raw"], sql="CREATE OR REPLACE TABLE total AS SELECT SUM(v) AS s FROM raw"),
+        BuildStep("top", deps=["raw"], sql="CREATE OR REPLACE TABLE top AS SELECT MAX(v) AS m FROM raw"),
+    ]
+
+
+def _status(report):
+    return {name: status for name, status, _ in report}
+
+
+def test_skips_unchanged_and_rebuilds_changed_inputs(tmp_path):
+    csv = tmp_path / "raw.csv"
+    csv.write_text("v\n1\n2\n")
+    con = duckdb.connect(str(tmp_path / "b.db"))
+    log = lambda *_: None
+
+    assert set(_status(run_dag(con, _steps(str(csv)), log=log)).values()) == {RAN}
+    assert set(_status(run_dag(con, _steps(str(csv)), log=log)).values()) == {SKIPPED}
+
+    csv.write_text("v\n1\n2\n10\n")
+    assert set(_status(run_dag(con, _steps(str(csv)), log=log)).values()) == {RAN}
+    assert con.execute("SELECT s FROM total").fetchone()[0] == 13
+
+    # Changing one step's SQL re-runs that step only
+    steps = _steps(str(csv))
+    steps[2] = BuildStep("top", deps=["raw"], sql="CREATE OR REPLACE TABLE top AS SELECT MIN(v) AS m FROM raw")
+    assert _status(run_dag(con, steps, log=log)) == {"raw": SKIPPED, "total": SKIPPED, "top": RAN}
+
+
+def test_single_target_rebuild(tmp_path):
+    csv = tmp_path / "raw.csv"
+    csv.write_text("v\n1\n")
+    con = duckdb.connect(str(tmp_path / "b.db"))
+    run_dag(con, _steps(str(csv)), log=lambda *_: None)
+
+    report = run_dag(con, _steps(str(csv)), targets=["total"], log=lambda *_: None)
+    assert _status(report) == {"raw": SKIPPED, "total": RAN, "top": SKIPPED}
+
+    with pytest.raises(ValueError):
+        run_dag(con, _steps(str(csv)), targets=["nope"], log=lambda *_: None)
+
+
+def test_independent_steps_run_in_parallel(tmp_path):
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def slow(con, name):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.2)
+        con.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT 1 AS v")
+        with lock:
+            active[0] -= 1
+
+    steps = [BuildStep(f"t{i}", run=slow, params={"name": f"t{i}"}) for i in range(4)]
+    steps.append(BuildStep("all", deps=[s.name for s in steps],
+                           sql="CREATE TABLE all_t AS SELECT * FROM t0, t1, t2, t3"))
+    con = duckdb.connect(str(tmp_path / "b.db"))
+
+    t0 = time.perf_counter()
+    report = run_dag(con, steps, workers=4, log=lambda *_: None)
+    assert peak[0] == 4
+    assert time.perf_counter() - t0 < 0.6
+    assert [name for name, *_ in report][-1] == "all"
+    assert con.execute("SELECT COUNT(*) FROM all_t").fetchone()[0] == 1
+
+
+def test_cycle_is_rejected():
+    steps = [BuildStep("a", deps=["b"], sql="SELECT 1"), BuildStep("b", deps=["a"], sql="SELECT 1")]
+    with pytest.raises(ValueError, match="cycle"):
+        topological(steps)
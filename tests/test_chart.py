@@ -0,0 +1,60 @@
+"""
+Chart rendering: image cache, formats and bounded figure size.
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import chart
+from agent.chart import ChartCache, plot, render_chart
+
+
+def _df(n=5):
+    return pd.DataFrame({
+        "category": [f"cat_{i}" for i in range(n)],
+        "revenue": [1000.0 * (n - i) for i in range(n)],
+    })
+
+
+def test_same_result_renders_once(monkeypatch):
+    monkeypatch.setattr(chart, "CACHE", ChartCache(1024 * 1024))
+    calls = []
+    real = chart._render
+    monkeypatch.setattr(chart, "_render", lambda *a: calls.append(a) or real(*a))
+
+    first = render_chart(_df(), "category", "revenue")
+    again = render_chart(_df(), "category", "revenue")
+
+    assert first.startswith(b"\x89PNG")
+    assert again is first
+    assert len(calls) == 1
+
+
+def test_svg_and_png_are_cached_separately(monkeypatch):
+    monkeypatch.setattr(chart, "CACHE", ChartCache(1024 * 1024))
+
+    svg = render_chart(_df(), "category", "revenue", fmt="svg")
+    png = render_chart(_df(), "category", "revenue")
+
+    assert b"<svg" in svg[:500]
+    assert len(chart.CACHE) == 2 and png != svg
+
+
+def test_large_results_draw_bounded_figures(monkeypatch):
+    fig = plot(_df(500), "category", "revenue")
+    assert len(fig.axes[0].patches) == chart.CHART_MAX_BARS
+
+    monkeypatch.setattr(chart, "CHART_MAX_HEIGHT_IN", 5)
+    assert plot(_df(40), "category", "revenue").get_figheight() == 5
+
+    cache = ChartCache(max_bytes=10)
+    cache.put("a", b"123456")
+    cache.put("b", b"123456")
+    assert cache.get("a") is None and cache.get("b") == b"123456"
+    assert cache.bytes == 6
@@ -0,0 +1,66 @@
+"""
+Chart data reduction: top N + Other, LTTB and min/max downsampling.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.chart_data import lttb_indices, minmax_indices, reduce_for_chart, top_n_other
+
+
+def test_top_n_folds_the_rest_into_other():
+    df = pd.DataFrame({"category": [f"c{i}" for i in range(70)], "revenue": np.arange(70.0)})
+
+    out = top_n_other(df, "category", "revenue", n=5)
+
+    assert list(out["category"]) == ["c69", "c68", "c67", "c66", "Other (66)"]
+    assert out["revenue"].sum() == df["revenue"].sum()
+
+    aov = df.rename(columns={"revenue": "avg_order_value"})
+    other = top_n_other(aov, "category", "avg_order_value", n=5)["avg_order_value"].iloc[-1]
+    assert other == np.arange(66.0).mean()
+
+
+def test_bottom_n_keeps_the_smallest_rows():
+    df = pd.DataFrame({"category": [f"c{i}" for i in range(70)], "revenue": np.arange(70.0)})
+
+    out = top_n_other(df, "category", "revenue", n=5, ascending=True)
+    assert list(out["category"]) == ["c0", "c1", "c2", "c3", "Other (66)"]
+
+    # A result ranked ascending is reduced to its bottom rows, in order
+    out, note = reduce_for_chart(df, "category", "revenue", max_bars=5)
+    assert list(out["category"]) == ["c0", "c1", "c2", "c3", "Other (66)"]
+    assert note == "Bottom 4 of 70"
+
+    out, note = reduce_for_chart(df.iloc[::-1], "category", "revenue", max_bars=5)
+    assert list(out["category"])[:4] == ["c69", "c68", "c67", "c66"] and note == "Top 4 of 70"
+
+
+def test_downsampling_keeps_endpoints_and_extremes():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=10_000)
+    y[4321] = 50.0
+
+    lttb = lttb_indices(y, 200)
+    assert len(lttb) == 200 and lttb[0] == 0 and lttb[-1] == len(y) - 1
+    assert np.all(np.diff(lttb) > 0)
+    assert 4321 in lttb
+
+    mm = minmax_indices(y, 200)
+    assert len(mm) <= 200 and y.argmax() in mm and y.argmin() in mm
+
+
+def test_reduce_for_chart_bounds_marks():
+    months = pd.DataFrame({"year_month": np.arange(5_000).astype(str), "revenue": np.random.rand(5_000)})
+    out, note = reduce_for_chart(months, "year_month", "revenue", max_points=300)
+    assert len(out) == 300 and note == "300 of 5,000 points"
+
+    small = pd.DataFrame({"category": ["a", "b"], "revenue": [1.0, 2.0]})
+    assert reduce_for_chart(small, "category", "revenue") == (small, None)
@@ -0,0 +1,109 @@
+"""
+Cohorts: engine vs SQL templates, incremental rebuilds and customer_unique_id semantics.
+"""
+
+import sys
+import os
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.cohorts import COHORT_INTENTS, CohortEngine, build_cohort_tables
+from agent.sql_guardrails import validate_sql
+from agent.sql_templates import SQL_TEMPLATES
+
+
+def _orders(seed=3, people=300):
+    """(order_id, customer_id, unique_id, status, purchase ts, payment) rows over 2017."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for person in range(people):
+        first = int(rng.integers(1, 13))
+        months = [first] + [m for m in range(first + 1, 13) if rng.random() < 0.15]
+        for month in months:
+            i = len(rows)
+            status = "canceled" if rng.random() < 0.05 else "delivered"
+            rows.append((f"o{i}", f"c{i}", f"u{person}", status,
+                         f"2017-{month:02d}-{int(rng.integers(1, 28)):02d} 10:00:00", float(rng.integers(10, 500))))
+    return rows
+
+
+def _load(con, rows):
+    con.execute("CREATE OR REPLACE TABLE customers (customer_id TEXT, customer_unique_id TEXT)")
+    con.execute("""CREATE OR REPLACE TABLE orders (order_id TEXT, customer_id TEXT, order_status TEXT,
+                   order_purchase_timestamp TIMESTAMP)""")
+    con.execute("CREATE OR REPLACE TABLE payments (order_id TEXT, payment_value DOUBLE)")
+    con.executemany("INSERT INTO customers VALUES (?, ?)", [(r[1], r[2]) for r in rows])
+    con.executemany("INSERT INTO orders VALUES (?, ?, ?, ?)", [(r[0], r[1], r[3], r[4]) for r in rows])
+    # Two payment rows per order (e.g. voucher + card)
+    con.executemany("INSERT INTO payments VALUES (?, ?)",
+                    [(r[0], r[5] / 2) for r in rows] + [(r[0], r[5] / 2) for r in rows])
+
+
+@pytest.fixture(scope="module")
+def con():
+    con = duckdb.connect()
+    _load(con, _orders())
+    build_cohort_tables(con)
+    return con
+
+
+def test_engine_matches_sql_templates(con):
+    engine = CohortEngine(con)
+    for intent in sorted(COHORT_INTENTS):
+        assert validate_sql(SQL_TEMPLATES[intent])
+        expected = con.execute(SQL_TEMPLATES[intent]).df()
+        got = engine.query(intent, {})
+        pd.testing.assert_frame_equal(got, expected, check_dtype=False, atol=1e-4)
+
+    assert len(engine.query("cohort_retention", {"limit": 3})) == 3
+    assert engine.query("cohort_retention", {"category": "pet_shop"}) is None
+
+    ltv = engine.query("cohort_ltv", {}).set_index("cohort_month")
+    assert np.isnan(ltv.loc["2017-11", "ltv_3m"]) and not np.isnan(ltv.loc["2017-10", "ltv_3m"])
+
+
+def test_incremental_build_matches_full_build():
+    rows = _orders(seed=11)
+    cutoff = "2017-10"
+
+    con = duckdb.connect()
+    _load(con, [r for r in rows if r[4][:7] <= cutoff])
+    assert build_cohort_tables(con) is None
+    _load(con, rows)
+    assert build_cohort_tables(con) == cutoff
+
+    full = duckdb.connect()
+    _load(full, rows)
+    build_cohort_tables(full)
+    for table in ("cohort_activity", "cohort_matrix", "cohort_customers"):
+        query = f"SELECT * FROM {table} ORDER BY ALL"
+        pd.testing.assert_frame_equal(con.execute(query).df(), full.execute(query).df(), check_dtype=False)
+
+    # A change before the watermark forces a full rebuild
+    con.execute("UPDATE payments SET payment_value = payment_value + 1 WHERE order_id = 'o0'")
+    assert build_cohort_tables(con) is None
+
+
+def test_repeat_customers_follow_customer_unique_id():
+    con = duckdb.connect()
+    _load(con, [
+        ("o1", "c1", "alice", "delivered", "2017-01-05 10:00:00", 100.0),
+        ("o2", "c2", "alice", "delivered", "2017-03-05 10:00:00", 50.0),   # new customer_id, same person
+        ("o3", "c3", "bob", "delivered", "2017-01-20 10:00:00", 80.0),
+        ("o4", "c4", "bob", "canceled", "2017-02-20 10:00:00", 80.0),      # never shipped
+    ])
+    build_cohort_tables(con)
+
+    repeat = con.execute(SQL_TEMPLATES["repeat_purchase_rate"]).fetchall()
+    assert repeat == [("2017-01", 2, 1, 0.5)]
+
+    retention = CohortEngine(con).query("cohort_retention", {}).iloc[0]
+    assert (retention["customers"], retention["m1"], retention["m2"]) == (2, 0.0, 0.5)
+    assert np.isnan(retention["m3"])
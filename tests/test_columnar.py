@@ -0,0 +1,123 @@
+"""
+Columnar engine: every hot intent matches its SQL template, with and without filters.
+"""
+
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import columnar, db
+from agent.agent_core import _db_path, applicable_filters, apply_filters
+from agent.columnar import HOT_INTENTS, SUPPORTED_FILTERS, ColumnarEngine
+from agent.sql_templates import SQL_TEMPLATES
+from agent.time_windows import apply_time_window
+
+WINDOW = ("2017-03-15", "2017-09-01")
+
+# Filters per group: column filters, a mid-month window and combinations
+CASES = {
+    "category": [{"category": "pet_shop"}, {"window": WINDOW}, {"category": "pet_shop", "window": WINDOW},
+                 {"limit": 3}],
+    "year_category": [{"year": 2017}, {"category": "pet_shop", "window": WINDOW}, {"year": 2018, "limit": 5}],
+    "year": [{"window": WINDOW}, {"year": 2017}],
+    "year_month": [{"month": "2017"}, {"month": "2018-0", "window": ("2018-02-10", "2018-06-20")},
+                   {"window": WINDOW, "limit": 4}],
+    "customer_state": [{"window": WINDOW}, {"limit": 5}],
+    "total": [{"window": WINDOW}],
+}
+
+
+@pytest.fixture(scope="module")
+def con():
+    con = db.connect(_db_path())
+    yield con
+    con.close()
+
+
+@pytest.fixture(scope="module")
+def engine(con):
+    return ColumnarEngine(con)
+
+
+def _sql(con, intent, filters):
+    """The SQL fallback execute_intent() would run for these filters."""
+    default_limit = HOT_INTENTS[intent][3]
+    if filters and default_limit and "limit" not in filters:
+        # apply_filters() rewrites the LIMIT; keep the intent's own
+        filters = {**filters, "limit": default_limit}
+    sql = apply_filters(SQL_TEMPLATES[intent], filters)
+    if "window" in filters:
+        sql = apply_time_window(sql, *filters["window"])
+    return con.execute(sql).df()
+
+
+def _assert_matches(engine, con, intent, filters):
+    filters = applicable_filters(SQL_TEMPLATES[intent], filters)
+    got = engine.query(intent, filters)
+    assert got is not None, (intent, filters)
+    expected = _sql(con, intent, filters)
+    for column in got.columns:
+        if pd.api.types.is_numeric_dtype(got[column]):
+            expected[column] = expected[column].astype(float)  # ROUND() returns DECIMAL
+
+    # Half-cent averages can round apart (exact DECIMAL in SQL, float64 here)
+    atol = 0.011
+
+    _, measure, order, _ = HOT_INTENTS[intent]
+    if order in ("asc", "desc"):
+        # Same ranking; rows tied on the measure may come back in any order from SQL
+        pd.testing.assert_series_equal(got[measure], expected[measure], check_dtype=False, atol=atol)
+        got, expected = (d.sort_values(list(d.columns)).reset_index(drop=True) for d in (got, expected))
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False, atol=atol, obj=f"{intent} {filters}")
+
+
+def test_supported_filters_cover_every_group():
+    assert {spec[0] for spec in HOT_INTENTS.values()} == set(SUPPORTED_FILTERS) == set(CASES)
+    assert set(HOT_INTENTS) <= set(SQL_TEMPLATES)
+
+
+@pytest.mark.parametrize("intent", sorted(HOT_INTENTS))
+def test_unfiltered_intent_matches_template(engine, con, intent):
+    _assert_matches(engine, con, intent, {})
+
+
+@pytest.mark.parametrize("intent", sorted(HOT_INTENTS))
+def test_filtered_intent_matches_template(engine, con, intent):
+    # category / customer_state use bincount, year / year_month the reduceat runs
+    for filters in CASES[HOT_INTENTS[intent][0]]:
+        _assert_matches(engine, con, intent, filters)
+
+
+def test_unsupported_filters_fall_back_to_sql(engine):
+    assert engine.query("monthly_revenue_trend", {"category": "pet_shop"}) is None
+    assert engine.query("revenue_by_category", {"order": "asc"}) is None
+    assert engine.query("customer_lifetime_value", {"year": 2017}) is None
+    assert engine.query("payment_value_percentiles", {}) is None
+    assert not engine.supports("not_an_intent", {})
+
+
+def test_get_engine_keeps_one_snapshot(monkeypatch):
+    opened = []
+
+    class FakeCon:
+        def close(self):
+            pass
+
+    monkeypatch.setattr(db, "connect", lambda path: opened.append(path) or FakeCon())
+    monkeypatch.setattr(columnar, "ColumnarEngine", lambda con: object())
+    columnar.reset_engines()
+    try:
+        first = columnar.get_engine("snap-1")
+        assert columnar.get_engine("snap-1") is first
+        # A new snapshot replaces the arrays of the previous one
+        second = columnar.get_engine("snap-2")
+        assert second is not first and list(columnar._engines) == ["snap-2"]
+        assert opened == ["snap-1", "snap-2"]
+    finally:
+        columnar.reset_engines()
@@ -0,0 +1,49 @@
+"""
+DuckDB runtime profiles: settings resolution and connections.
+"""
+
+import sys
+import os
+
+import duckdb
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import db
+
+
+def test_profile_with_env_overrides(monkeypatch):
+    assert db.runtime_settings("default") == {}
+    assert db.runtime_settings("interactive")["threads"] == 2
+
+    monkeypatch.setattr(db, "DB_THREADS", 3)
+    monkeypatch.setattr(db, "DB_TEMP_DIR", "/tmp/spill")
+    settings = db.runtime_settings("interactive")
+    assert settings["threads"] == 3 and settings["temp_directory"] == "/tmp/spill"
+
+    with pytest.raises(ValueError, match="Unknown DB profile"):
+        db.runtime_settings("turbo")
+
+
+def test_connect_applies_profile_read_only(tmp_path):
+    path = str(tmp_path / "t.db")
+    duckdb.connect(path).close()
+
+    con = db.connect(path, profile="interactive")
+    try:
+        settings = dict(con.execute(
+            "SELECT name, value FROM duckdb_settings() WHERE name IN ('threads', 'access_mode')"
+        ).fetchall())
+        assert settings == {"threads": "2", "access_mode": "read_only"}
+        with pytest.raises(duckdb.Error):
+            con.execute("CREATE TABLE x (i INTEGER)")
+    finally:
+        con.close()
+
+
+def test_percent_memory_limit_is_resolved():
+    assert db._memory_limit("2GB") == "2GB"
+    assert db._memory_limit("50%").endswith("MB")
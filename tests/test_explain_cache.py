@@ -0,0 +1,58 @@
+"""
+Explanation cache: result-keyed lookups, eviction and failure handling.
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import explain_cache, llm_explain
+from agent.explain_cache import ExplanationCache, cache_key, explain_cached
+from agent.llm_client import LLM_UNAVAILABLE
+
+
+def _df(revenue=100.0):
+    return pd.DataFrame({"category": ["pet_shop"], "revenue": [revenue]})
+
+
+def test_key_depends_on_result_not_question():
+    assert cache_key("revenue_by_category", {}, _df()) == cache_key("revenue_by_category", {}, _df())
+    assert cache_key("revenue_by_category", {}, _df()) != cache_key("revenue_by_category", {}, _df(101.0))
+    assert cache_key("revenue_by_category", {}, _df()) != cache_key("revenue_by_category", {"limit": 3}, _df())
+
+
+def test_rephrased_questions_share_one_generation(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_explain(question, df):
+        calls.append(question)
+        return "Pet shop leads.", {"prompt_tokens": 42}
+
+    monkeypatch.setattr(explain_cache, "_cache", ExplanationCache(str(tmp_path / "c.sqlite")))
+    monkeypatch.setattr(llm_explain, "explain_with_report", fake_explain)
+
+    first = explain_cached("revenue by category", _df(), "revenue_by_category", {})
+    second = explain_cached("category wise revenue", _df(), "revenue_by_category", {})
+
+    assert calls == ["revenue by category"]
+    assert first[0] == second[0] == "Pet shop leads."
+    assert (first[2], second[2]) == (False, True)
+
+
+def test_failures_are_not_cached_and_lru_evicts(tmp_path, monkeypatch):
+    cache = ExplanationCache(str(tmp_path / "c.sqlite"), max_entries=2)
+    monkeypatch.setattr(explain_cache, "_cache", cache)
+    monkeypatch.setattr(llm_explain, "explain_with_report", lambda q, df: (LLM_UNAVAILABLE, {"prompt_tokens": 1}))
+
+    explain_cached("q", _df(), "revenue_by_category", {})
+    assert len(cache) == 0
+
+    for i in range(3):
+        cache.put(f"k{i}", "revenue_by_category", {}, "text")
+    assert len(cache) == 2
+    assert cache.get("k0") is None
@@ -0,0 +1,80 @@
+"""
+Speculative explanation queue: dedupe, stale drops, priority, take-over.
+"""
+
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import explain_cache
+from agent.explain_queue import ExplanationQueue, DONE, FAILED, QUEUED
+
+
+def _df(value):
+    return pd.DataFrame({"category": ["pet_shop"], "revenue": [float(value)]})
+
+
+def test_jobs_are_deduplicated_and_dropped_when_stale():
+    queue = ExplanationQueue(workers=0)
+
+    a = queue.submit("q", _df(1), "revenue_by_category", {}, session="s1")
+    assert queue.submit("q again", _df(1), "revenue_by_category", {}, session="s2") == a
+    assert len(queue._jobs) == 1
+
+    queue.submit("next", _df(2), "revenue_by_category", {}, session="s1")
+    assert queue.status(a) == QUEUED  # s2 still waits on it
+
+    queue.submit("next", _df(3), "revenue_by_category", {}, session="s2")
+    assert queue.status(a) is None
+
+
+def test_popular_intents_run_first():
+    queue = ExplanationQueue(workers=0)
+    queue.popularity["monthly_revenue_trend"] = 5
+
+    queue.submit("q", _df(1), "revenue_by_category", {})
+    hot = queue.submit("q", _df(2), "monthly_revenue_trend", {})
+
+    assert queue._next_job().key == hot
+
+
+def test_fetch_takes_over_a_queued_job(monkeypatch):
+    calls = []
+
+    def fake_explain_cached(question, df, intent, filters):
+        calls.append(question)
+        return "text", {"prompt_tokens": 1}, False
+
+    monkeypatch.setattr(explain_cache, "explain_cached", fake_explain_cached)
+    queue = ExplanationQueue(workers=0)
+
+    key = queue.submit("q", _df(1), "revenue_by_category", {})
+    assert queue.fetch("q", _df(1), "revenue_by_category", {})[0] == "text"
+    assert queue.status(key) == DONE
+    assert queue.fetch("q", _df(1), "revenue_by_category", {})[0] == "text"
+    assert calls == ["q"]
+
+
+def test_failed_take_over_wakes_waiters(monkeypatch):
+    def failing_explain_cached(question, df, intent, filters):
+        raise RuntimeError("LLM exploded")
+
+    monkeypatch.setattr(explain_cache, "explain_cached", failing_explain_cached)
+    queue = ExplanationQueue(workers=0)
+
+    key = queue.submit("q", _df(1), "revenue_by_category", {})
+    job = queue._jobs[key]
+    with pytest.raises(RuntimeError):
+        queue.fetch("q", _df(1), "revenue_by_category", {})
+
+    assert job.status == FAILED and job.done.is_set()
+    assert queue.status(key) is None  # the next fetch retries
+
+    monkeypatch.setattr(explain_cache, "explain_cached", lambda *a: ("text", {}, False))
+    assert queue.fetch("q", _df(1), "revenue_by_category", {}, timeout=1)[0] == "text"
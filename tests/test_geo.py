@@ -0,0 +1,83 @@
+"""
+Geo analytics: centroid build, radius parsing and the grid-indexed radius rewrite.
+"""
+
+import sys
+import os
+
+import duckdb
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.geo import apply_radius, build_geo_tables, haversine_km, haversine_sql, parse_radius
+from agent.sql_guardrails import validate_sql
+from agent.sql_templates import SQL_TEMPLATES
+
+# zip prefix → (lat, lng, city, state): Sao Paulo, Campinas, Rio, Porto Alegre
+ZIPS = {
+    1310: (-23.561, -46.656, "São Paulo", "SP"),
+    13010: (-22.906, -47.061, "campinas", "SP"),
+    20040: (-22.903, -43.176, "rio de janeiro", "RJ"),
+    90010: (-30.028, -51.228, "porto alegre", "RS"),
+}
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    points = []
+    for zip_prefix, (lat, lng, city, state) in ZIPS.items():
+        points += [(zip_prefix, lat + d, lng - d, city, state) for d in (-0.001, 0.0, 0.001)]
+    points.append((1310, 48.85, 2.35, "São Paulo", "SP"))  # stray point in Paris
+    con.execute("""CREATE TABLE geolocation (geolocation_zip_code_prefix BIGINT, geolocation_lat DOUBLE,
+                   geolocation_lng DOUBLE, geolocation_city TEXT, geolocation_state TEXT)""")
+    con.executemany("INSERT INTO geolocation VALUES (?, ?, ?, ?, ?)", points)
+
+    con.execute("CREATE TABLE customers AS SELECT 'c' || z AS customer_id, z AS customer_zip_code_prefix, "
+                "'SP' AS customer_state FROM (VALUES (1310), (13010), (20040), (90010)) t(z)")
+    con.execute("CREATE TABLE sellers AS SELECT 's1' AS seller_id, 1310 AS seller_zip_code_prefix")
+    con.execute("""CREATE TABLE orders AS SELECT 'o' || z AS order_id, 'c' || z AS customer_id,
+                   TIMESTAMP '2018-01-01' AS order_purchase_timestamp,
+                   TIMESTAMP '2018-01-01' + INTERVAL (z % 7 + 2) DAY AS order_delivered_customer_date,
+                   TIMESTAMP '2018-01-06' AS order_estimated_delivery_date
+                   FROM customers, (SELECT customer_zip_code_prefix AS z) """)
+    con.execute("CREATE TABLE order_items AS SELECT order_id, 's1' AS seller_id FROM orders")
+    con.execute("""CREATE TABLE f_order_facts AS SELECT o.order_id, o.customer_id, 100.0 AS payment_value,
+                   c.customer_state FROM orders o JOIN customers c USING (customer_id)""")
+    build_geo_tables(con, cell_deg=0.5)
+    return con
+
+
+def test_parse_radius():
+    assert parse_radius("revenue within 100 km of São Paulo?") == (100.0, "sao paulo")
+    assert parse_radius("show revenue within 50km from campinas sp in 2017") == (50.0, "campinas sp")
+    km, place = parse_radius("revenue within 10 miles of 01310")
+    assert place == "01310" and km == pytest.approx(16.09, abs=0.01)
+    assert parse_radius("revenue by category") is None
+
+
+def test_centroids_drop_outliers_and_duplicates(con):
+    rows = con.execute("SELECT zip_prefix, lat, lng, city FROM geo_zip ORDER BY zip_prefix").fetchall()
+    assert len(rows) == len(ZIPS)
+    zip_prefix, lat, lng, city = rows[0]
+    assert (zip_prefix, city) == (1310, "sao paulo")
+    assert lat == pytest.approx(-23.561) and lng == pytest.approx(-46.656)
+
+    bands = con.execute("SELECT distance_band, shipments FROM geo_distance_delivery ORDER BY band").fetchall()
+    assert bands == [("< 50 km", 1), ("50–200 km", 1), ("200–500 km", 1), ("500–1000 km", 1)]
+
+
+def test_radius_rewrite_matches_brute_force(con):
+    sp = ZIPS[1310]
+    assert con.execute(f"SELECT {haversine_sql('-23.561', '-46.656', '-22.903', '-43.176')}").fetchone()[0] == \
+        pytest.approx(haversine_km(sp[0], sp[1], -22.903, -43.176))
+
+    for km in (10, 120, 400, 900):
+        sql = apply_radius(SQL_TEMPLATES["revenue_within_radius"], sp[0], sp[1], km)
+        assert validate_sql(sql)
+        got = {city for city, *_ in con.execute(sql).fetchall()}
+        expected = {c for lat, lng, c, _ in ZIPS.values() if haversine_km(sp[0], sp[1], lat, lng) <= km}
+        assert got == {c.replace("ã", "a").lower() for c in expected}
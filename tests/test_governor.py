@@ -0,0 +1,48 @@
+"""
+Query governor: row cap, timeout via interrupt, admission control.
+"""
+
+import sys
+import os
+import threading
+
+import duckdb
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import governor
+from agent.governor import QueryRejected, QueryTimeout, run_governed
+
+
+def test_row_cap_truncates_inside_the_query():
+    con = duckdb.connect()
+    sql = "SELECT range AS id FROM range(1000) ORDER BY id DESC"
+
+    df = run_governed(con, sql, max_rows=10)
+    assert list(df["id"]) == list(range(999, 989, -1))
+    assert df.attrs["truncated"] and df.attrs["row_cap"] == 10
+
+    full = run_governed(con, sql, max_rows=1000)
+    assert len(full) == 1000 and not full.attrs["truncated"]
+
+
+def test_slow_query_is_interrupted():
+    con = duckdb.connect()
+    with pytest.raises(QueryTimeout):
+        run_governed(con, "SELECT COUNT(*) FROM range(10000000000) a", timeout_s=0.2, max_rows=0)
+
+    # The connection stays usable and the slot was released
+    assert run_governed(con, "SELECT 1 AS x")["x"][0] == 1
+
+
+def test_admission_rejects_when_all_slots_busy(monkeypatch):
+    monkeypatch.setattr(governor, "_slots", threading.BoundedSemaphore(1))
+    governor._slots.acquire()
+    try:
+        with pytest.raises(QueryRejected):
+            run_governed(duckdb.connect(), "SELECT 1", admission_wait_s=0.05)
+    finally:
+        governor._slots.release()
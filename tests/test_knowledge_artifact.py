@@ -0,0 +1,42 @@
+"""
+Compiled knowledge artifact: round trip, lookups and staleness.
+"""
+
+import sys
+import os
+import shutil
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import knowledge_artifact
+from agent.knowledge_artifact import KnowledgeArtifact, build_artifact, compile_bytes, load_artifact
+
+
+def test_compiled_sections_use_normalized_keys():
+    kb = KnowledgeArtifact(compile_bytes())
+
+    assert kb.first_contained("aliases", "show revenue for bed bath") == "cama_mesa_banho"
+    assert kb.first_contained("categories", "what is cama mesa banho") is not None
+    assert kb.get("product_info", "cama_mesa_banho") == kb.first_contained("categories", "cama mesa banho")
+    assert kb.get("product_info", "not_a_category") is None
+    assert kb.get("kb", "products.md")
+
+
+def test_stale_artifact_falls_back_to_sources(tmp_path, monkeypatch):
+    src = tmp_path / "knowledge"
+    shutil.copytree(knowledge_artifact.KNOWLEDGE_DIR, src)
+    path = str(tmp_path / "knowledge.bin")
+    build_artifact(path, str(src))
+
+    monkeypatch.setattr(knowledge_artifact, "KNOWLEDGE_DIR", str(src))
+    load_artifact.cache_clear()
+    try:
+        assert load_artifact(path).get("kb", "products.md") != "# Updated\n"
+
+        (src / "products.md").write_text("# Updated\n", encoding="utf-8")
+        load_artifact.cache_clear()
+        assert load_artifact(path).get("kb", "products.md") == "# Updated\n"
+    finally:
+        load_artifact.cache_clear()
@@ -0,0 +1,66 @@
+"""
+LLM paths against the bundled OpenAI-compatible stub (no GPU needed).
+"""
+
+import sys
+import os
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tools.llm_stub_server import StubServer
+from agent import llm_client
+from agent.llm_client import LLM_UNAVAILABLE, llm_generate
+from agent.llm_intent import llm_detect_intent
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    def start(**behaviour):
+        server = StubServer(**behaviour).start()
+        monkeypatch.setattr(llm_client, "LLM_BASE_URL", server.base_url)
+        monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 0)
+        llm_client.get_client.cache_clear()
+        servers.append(server)
+        return server
+
+    servers = []
+    yield start
+    for server in servers:
+        server.stop()
+    llm_client.get_client.cache_clear()
+
+
+def test_intent_and_explanation_round_trip(stub):
+    server = stub(latency="fixed:5")
+    allowed = ["highest_revenue_category", "revenue_by_category", "monthly_revenue_trend"]
+
+    assert llm_detect_intent("show revenue for bed bath", allowed) == "highest_revenue_category"
+    assert llm_detect_intent("revenue per month please", allowed) == "monthly_revenue_trend"
+    assert llm_detect_intent("asdfghjkl", allowed) is None
+    assert llm_generate("Explain this result").startswith("This result")
+    assert server.behaviour.stats["requests"] == 4
+
+
+def test_injected_failures_degrade_gracefully(stub):
+    stub(fail_rate=1.0, fail_status=503)
+
+    assert llm_detect_intent("show revenue for bed bath", ["revenue_by_category"]) is None
+    assert llm_generate("Explain this result") == LLM_UNAVAILABLE
+
+
+def test_streaming(stub):
+    server = stub(token_ms=1)
+    stream = llm_client.get_client().chat.completions.create(
+        model="stub-model",
+        messages=[{"role": "user", "content": "Explain"}],
+        max_tokens=5,
+        stream=True,
+    )
+    text = "".join(chunk.choices[0].delta.content or "" for chunk in stream)
+
+    assert len(text.split()) == 5
+    assert server.behaviour.stats["streamed"] == 1
@@ -0,0 +1,125 @@
+"""
+Logistics mart: lead-time build, question parsing and histogram percentiles.
+"""
+
+import sys
+import os
+
+import duckdb
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.intent_resolver import detect_intent
+from agent.logistics import build_logistics_mart, lead_time_sql, parse_lead_time
+from agent.sql_guardrails import validate_sql
+from agent.sql_templates import SQL_TEMPLATES
+from agent.time_windows import describe_month_span
+
+
+@pytest.fixture(scope="module")
+def con():
+    rng = np.random.default_rng(7)
+    n = 4000
+    delivery = rng.gamma(3.0, 4.0, n)
+    con = duckdb.connect()
+    con.execute("CREATE TABLE customers AS SELECT * FROM (VALUES ('c0', 'SP'), ('c1', 'RJ')) t(customer_id, customer_state)")
+    con.execute("CREATE TABLE sellers AS SELECT * FROM (VALUES ('s0', 'SP'), ('s1', 'MG')) t(seller_id, seller_state)")
+    con.execute("CREATE TABLE products AS SELECT * FROM (VALUES ('p0', 'pet_shop'), ('p1', NULL)) t(product_id, product_category_name)")
+    con.execute("CREATE TABLE d (i BIGINT, days DOUBLE)")
+    con.executemany("INSERT INTO d VALUES (?, ?)", list(enumerate(delivery.tolist())))
+    con.execute("""
+        CREATE TABLE orders AS SELECT
+            'o' || i AS order_id,
+            'c' || (i % 2) AS customer_id,
+            CASE WHEN i % 10 = 0 THEN 'shipped' ELSE 'delivered' END AS order_status,
+            TIMESTAMP '2017-01-01' + INTERVAL (i % 365) DAY AS order_purchase_timestamp,
+            TIMESTAMP '2017-01-01' + INTERVAL (i % 365) DAY + INTERVAL 6 HOUR AS order_approved_at,
+            TIMESTAMP '2017-01-01' + INTERVAL (i % 365) DAY + INTERVAL 2 DAY AS order_delivered_carrier_date,
+            TIMESTAMP '2017-01-01' + INTERVAL (i % 365) DAY + to_seconds(CAST(days * 86400 AS BIGINT))
+                AS order_delivered_customer_date,
+            TIMESTAMP '2017-01-01' + INTERVAL (i % 365) DAY + INTERVAL 20 DAY AS order_estimated_delivery_date
+        FROM d
+    """)
+    con.execute("""
+        CREATE TABLE order_items AS
+        SELECT order_id, 's' || (i % 2) AS seller_id, 'p' || (i % 2) AS product_id, 10.0 AS price FROM d, orders
+        WHERE order_id = 'o' || i
+        UNION ALL
+        SELECT order_id, 's1', 'p1', 1.0 FROM orders
+    """)
+    build_logistics_mart(con, bucket_days=0.25)
+    return con
+
+
+def _exact(con, where, q):
+    return con.execute(f"SELECT quantile_cont(delivery_days, {q}) FROM f_delivery WHERE {where}").fetchone()[0]
+
+
+def test_parse_lead_time():
+    assert parse_lead_time("p90 delivery time to SP") == {"percentiles": [90], "customer_state": "SP"}
+    assert parse_lead_time("median handling time from rj") == {
+        "percentiles": [50], "metric": "handling", "seller_state": "RJ"
+    }
+    assert parse_lead_time("95th percentile transit time in mg") == {
+        "percentiles": [95], "metric": "transit", "customer_state": "MG"
+    }
+    assert parse_lead_time("delivery time to zz") is None
+
+    # Two-letter words are not states; codes count in caps or at the end
+    assert parse_lead_time("p90 delivery time to go up?") == {"percentiles": [90]}
+    assert parse_lead_time("is median transit time in es or pt higher") == {"percentiles": [50], "metric": "transit"}
+    assert parse_lead_time("delivery time for pa") == {"customer_state": "PA"}
+    assert parse_lead_time("p75 delivery time to SP for pet shop") == {"percentiles": [75], "customer_state": "SP"}
+
+
+def test_payment_percentiles_do_not_route_to_delivery_times():
+    for question in ("show 90th percentile of payment value", "show p90 payment value", "p99 review score"):
+        assert detect_intent(question) != "delivery_time_percentiles", question
+    for question in ("p90 delivery time to SP", "p95 delivery by state", "percentile of delivery days",
+                     "median lead time", "p99 handling time from RJ"):
+        assert detect_intent(question) == "delivery_time_percentiles", question
+
+
+def test_mart_keeps_delivered_orders_and_main_item(con):
+    rows, states, categories = con.execute("""
+        SELECT COUNT(*), COUNT(DISTINCT seller_state), list(DISTINCT category ORDER BY category) FROM f_delivery
+    """).fetchone()
+    assert rows == 3600  # every 10th order is not delivered
+    assert states == 2 and categories == ["Unknown", "pet_shop"]
+    assert con.execute("SELECT SUM(n) FROM logistics_lead_hist WHERE metric = 'delivery'").fetchone()[0] == rows
+
+
+def test_histogram_percentiles_match_exact_quantiles(con):
+    # The static template is the unfiltered lead_time_sql()
+    default = lead_time_sql("delivery_time_percentiles", {})
+    assert " ".join(default.split()) == " ".join(SQL_TEMPLATES["delivery_time_percentiles"].split())
+
+    cases = [
+        ({}, "TRUE"),
+        ({"lead": {"customer_state": "RJ"}}, "customer_state = 'RJ'"),
+        ({"lead": {"seller_state": "SP"}, "category": "pet_shop"}, "seller_state = 'SP' AND category = 'pet_shop'"),
+        ({"window": ("2017-03-01", "2017-07-01")}, "year_month >= '2017-03' AND year_month < '2017-07'"),
+        # Mid-month window → widened to the whole months it touches
+        ({"window": ("2017-03-15", "2017-07-10")}, "year_month >= '2017-03' AND year_month <= '2017-07'"),
+    ]
+    for filters, where in cases:
+        sql = lead_time_sql("delivery_time_percentiles", filters)
+        assert validate_sql(sql)
+        row = con.execute(sql).df().iloc[0]
+        assert row["orders"] == con.execute(f"SELECT COUNT(*) FROM f_delivery WHERE {where}").fetchone()[0]
+        for p in (50, 90, 99):
+            assert row[f"p{p}_days"] == pytest.approx(_exact(con, where, p / 100), abs=0.3)
+
+    # A week inside one month reads that whole month, and says so
+    week = con.execute(lead_time_sql("delivery_time_percentiles", {"window": ("2017-12-05", "2017-12-12")})).df()
+    assert week["orders"][0] == con.execute("SELECT COUNT(*) FROM f_delivery WHERE year_month = '2017-12'").fetchone()[0]
+    assert describe_month_span(("2017-12-05", "2017-12-12")) == "whole month 2017-12"
+    assert describe_month_span(("2017-03-15", "2017-07-10")) == "whole months 2017-03 → 2017-07"
+
+    extra = con.execute(lead_time_sql("delivery_time_percentiles", {"lead": {"percentiles": [85]}})).df()
+    assert "p85_days" in extra.columns
+    assert lead_time_sql("revenue_by_category", {}) is None
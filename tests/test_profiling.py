@@ -0,0 +1,83 @@
+"""
+Slow-query profiling: keys, the JSONL store and governed background captures.
+"""
+
+import sys
+import os
+import threading
+
+import duckdb
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import governor, profiling
+from agent.governor import QueryRejected
+
+
+def test_profile_key_ignores_filter_order():
+    a = profiling.profile_key("revenue_by_category", {"state": "SP", "limit": 5})
+    b = profiling.profile_key("revenue_by_category", {"limit": 5, "state": "SP"})
+    assert a == b
+    assert profiling.profile_key("revenue_by_category", None) == profiling.profile_key("revenue_by_category", {})
+    assert a != profiling.profile_key("revenue_by_category", {"state": "RJ", "limit": 5})
+
+
+def test_store_profile_appends_records(tmp_path):
+    path = str(tmp_path / "profiles.jsonl")
+    assert profiling.load_profiles(path) == []
+    profiling.store_profile({"intent": "a", "window": ("2017-01-01", "2017-02-01")}, path)
+    profiling.store_profile({"intent": "b"}, path)
+    records = profiling.load_profiles(path)
+    assert [r["intent"] for r in records] == ["a", "b"]
+    assert records[0]["window"] == ["2017-01-01", "2017-02-01"]
+
+
+def test_capture_runs_under_the_governor(tmp_path, monkeypatch):
+    path = str(tmp_path / "profiles.jsonl")
+    monkeypatch.setattr(governor, "QUERY_MAX_ROWS", 5)
+    record = profiling.capture(duckdb.connect, "SELECT range AS id FROM range(1000)",
+                               "ids", {"limit": 5}, observed_ms=900.0, label="test", path=path)
+    assert record["rows_returned"] <= 6  # cut by the row cap inside the query
+    assert record["plan"] and record["elapsed_ms"] >= 0
+    assert profiling.load_profiles(path)[0]["key"] == profiling.profile_key("ids", {"limit": 5})
+
+    # No free slot: the capture is refused rather than queued indefinitely
+    monkeypatch.setattr(governor, "_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(governor, "QUERY_ADMISSION_WAIT_S", 0.05)
+    governor._slots.acquire()
+    try:
+        with pytest.raises(QueryRejected):
+            profiling.capture(duckdb.connect, "SELECT 1", "one", {}, path=path)
+    finally:
+        governor._slots.release()
+    assert len(profiling.load_profiles(path)) == 1
+
+
+def test_maybe_capture_runs_one_capture_per_key(monkeypatch, caplog):
+    release = threading.Event()
+    calls = []
+
+    def fake_capture(connect, sql, intent, filters, observed_ms=None):
+        calls.append(intent)
+        release.wait(5)
+        raise RuntimeError("profiling blew up")
+
+    monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 100.0)
+    monkeypatch.setattr(profiling, "capture", fake_capture)
+
+    assert not profiling.maybe_capture(duckdb.connect, "SELECT 1", 50.0, "fast", {})
+    assert profiling.maybe_capture(duckdb.connect, "SELECT 1", 500.0, "slow", {"limit": 3})
+    assert profiling.maybe_capture(duckdb.connect, "SELECT 1", 700.0, "slow", {"limit": 3})
+
+    with caplog.at_level("WARNING", logger="agent.profiling"):
+        release.set()
+        for thread in threading.enumerate():
+            if thread.name == "olist-profiler":
+                thread.join(5)
+
+    assert calls == ["slow"]
+    assert not profiling._in_flight
+    assert "Profiling slow failed: profiling blew up" in caplog.text
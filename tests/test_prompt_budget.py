@@ -0,0 +1,40 @@
+"""
+Token estimate, compact table encoding and priority trimming.
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.prompt_budget import encode_table, estimate_tokens, fit_sections, section
+
+
+def test_encode_table_rounds_and_abbreviates():
+    df = pd.DataFrame({
+        "seller_id": ["4869f7a5dfa277a7dca6462dcf3b52b2", "53243585a1d6dc2643021fd1853d8905"],
+        "revenue": [229472.634, 12.3456],
+    })
+    assert encode_table(df, max_rows=1) == "seller_id,revenue\n4869f7a5…,229473\n… (1 more rows)"
+    assert estimate_tokens(encode_table(df)) < estimate_tokens(df.to_string(index=False))
+
+
+def test_fit_sections_trims_lowest_priority_first():
+    table = "\n".join(["category,revenue"] + [f"cat_{i},{i * 1000}" for i in range(50)])
+    sections = [
+        section("Question:", "show revenue by category"),
+        section("Table:", table, priority=1, min_lines=2),
+        section("Context:", "lorem ipsum dolor " * 100, priority=2),
+    ]
+
+    prompt, report = fit_sections(sections, budget=120)
+
+    assert report["dropped"] == ["Context:"]
+    assert report["trimmed"] == ["Table:"]
+    assert report["prompt_tokens"] <= 120
+    assert "Question:\nshow revenue by category" in prompt
+    assert "category,revenue\ncat_0,0" in prompt
@@ -0,0 +1,28 @@
+"""
+Knowledge-base chunking and BM25 retrieval.
+"""
+
+import sys
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.rag import retrieve, split_markdown, get_context
+
+
+def test_markdown_is_split_by_heading_with_path():
+    chunks = split_markdown("# Title\n\n## A\nalpha\n\n---\n\n## B\n### b1\nbeta one\n")
+
+    assert [c["heading"] for c in chunks] == ["A", "B › b1"]
+    assert chunks[1]["text"] == "B › b1\nbeta one"
+
+
+def test_retrieve_ranks_relevant_chunks_within_budget():
+    results = retrieve("why do late deliveries hurt reviews", k=2, token_budget=200)
+
+    assert results and len(results) <= 2
+    assert "Review" in results[0]["heading"]
+    assert sum(r["tokens"] for r in results) <= 200
+    assert sum(r["tokens"] for r in results) < len(get_context()) // 4
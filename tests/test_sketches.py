@@ -0,0 +1,126 @@
+"""
+Aggregate sketches: HyperLogLog distinct counts and quantile sketches merged across cells.
+"""
+
+import sys
+import os
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.intent_resolver import detect_intent
+from agent.sketches import SKETCH_INTENTS, build_sketch_tables, sketch_sql
+from agent.sql_guardrails import validate_sql
+from agent.sql_templates import SQL_TEMPLATES
+
+STATES = ["SP", "RJ", "MG", "RS"]
+CATEGORIES = ["pet_shop", "esporte_lazer", None]
+PAYMENT_TYPES = ["credit_card", "boleto", "voucher"]
+
+
+@pytest.fixture(scope="module")
+def con():
+    rng = np.random.default_rng(5)
+    facts, customers = [], []
+    for i in range(20000):
+        person = int(rng.integers(0, 8000))
+        customers.append((f"c{i}", f"u{person}"))
+        payment_type = PAYMENT_TYPES[int(rng.integers(0, 3))]
+        payment = round(float(rng.lognormal(4.5, 0.8)), 2) if payment_type != "voucher" or i % 7 else 0.0
+        review = int(rng.integers(1, 6)) if i % 9 else None
+        # Multi-item orders: one fact row per item, payment / review repeated
+        for item in range(1 + int(rng.random() < 0.2) * 2):
+            facts.append((
+                f"o{i}", f"c{i}", f"2017-{int(rng.integers(1, 13)) if item == 0 else 1:02d}-15",
+                CATEGORIES[(i + item) % 3], STATES[person % 4], STATES[(i + item) % 4],
+                payment_type, payment, review,
+            ))
+    con = duckdb.connect()
+    customers = pd.DataFrame(customers, columns=["customer_id", "customer_unique_id"])
+    raw = pd.DataFrame(facts, columns=["order_id", "customer_id", "day", "category", "customer_state",
+                                       "seller_state", "payment_type", "payment_value", "review_score"])
+    con.execute("CREATE TABLE customers AS SELECT * FROM customers")
+    # An order keeps one purchase date across its items
+    con.execute("""
+        CREATE TABLE f_order_facts AS
+        SELECT
+            * EXCLUDE (day, review_score),
+            CAST(review_score AS INTEGER) AS review_score,
+            CAST(MIN(CAST(day AS DATE)) OVER (PARTITION BY order_id) AS TIMESTAMP) AS order_purchase_timestamp
+        FROM raw
+    """)
+    build_sketch_tables(con, precision=12, relative_accuracy=0.01)
+    return con
+
+
+def test_templates_are_the_unfiltered_rollups(con):
+    for intent in SKETCH_INTENTS:
+        sql = sketch_sql(intent, {})
+        assert " ".join(sql.split()) == " ".join(SQL_TEMPLATES[intent].split())
+        assert validate_sql(sql)
+    assert sketch_sql("revenue_by_category", {}) is None
+
+    limited = con.execute(sketch_sql("unique_customers_by_state", {"limit": 2, "order": "asc"})).df()
+    assert len(limited) == 2 and limited["customers"].is_monotonic_increasing
+
+
+def test_hll_distinct_counts_merge_across_cells(con):
+    df = con.execute(SQL_TEMPLATES["unique_customers_by_state"]).df().set_index("customer_state")
+    exact = dict(con.execute("""
+        SELECT f.customer_state, COUNT(DISTINCT c.customer_unique_id)
+        FROM f_order_facts f JOIN customers c USING (customer_id)
+        GROUP BY 1
+    """).fetchall())
+    for state, customers in exact.items():
+        assert df.loc[state, "customers"] == pytest.approx(customers, rel=0.05)
+
+    # Revenue stays exact (additive)
+    revenue = con.execute("SELECT ROUND(SUM(payment_value), 2) FROM f_order_facts").fetchone()[0]
+    assert df["revenue"].sum() == pytest.approx(revenue)
+
+    # Orders spanning several seller states count once per state, as in
+    # COUNT(DISTINCT); a mid-month window covers the whole months it touches
+    filters = {"category": "pet_shop", "window": ("2017-03-20", "2017-08-10")}
+    got = con.execute(sketch_sql("seller_state_reach", filters)).df().set_index("seller_state")
+    expected = con.execute("""
+        SELECT seller_state, COUNT(DISTINCT order_id) FROM f_order_facts
+        WHERE category = 'pet_shop' AND order_purchase_timestamp >= '2017-03-01'
+          AND order_purchase_timestamp < '2017-09-01'
+        GROUP BY 1
+    """).fetchall()
+    for state, orders in expected:
+        assert got.loc[state, "orders"] == pytest.approx(orders, rel=0.05)
+
+
+def test_quantile_sketch_counts_each_payment_once(con):
+    df = con.execute(SQL_TEMPLATES["payment_value_percentiles"]).df().set_index("payment_type")
+    for payment_type in PAYMENT_TYPES:
+        values = np.array([v for (v,) in con.execute(
+            "SELECT payment_value FROM f_order_facts WHERE payment_type = ? GROUP BY order_id, payment_value",
+            [payment_type],
+        ).fetchall()])
+        assert df.loc[payment_type, "payments"] == len(values)
+        for column, p in (("p25_payment", 25), ("median_payment", 50), ("p90_payment", 90)):
+            exact = np.quantile(values, p / 100, method="lower")
+            assert df.loc[payment_type, column] == pytest.approx(exact, rel=0.011, abs=0.01)
+
+    reviews = con.execute(SQL_TEMPLATES["review_score_by_category"]).df()
+    assert set(reviews["median_review"]) <= {1.0, 2.0, 3.0, 4.0, 5.0}
+    assert reviews["reviews"].sum() == con.execute(
+        "SELECT COUNT(DISTINCT order_id) FROM f_order_facts WHERE review_score IS NOT NULL"
+    ).fetchone()[0]
+
+
+def test_percentile_phrasings_reach_the_sketch_intents():
+    for question in ("show 90th percentile of payment value", "percentiles of payment", "show p90 payment value",
+                     "median payment value", "payment value percentiles", "p25 payment by type"):
+        assert detect_intent(question) == "payment_value_percentiles", question
+    for question in ("show median review score", "10th percentile of review score", "p25 review score",
+                     "review score percentiles by category"):
+        assert detect_intent(question) == "review_score_by_category", question
@@ -0,0 +1,86 @@
+"""
+SQL guardrails: parser-based allowlists, verdict cache and result-size cap.
+"""
+
+import sys
+import os
+
+import duckdb
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import sql_guardrails
+from agent.sql_guardrails import (
+    UnsafeSQLError,
+    check_result_size,
+    relations_used,
+    validate_sql,
+)
+from agent.sql_templates import SQL_TEMPLATES
+
+
+@pytest.mark.parametrize("sql", [
+    "DROP TABLE orders",
+    "COPY (SELECT 1) TO 'out.csv'",
+    "SELECT 1; SELECT 2",
+    "SELECT * FROM read_csv('/etc/passwd')",
+    "SELECT * FROM customers",
+    "SELECT getenv('HOME')",
+    "SELECT * FROM other_db.main.orders",
+    "WITH customers AS (SELECT * FROM customers) SELECT * FROM customers",
+    "SELECT category FROM v_category_revenue WHERE category = 'x' "
+    "UNION SELECT column0 FROM read_csv('f') --'",
+    "SELECT * FROM 'v_leak.csv'",
+    "SELECT * FROM v_category_revenue, 's_/etc/hostname'",
+    "SELECT * FROM 'v_category_revenue'",
+    'SELECT * FROM "v_category_revenue"',
+])
+def test_unsafe_queries_are_rejected(sql):
+    with pytest.raises(UnsafeSQLError):
+        validate_sql(sql)
+
+
+def test_templates_pass_and_report_relations():
+    for sql in SQL_TEMPLATES.values():
+        assert validate_sql(sql)
+    assert relations_used(SQL_TEMPLATES["yearly_revenue"]) == {"v_yearly_revenue"}
+    assert relations_used(
+        "WITH t AS (SELECT * FROM f_order_facts) SELECT COUNT(*) FROM t"
+    ) == {"f_order_facts"}
+
+
+def test_verdicts_are_cached_by_exact_text(monkeypatch):
+    a = "SELECT category, revenue FROM v_category_revenue WHERE category = 'pet_shop' LIMIT 5"
+    validate_sql(a)
+    with monkeypatch.context() as m:
+        m.setattr(sql_guardrails, "_serialize", lambda sql: pytest.fail("re-parsed"))
+        validate_sql(a)
+
+    # Same shape, different literal in FROM position: never shares a verdict
+    with pytest.raises(UnsafeSQLError):
+        validate_sql("SELECT * FROM 'v_category_revenue'")
+    with pytest.raises(UnsafeSQLError, match="secret"):
+        validate_sql("SELECT * FROM '/tmp/secret.csv'")
+
+
+def test_cached_rejection_reports_its_own_query():
+    with pytest.raises(UnsafeSQLError, match="s_one"):
+        validate_sql("SELECT * FROM 's_one'")
+    with pytest.raises(UnsafeSQLError, match="s_two"):
+        validate_sql("SELECT * FROM 's_two'")
+    with pytest.raises(UnsafeSQLError, match="s_one"):
+        validate_sql("SELECT * FROM 's_one'")
+
+
+def test_result_size_cap():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE f_order_facts AS SELECT range AS id FROM range(1000)")
+    sql = "SELECT id FROM f_order_facts"
+
+    assert check_result_size(con, sql, "mem", max_rows=5000) == 1000
+    assert check_result_size(con, sql + " LIMIT 10", "mem", max_rows=100) == 10
+    with pytest.raises(UnsafeSQLError, match="too large"):
+        check_result_size(con, sql, "mem", max_rows=100)
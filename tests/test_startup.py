@@ -0,0 +1,23 @@
+"""
+Cold start: importing the agent must not load heavy dependencies.
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY = ("duckdb", "openai", "matplotlib", "pandas", "numpy", "dateutil")
+
+
+def test_agent_import_defers_heavy_modules():
+    code = (
+        "import sys, agent.agent_core, agent.llm_explain, agent.chart, agent.knowledge; "
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+    assert out == "", f"Loaded at import: {out}"
@@ -0,0 +1,48 @@
+"""
+Time-window parsing, dataset-anchored resolution and SQL rewrite.
+"""
+
+import sys
+import os
+from datetime import date
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.time_windows import (
+    parse_time_window,
+    resolve_window,
+    apply_time_window,
+    supports_time_window,
+)
+from agent.sql_templates import SQL_TEMPLATES
+
+ANCHOR = date(2018, 9, 3)
+
+
+def test_parse_relative_windows():
+    assert parse_time_window("revenue by category last 6 months") == ("last", 6, "months")
+    assert parse_time_window("monthly revenue past year") == ("last", 1, "years")
+    assert parse_time_window("revenue in Q3 2017") == ("quarter", 2017, 3)
+    assert parse_time_window("revenue 2018 q1") == ("quarter", 2018, 1)
+    assert parse_time_window("aov ytd") == ("ytd",)
+    assert parse_time_window("revenue in 2017") == ("year", 2017)
+    assert parse_time_window("show revenue by category") is None
+
+
+def test_windows_anchor_to_dataset_max_date():
+    assert resolve_window(("last", 6, "months"), ANCHOR) == ("2018-03-04", "2018-09-04")
+    assert resolve_window(("ytd",), ANCHOR) == ("2018-01-01", "2018-09-04")
+    assert resolve_window(("quarter", 2017, 3), ANCHOR) == ("2017-07-01", "2017-10-01")
+    assert resolve_window(("year", 2017), ANCHOR) == ("2017-01-01", "2018-01-01")
+
+
+def test_rewrite_targets_sorted_fact_table():
+    sql = SQL_TEMPLATES["revenue_by_category"]
+    assert supports_time_window(sql)
+
+    windowed = apply_time_window(sql, "2018-03-04", "2018-09-04")
+    assert "FROM f_order_facts" in windowed
+    assert "order_purchase_timestamp >= TIMESTAMP '2018-03-04'" in windowed
+    assert windowed.strip().endswith("ORDER BY revenue DESC")
@@ -0,0 +1,80 @@
+"""
+Top-K ranked tables: prefix reads match the SQL templates they replace.
+"""
+
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import db
+from agent.agent_core import _db_path, apply_filters
+from agent.sql_guardrails import validate_sql
+from agent.sql_templates import SQL_TEMPLATES
+from agent.topk import TOPK_INTENTS, topk_bound, topk_sql
+
+
+@pytest.fixture(scope="module")
+def con():
+    con = db.connect(_db_path())
+    yield con
+    con.close()
+
+
+@pytest.fixture(scope="module")
+def bound():
+    return topk_bound(_db_path())
+
+
+def _assert_same_ranking(got, expected):
+    """Same columns and metric sequence; rows tied at the cut may differ."""
+    assert list(got.columns) == list(expected.columns)
+    metric = got.columns[-1]
+    pd.testing.assert_series_equal(got[metric], expected[metric], check_dtype=False)
+    inside = got[metric] != got[metric].iloc[-1]
+    pd.testing.assert_frame_equal(
+        got[inside].sort_values(list(got.columns)).reset_index(drop=True),
+        expected[inside].sort_values(list(got.columns)).reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize("intent", sorted(TOPK_INTENTS))
+def test_prefix_read_matches_template(con, bound, intent):
+    for filters in ({"limit": 5}, {"limit": 5, "order": "asc"}, {"limit": 5, "order": "desc"}):
+        sql = topk_sql(intent, filters, bound)
+        assert validate_sql(sql)
+        got = con.execute(sql).df()
+        assert len(got) == 5
+        _assert_same_ranking(got, con.execute(apply_filters(SQL_TEMPLATES[intent], filters)).df())
+
+
+def test_default_n_and_direction(con, bound):
+    # highest / lowest keep their template's N and direction
+    for intent in ("highest_revenue_category", "lowest_revenue_category", "least_selling_category"):
+        got = con.execute(topk_sql(intent, {}, bound)).df()
+        _assert_same_ranking(got, con.execute(SQL_TEMPLATES[intent]).df())
+
+    # "bottom N" flips a descending intent
+    bottom = con.execute(topk_sql("top_customers", {"order": "asc"}, bound)).df()
+    assert len(bottom) == 10 and bottom["lifetime_value"].is_monotonic_increasing
+
+
+def test_falls_back_beyond_the_bound_or_with_other_filters(bound):
+    assert topk_sql("top_products_by_revenue", {"limit": bound}, bound) is not None
+    assert topk_sql("top_products_by_revenue", {"limit": bound + 1}, bound) is None
+    assert topk_sql("top_products_by_revenue", {"limit": 5}, 0) is None  # tables not built
+
+    # No N: the whole ranking is asked for
+    assert topk_sql("revenue_by_category", {}, bound) is None
+    assert topk_sql("revenue_by_category", {"order": "asc"}, bound) is None
+
+    for filters in ({"limit": 5, "category": "pet_shop"}, {"limit": 5, "year": 2017},
+                    {"limit": 5, "window": ("2017-01-01", "2017-02-01")}):
+        assert topk_sql("revenue_by_category", filters, bound) is None
+    assert topk_sql("monthly_revenue_trend", {"limit": 5}, bound) is None
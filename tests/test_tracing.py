@@ -0,0 +1,82 @@
+"""
+Span timing, in-process percentiles and exporters.
+"""
+
+import sys
+import os
+import json
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import tracing
+from agent.tracing import (
+    start_trace,
+    span,
+    annotate,
+    StageStats,
+    JsonlExporter,
+    PrometheusExporter,
+)
+
+
+def test_spans_and_attributes_are_recorded():
+    with start_trace("show revenue by category") as trace:
+        with span("detect_intent"):
+            pass
+        with span("execute"):
+            pass
+        annotate("resolution", "rule")
+
+    assert [s["name"] for s in trace.spans] == ["detect_intent", "execute"]
+    assert trace.attributes["resolution"] == "rule"
+    assert trace.total_ms >= sum(trace.stage_ms().values())
+
+
+def test_span_outside_trace_is_noop():
+    with span("execute"):
+        annotate("resolution", "rule")
+    assert tracing.current_trace() is None
+
+
+def test_percentiles_and_prometheus_text():
+    stats = StageStats(window=100)
+    for ms in range(1, 101):
+        trace = tracing.Trace("q")
+        trace.spans.append({"name": "execute", "start_ms": 0, "duration_ms": float(ms)})
+        trace.set("resolution", "rule")
+        trace.total_ms = float(ms)
+        stats.observe(trace)
+
+    p = stats.percentiles("execute")
+    assert p[0.5] == 51 and p[0.99] == 100
+
+    text = PrometheusExporter(path=None, stats=stats).render()
+    assert 'olist_answer_stage_seconds{stage="execute",quantile="0.95"} 0.096000' in text
+    assert 'olist_answer_stage_seconds_count{stage="execute"} 100' in text
+    assert 'olist_answer_resolution_total{path="rule"} 100' in text
+
+
+@pytest.fixture
+def exporters():
+    """Test-only exporters; the process-wide list is restored afterwards."""
+    saved = list(tracing._exporters)
+    tracing.clear_exporters()
+    yield
+    tracing.clear_exporters()
+    tracing._exporters.extend(saved)
+
+
+def test_jsonl_exporter(tmp_path, exporters):
+    path = tmp_path / "traces.jsonl"
+    tracing.register_exporter(JsonlExporter(str(path)))
+    with start_trace("hello"):
+        with span("handle_conversation"):
+            pass
+
+    record = json.loads(path.read_text().splitlines()[0])
+    assert record["question"] == "hello"
+    assert record["spans"][0]["name"] == "handle_conversation"
@@ -0,0 +1,295 @@
+# tools/llm_stub_server.py
+
+"""
+OpenAI-compatible stand-in for the local LLM (LM Studio).
+
+Serves /v1/models and /v1/chat/completions (incl. stream=true) with
+deterministic answers, so the full answer() + explain() pipeline can
+be tested and load-tested without a GPU:
+
+- intent prompts ("Choose the BEST matching intent ...") are answered
+  with the listed intent that best overlaps the question, a canned
+  answer when one is configured, or NONE
+- every other prompt gets a short canned explanation
+
+Latency and failures are injectable:
+    --latency fixed:200 | uniform:100:400 | normal:300:50 | lognormal:250:0.5   (ms)
+    --token-ms 15        per streamed token
+    --fail-rate 0.05     fraction of requests answered with --fail-status
+    --hang-rate 0.01     fraction of requests that stall for --hang-s
+
+Usage:
+    python tools/llm_stub_server.py --port 8000 --latency lognormal:300:0.4
+    OLIST_LLM_BASE_URL=http://127.0.0.1:8000/v1 streamlit run streamlit_app.py
+
+In tests: with StubServer(latency="fixed:0") as stub: ... stub.base_url
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INTENT_PROMPT = re.compile(
+    r"Choose the BEST matching intent from this list:\s*(\[.*?\])\s*User question:\s*\"(.*?)\"",
+    re.S,
+)
+
+EXPLANATION = (
+    "This result is generated by the local LLM stub. The figures above come "
+    "directly from the query and are summarized without additional claims. "
+    "Differences between rows reflect the underlying order data. Use a real "
+    "model for production explanations."
+)
+
+
+# ----------------------------------
+# Behaviour
+# ----------------------------------
+def parse_latency(spec: str):
+    """'kind:a[:b]' in milliseconds → function(rng) returning seconds."""
+    kind, *args = spec.split(":")
+    a = [float(x) for x in args]
+    samplers = {
+        "fixed": lambda rng: a[0],
+        "uniform": lambda rng: rng.uniform(a[0], a[1]),
+        "normal": lambda rng: max(0.0, rng.gauss(a[0], a[1])),
+        "lognormal": lambda rng: a[0] * rng.lognormvariate(0.0, a[1]),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution: {spec}")
+    return lambda rng: samplers[kind](rng) / 1e3
+
+
+# Words that only qualify an intent; a match needs at least one content word
+QUALIFIERS = {"top", "by", "per", "most", "least", "highest", "lowest", "average"}
+
+
+def _tokens(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.lower().replace("_", " ")))
+
+
+def pick_intent(question: str, allowed: list, canned: dict) -> str:
+    """
+    Canned match first, then the allowed intent sharing most words
+    (list order breaks ties), else NONE.
+    """
+    q = question.lower()
+    for phrase, intent in canned.items():
+        if phrase in q:
+            return intent
+
+    words = _tokens(question)
+    best, best_score = "NONE", 0
+    for intent in allowed:
+        matched = [
+            part for part in _tokens(intent)
+            if any(w == part or (len(w) >= 4 and (part.startswith(w) or w.startswith(part))) for w in words)
+        ]
+        score = len(matched)
+        if score > best_score and set(matched) - QUALIFIERS:
+            best, best_score = intent, score
+    return best
+
+
+class StubBehaviour:
+    def __init__(self, latency="fixed:0", token_ms=0.0, fail_rate=0.0, fail_status=500,
+                 hang_rate=0.0, hang_s=30.0, canned=None, model="stub-model", seed=0):
+        self.sample_latency = parse_latency(latency)
+        self.token_s = token_ms / 1e3
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.hang_rate = hang_rate
+        self.hang_s = hang_s
+        self.canned = canned or {}
+        self.model = model
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "failed": 0, "hung": 0, "streamed": 0}
+
+    def draw(self):
+        with self.lock:
+            self.stats["requests"] += 1
+            return self.rng.random(), self.rng.random(), self.sample_latency(self.rng)
+
+    def reply(self, messages: list, max_tokens: int = None) -> str:
+        prompt = "\n".join(m.get("content") or "" for m in messages)
+        m = INTENT_PROMPT.search(prompt)
+        if m:
+            try:
+                allowed = json.loads(m.group(1).replace("'", '"'))
+            except ValueError:
+                allowed = []
+            return pick_intent(m.group(2), allowed, self.canned)
+
+        words = EXPLANATION.split()
+        return " ".join(words[:max_tokens] if max_tokens else words)
+
+
+# ----------------------------------
+# HTTP
+# ----------------------------------
+class _Handler(BaseHTTPRequestHandler):
+    behaviour: StubBehaviour = None
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        b = self.behaviour
+        if self.path.rstrip("/").endswith("/models"):
+            return self._json(200, {"object": "list", "data": [{"id": b.model, "object": "model"}]})
+        if self.path.rstrip("/").endswith("/stats"):
+            return self._json(200, b.stats)
+        self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        b = self.behaviour
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": "not found"}})
+
+        length = int(self.headers.get("Content-Length", 0))
+        req = json.loads(self.rfile.read(length) or b"{}")
+
+        fail_draw, hang_draw, latency = b.draw()
+        if fail_draw < b.fail_rate:
+            with b.lock:
+                b.stats["failed"] += 1
+            return self._json(b.fail_status, {"error": {"message": "injected failure", "type": "server_error"}})
+        if hang_draw < b.hang_rate:
+            with b.lock:
+                b.stats["hung"] += 1
+            time.sleep(b.hang_s)
+
+        time.sleep(latency)
+        text = b.reply(req.get("messages", []), req.get("max_tokens"))
+        model = req.get("model", b.model)
+        created = int(time.time())
+
+        if req.get("stream"):
+            with b.lock:
+                b.stats["streamed"] += 1
+            return self._stream(text, model, created)
+
+        n_prompt = sum(len((m.get("content") or "").split()) for m in req.get("messages", []))
+        self._json(200, {
+            "id": f"chatcmpl-stub-{created}",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": n_prompt,
+                "completion_tokens": len(text.split()),
+                "total_tokens": n_prompt + len(text.split()),
+            },
+        })
+
+    def _stream(self, text, model, created):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def send(delta, finish=None):
+            chunk = {
+                "id": f"chatcmpl-stub-{created}",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        send({"role": "assistant", "content": ""})
+        for i, word in enumerate(text.split()):
+            time.sleep(self.behaviour.token_s)
+            send({"content": word if i == 0 else " " + word})
+        send({}, finish="stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class StubServer:
+    """Runs the stub on a background thread; port 0 picks a free port."""
+
+    def __init__(self, host="127.0.0.1", port=0, **behaviour):
+        self.behaviour = StubBehaviour(**behaviour)
+        handler = type("Handler", (_Handler,), {"behaviour": self.behaviour})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible LLM stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", default="fixed:0")
+    parser.add_argument("--token-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fail-status", type=int, default=500)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-s", type=float, default=30.0)
+    parser.add_argument("--canned", help="JSON file: {question phrase: intent}")
+    parser.add_argument("--model", default="stub-model")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    canned = {}
+    if args.canned:
+        with open(args.canned, encoding="utf-8") as f:
+            canned = json.load(f)
+
+    server = StubServer(
+        args.host, args.port,
+        latency=args.latency, token_ms=args.token_ms,
+        fail_rate=args.fail_rate, fail_status=args.fail_status,
+        hang_rate=args.hang_rate, hang_s=args.hang_s,
+        canned=canned, model=args.model, seed=args.seed,
+    )
+    print(f"🤖 LLM stub on {server.base_url} (latency {args.latency}, fail rate {args.fail_rate})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()